@@ -0,0 +1,91 @@
+'''
+Prometheus metrics of the API and the /metrics endpoint.
+
+Multiprocess servers (e.g. gunicorn with many workers) have to export the
+prometheus_multiproc_dir environment variable pointing to an empty directory
+before the workers start; the /metrics view then aggregates values of all
+processes. Call prometheus_client.multiprocess.mark_process_dead(pid) from the
+server's child exit hook to drop gauges of dead workers.
+'''
+from contextlib import ExitStack
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (
+    CollectorRegistry,
+    Histogram,
+    REGISTRY,
+    CONTENT_TYPE_LATEST,
+    generate_latest,
+    multiprocess,
+)
+import os
+import time
+
+
+REQUEST_LATENCY = Histogram(
+    'ml_app_http_request_duration_seconds',
+    'Latency of HTTP requests per view',
+    ['view', 'method', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'ml_app_http_request_db_queries',
+    'Number of database queries per HTTP request',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500),
+)
+
+
+def get_registry():
+    '''
+    Function returns registry with metrics of all processes in multiprocess mode
+    '''
+    if 'prometheus_multiproc_dir' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view(request):
+    '''
+    View exposing metrics in Prometheus text format
+    '''
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+class QueryCounter:
+    '''
+    Database execute wrapper counting queries
+    '''
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    '''
+    Middleware recording latency and number of DB queries of every request per view
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        latency = time.perf_counter() - start
+
+        view = getattr(request, 'metrics_view_name', 'unmatched')
+        if view != metrics_view.__name__:
+            REQUEST_LATENCY.labels(view, request.method, response.status_code).observe(latency)
+            REQUEST_DB_QUERIES.labels(view).observe(counter.count)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view_name = getattr(view_func, 'view_class', view_func).__name__
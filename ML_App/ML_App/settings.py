@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ML_App.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -128,4 +129,133 @@ LEVEL_CHOICES = (
     ('Beginner Level', 'Beginner Level'),
     ('Intermediate Level', 'Intermediate Level'),
     ('Expert Level', 'Expert Level'),
-)
\ No newline at end of file
+)
+
+# in-process cache of unserialized ML models (MAX_MEMORY in bytes)
+ML_MODEL_REGISTRY = {
+    'MAX_MEMORY': 512 * 1024 * 1024,
+}
+
+# maximal number of requests in one call of batch prediction endpoint
+ML_BATCH_PREDICTION = {
+    'MAX_SIZE': 5000,
+}
+
+# maximal number of points of the days curve endpoint
+ML_CURVE = {
+    'MAX_POINTS': 1000,
+}
+
+# what-if sweep endpoint: maximal grid size and number of points scored with one model call
+ML_SWEEP = {
+    'MAX_POINTS': 10000,
+    'CHUNK_SIZE': 2000,
+}
+
+# number of CSV rows read and scored at once by the streaming scoring endpoint
+ML_CSV_SCORING = {
+    'CHUNK_SIZE': 1000,
+}
+
+# opt-in micro-batching of concurrent single predictions for the same model
+# (WINDOW in seconds)
+ML_MICRO_BATCHING = {
+    'ENABLED': False,
+    'WINDOW': 0.005,
+    'MAX_BATCH_SIZE': 32,
+}
+
+# thread pool for scoring one input with many algorithms
+ML_FAN_OUT = {
+    'MAX_WORKERS': 4,
+}
+
+# cache of prediction results, keyed on request input and model file hash
+# (use 'Prediction_Pipeline.prediction_cache.DjangoCacheBackend' with
+# 'OPTIONS': {'CACHE_ALIAS': 'default', 'TIMEOUT': 3600} to share it between processes)
+ML_PREDICTION_CACHE = {
+    'ENABLED': False,
+    'BACKEND': 'Prediction_Pipeline.prediction_cache.LocMemBackend',
+    'OPTIONS': {
+        'MAX_ENTRIES': 10000,
+        'TIMEOUT': 3600,
+    },
+}
+
+# optional pool of inference worker processes (TIMEOUT in seconds)
+ML_INFERENCE_WORKERS = {
+    'ENABLED': False,
+    'PROCESSES': 2,
+    'TIMEOUT': 30,
+    'PRELOAD': True,
+    'START_METHOD': 'spawn',
+}
+
+# preload and warm up models when the server starts (TOP_N - only the N most used models)
+ML_WARMUP = {
+    'ENABLED': False,
+    'TOP_N': None,
+    'BACKGROUND': True,
+}
+
+# chunked, resumable uploads of model files (MAX_SIZE in bytes), uploads without
+# a chunk for EXPIRE_AFTER seconds are removed (manage.py expire_uploads)
+ML_MODEL_UPLOADS = {
+    'MAX_SIZE': 2 * 1024 ** 3,
+    'EXPIRE_AFTER': 24 * 3600,
+}
+
+# similar courses lookup: TF-IDF index of SOURCE titles stored in INDEX_DIR
+# ("python manage.py build_similarity_index"), memory-mapped at startup when PRELOAD,
+# AUTO_BUILD builds missing index on the first lookup (inside the request, meant for development)
+ML_SIMILAR_COURSES = {
+    'SOURCE': os.path.join(os.path.dirname(BASE_DIR), 'Analitics', 'udemy_courses_cleaned.csv'),
+    'INDEX_DIR': os.path.join(BASE_DIR, 'similarity_index'),
+    'PRELOAD': True,
+    'AUTO_BUILD': False,
+    'TOP_K': 10,
+    'MAX_K': 100,
+}
+
+# compaction of model files at registration: float64 arrays are stored as float32 and
+# unused fitted attributes are dropped, the compacted file is kept only when predictions
+# on SAMPLE_SIZE rows of SAMPLE_PATH stay within RTOL/ATOL (numpy.allclose),
+# MODELS overrides any of the keys per MlModel name, e.g. {'KNeighborsRegressor': {'FLOAT32': False}}
+ML_MODEL_COMPACTION = {
+    'ENABLED': False,
+    'SAMPLE_PATH': os.path.join(os.path.dirname(BASE_DIR), 'Analitics', 'udemy_courses_cleaned.csv'),
+    'SAMPLE_SIZE': 1000,
+    'RTOL': 1e-3,
+    'ATOL': 1e-2,
+    'DROP_UNUSED': True,
+    'FLOAT32': True,
+    'MODELS': {},
+}
+
+# validation and profiling of new model files (smoke prediction of SAMPLE_SIZE rows),
+# BACKGROUND runs it in a thread after the upload is committed, validations pending
+# longer than STALE_TIMEOUT seconds are restarted at warm-up (manage.py validate_models)
+ML_MODEL_VALIDATION = {
+    'BACKGROUND': True,
+    'SAMPLE_SIZE': 100,
+    'STALE_TIMEOUT': 600,
+}
+
+# stage-level timing of single predictions (aggregated per model, SERVER_TIMING adds
+# Server-Timing header to the create request response)
+ML_STAGE_TIMING = {
+    'ENABLED': True,
+    'SERVER_TIMING': False,
+}
+
+# mapping mode of arrays in memory-mapped (joblib_mmap) model files
+ML_MODEL_STORAGE = {
+    'MMAP_MODE': 'c',
+}
+
+# DB-backed queue of asynchronous prediction requests (manage.py run_prediction_workers)
+ML_PREDICTION_JOBS = {
+    'POLL_INTERVAL': 1,
+    'STALE_TIMEOUT': 300,
+    'MAX_ATTEMPTS': 3,
+}
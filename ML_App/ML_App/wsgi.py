@@ -13,4 +13,15 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ML_App.settings')
 
-application = get_wsgi_application()
+django_application = get_wsgi_application()
+
+# warm-up queries the database, it starts in server processes (also runserver)
+# and not in every manage.py command
+from MlModels.warmup import ensure_warmup, start_warmup
+start_warmup()
+
+
+def application(environ, start_response):
+    # workers forked after the import (gunicorn --preload) warm up with their first request
+    ensure_warmup()
+    return django_application(environ, start_response)
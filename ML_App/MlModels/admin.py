@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import MlModel
+from .models import MlModel, ModelBenchmark, ModelCompaction
 
 # Register your models here.
-admin.site.register(MlModel)
\ No newline at end of file
+admin.site.register(MlModel)
+admin.site.register(ModelBenchmark)
+admin.site.register(ModelCompaction)
\ No newline at end of file
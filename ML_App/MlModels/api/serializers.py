@@ -1,10 +1,16 @@
 from rest_framework.serializers import (
 	ModelSerializer,
+	Serializer,
 	SerializerMethodField,
+	ListField,
+	IntegerField,
+	NullBooleanField,
+	PrimaryKeyRelatedField,
 )
 from rest_framework import status
 from MlModels import helpers
-from MlModels.models import MlModel
+from MlModels.models import MlModel, ModelBenchmark, ModelCompaction, UploadSession
+from MlModels.benchmark import DEFAULT_BATCH_SIZES, DEFAULT_REPEAT, API_MAX_BATCH_SIZE, API_MAX_REPEAT
 
 class MlModelSerializer(ModelSerializer):
 	'''
@@ -16,11 +22,19 @@ class MlModelSerializer(ModelSerializer):
 		version: The version of the model similar to software versioning.
 		created_at: The date when algorithm was added.
 		file: The reference to the physical algorithm file.
+		file_format: Storage format of the file (pickle or memory-mapped joblib).
 		endpoint: Represents algorithm endpoint.
 		owner_name: The owner name.
+		status: Validation state (pending, validating, ready or failed).
+		validation_error: Reason of the failed validation.
+		load_time: Time of loading the model file in seconds.
+		row_latency: Mean prediction time of one row in seconds.
+		memory_size: Approximate size of the loaded model in bytes.
+		compact: Compact the file at registration (settings.ML_MODEL_COMPACTION when empty).
 	'''
 	owner_name = SerializerMethodField('get_owner_name')
 	created_at = SerializerMethodField('get_date')
+	compact = NullBooleanField(write_only=True, required=False)
 
 	class Meta:
 		model = MlModel
@@ -31,12 +45,21 @@ class MlModelSerializer(ModelSerializer):
 			'description',
 			'created_at',
 			'file',
+			'file_format',
 			'endpoint',
 			'owner_name',
+			'status',
+			'validation_error',
+			'load_time',
+			'row_latency',
+			'memory_size',
+			'compact',
 		)
+		read_only_fields = ('status', 'validation_error', 'load_time', 'row_latency', 'memory_size')
 		extra_kwargs = {
 			'endpoint' : {'read_only':True},
 			'file': {'write_only':True},
+			'file_format': {'write_only':True},
 		}
 
 	def get_owner_name(self, model):
@@ -57,6 +80,10 @@ class MlModelListSerializer(ModelSerializer):
 		version: The version of the model similar to software versioning.
 		endpoint: Represents algorithm endpoint.
 		owner_name: The owner name.
+		status: Validation state (pending, validating, ready or failed).
+		load_time: Time of loading the model file in seconds.
+		row_latency: Mean prediction time of one row in seconds.
+		memory_size: Approximate size of the loaded model in bytes.
 		url: Hyperlink to algorithm.
 	'''
 	owner_name = SerializerMethodField('get_owner_name')
@@ -68,6 +95,10 @@ class MlModelListSerializer(ModelSerializer):
 			'version',
 			'endpoint',
 			'owner_name',
+			'status',
+			'load_time',
+			'row_latency',
+			'memory_size',
 			'url'
 		)
 		extra_kwargs = {
@@ -77,4 +108,125 @@ class MlModelListSerializer(ModelSerializer):
 
 	def get_owner_name(self, model):
 		owner_name = model.owner.username
-		return owner_name
\ No newline at end of file
+		return owner_name
+
+
+class ModelBenchmarkSerializer(ModelSerializer):
+	'''
+	ModelBenchmark serializer
+
+	Fields:
+		algorithm: Benchmarked algorithm endpoint.
+		file_hash: Content hash of the algorithm file.
+		batch_size: Number of rows scored with one model call.
+		repeat: Number of measured calls.
+		cold_load_time: Time of loading the model file in seconds.
+		p50, p95, p99: Percentiles of one call latency in seconds.
+		rows_per_second: Throughput of the model.
+		peak_rss: Peak resident memory in bytes of a fresh process which loaded only this model
+			and scored batches up to this one.
+		created_at: Date of the benchmark.
+	'''
+	algorithm = SerializerMethodField('get_algorithm')
+
+	class Meta:
+		model = ModelBenchmark
+		fields = (
+			'algorithm',
+			'file_hash',
+			'batch_size',
+			'repeat',
+			'cold_load_time',
+			'p50',
+			'p95',
+			'p99',
+			'rows_per_second',
+			'peak_rss',
+			'created_at',
+		)
+
+	def get_algorithm(self, model):
+		algorithm = model.algorithm.endpoint
+		return algorithm
+
+
+class ModelCompactionSerializer(ModelSerializer):
+	'''
+	ModelCompaction serializer
+
+	Fields:
+		file_hash: Content hash of the compacted file (empty when it was rejected).
+		sample_size: Number of reference rows used to compare predictions.
+		original_size, compacted_size: Size of the file in bytes.
+		original_memory_size, compacted_memory_size: Approximate size of the loaded model in bytes.
+		original_row_latency, compacted_row_latency: Mean prediction time of one row in seconds.
+		max_error: The largest absolute difference of reference predictions.
+		accepted: Compacted file replaced the original one.
+		error: Reason of the rejected or failed compaction.
+	'''
+
+	class Meta:
+		model = ModelCompaction
+		fields = (
+			'file_hash',
+			'sample_size',
+			'original_size',
+			'compacted_size',
+			'original_memory_size',
+			'compacted_memory_size',
+			'original_row_latency',
+			'compacted_row_latency',
+			'max_error',
+			'accepted',
+			'error',
+		)
+
+
+class RunBenchmarkSerializer(Serializer):
+	'''
+	Benchmark run parameters
+
+	Fields:
+		algorithms: Benchmarked ready algorithms (all ready algorithms when empty).
+		batch_sizes: Numbers of rows scored with one model call.
+		repeat: Number of measured calls per batch size.
+		Limits are low because the API runs benchmark in the request, see manage.py benchmark_models.
+	'''
+	algorithms = PrimaryKeyRelatedField(many=True, required=False, queryset=MlModel.objects.filter(status=MlModel.READY))
+	batch_sizes = ListField(child=IntegerField(min_value=1, max_value=API_MAX_BATCH_SIZE),
+							min_length=1, max_length=len(DEFAULT_BATCH_SIZES), default=list(DEFAULT_BATCH_SIZES))
+	repeat = IntegerField(min_value=1, max_value=API_MAX_REPEAT, default=DEFAULT_REPEAT)
+
+
+class UploadSessionSerializer(ModelSerializer):
+	'''
+	UploadSession serializer
+
+	Fields:
+		id: Upload identifier used in chunk and commit urls.
+		name: The name of the model.
+		version: The version of the model similar to software versioning.
+		description: The short description of the model.
+		file_format: Storage format of the file (pickle or memory-mapped joblib).
+		size: Size of the whole file in bytes.
+		checksum: Expected sha256 of the file (optional).
+		received: Number of already received bytes (upload offset).
+	'''
+
+	class Meta:
+		model = UploadSession
+		fields = (
+			'id',
+			'name',
+			'version',
+			'description',
+			'file_format',
+			'size',
+			'checksum',
+			'received',
+		)
+		extra_kwargs = {
+			'id': {'read_only': True},
+			'received': {'read_only': True},
+			'size': {'min_value': 1},
+		}
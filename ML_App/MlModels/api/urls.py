@@ -2,7 +2,13 @@ from django.urls import path, include
 from .views import (
 	MlModelCreateApiView,
 	MlModelDetailApiView,
-	MlModelListApiView
+	MlModelListApiView,
+	MlModelReadinessApiView,
+	MlModelBenchmarkApiView,
+	MlModelTimingsApiView,
+	MlModelUploadApiView,
+	MlModelUploadDetailApiView,
+	MlModelUploadCommitApiView,
 )
 from ML_App.routers import DefaultRouterWithSimpleViews
 
@@ -10,8 +16,14 @@ from ML_App.routers import DefaultRouterWithSimpleViews
 router = DefaultRouterWithSimpleViews()
 router.register(r'create', MlModelCreateApiView, 'create')
 router.register(r'list', MlModelListApiView, 'list')
+router.register(r'readiness', MlModelReadinessApiView, 'readiness')
+router.register(r'benchmark', MlModelBenchmarkApiView, 'benchmark')
+router.register(r'timings', MlModelTimingsApiView, 'timings')
+router.register(r'uploads', MlModelUploadApiView, 'uploads')
 
 urlpatterns = [
     path('', include(router.urls) ),
+    path('uploads/<uuid:pk>/', MlModelUploadDetailApiView.as_view(), name='upload'),
+    path('uploads/<uuid:pk>/commit/', MlModelUploadCommitApiView.as_view(), name='upload-commit'),
     path('<str:endpoint>/', MlModelDetailApiView.as_view(), name='detail'),  
 ]
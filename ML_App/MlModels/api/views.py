@@ -2,12 +2,27 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.shortcuts import get_object_or_404
-from MlModels.models import MlModel
-from .serializers import MlModelSerializer, MlModelListSerializer
+from MlModels.models import MlModel, ModelBenchmark, UploadSession
+from MlModels.uploads import create_session, write_chunk, commit_session, abort_session, UploadError, UploadConflict
+from MlModels.benchmark import benchmark_models
+from MlModels.storage import store_file, convert_upload
+from MlModels.validation import start_validation
+from MlModels.compaction import is_enabled, compact_model
+from Prediction_Pipeline.instrumentation import stage_stats
+from MlModels.warmup import warmup_state
+from Prediction_Pipeline.prediction_pipeline import model_registry, ModelFileError, PICKLE_FORMAT
+from .serializers import (
+	MlModelSerializer,
+	MlModelListSerializer,
+	ModelBenchmarkSerializer,
+	ModelCompactionSerializer,
+	RunBenchmarkSerializer,
+	UploadSessionSerializer,
+)
 from ML_App.permissions import IsAdminOrReadOnly
 
 
@@ -19,13 +34,17 @@ class MlModelCreateApiView(APIView):
 	 	- name: The name of the model
         - description: The short description of the model
         - version: The version of the model similar to software versioning
-        - file: Upload model file
+        - file: Upload model file (pickle)
+        - file_format: Storage format, joblib_mmap converts the pickle to memory-mapped joblib file
+        - compact: Store float32 arrays and drop unused fitted attributes when predictions
+          on the reference sample stay within tolerance (default settings.ML_MODEL_COMPACTION)
 
 	Requirements:
 		- SuperUserAccount
 	
 	Available Actions:
-		- Post: Register new model
+		- Post: Register new model, it can be used for predictions when validation
+		  (smoke prediction and profiling) sets its status to ready
 	'''
 	permission_classes = (IsAdminUser,)
 	authentication_classes = (SessionAuthentication, TokenAuthentication,)
@@ -36,9 +55,24 @@ class MlModelCreateApiView(APIView):
 		serializer = self.serializer_class(model, data=request.data)
 		context = {}
 		if serializer.is_valid():
-			serializer.save()
+			compact = serializer.validated_data.pop('compact', None)
+			try:
+				# broken uploads are rejected before the model or its file is stored
+				serializer.validated_data['file'] = convert_upload(
+					serializer.validated_data['file'], PICKLE_FORMAT, serializer.validated_data.get('file_format', PICKLE_FORMAT)
+				)
+			except ModelFileError as exc:
+				context['response'] = 'Error'
+				context['error_message'] = {'file': [str(exc)]}
+				return Response(context, status=status.HTTP_400_BAD_REQUEST)
+			model = serializer.save()
+			store_file(model)
+			compaction = compact_model(model) if is_enabled(model, compact) else None
+			start_validation(model)
 			context['response'] = 'Successfully registered new model'
 			context['data'] = serializer.data
+			if compaction is not None:
+				context['compaction'] = ModelCompactionSerializer(compaction).data
 			response_status = status.HTTP_201_CREATED
 		else:
 			context['response'] = 'Error'
@@ -47,6 +81,134 @@ class MlModelCreateApiView(APIView):
 		return Response(context, status=response_status)
 
 
+class MlModelUploadApiView(APIView):
+	'''
+	Rest Api View for Starting Chunked, Resumable Model Upload
+	
+	Fields:
+	 	- name: The name of the model
+        - description: The short description of the model
+        - version: The version of the model similar to software versioning
+        - file_format: Storage format, joblib_mmap converts the pickle to memory-mapped joblib file
+        - size: Size of the pickle file in bytes
+        - checksum: Expected sha256 of the file (optional)
+
+	Requirements:
+		- SuperUserAccount
+	
+	Available Actions:
+		- Post: Start new upload, chunks are sent to /api/models/uploads/<id>/
+	'''
+	permission_classes = (IsAdminUser,)
+	authentication_classes = (SessionAuthentication, TokenAuthentication,)
+	serializer_class = UploadSessionSerializer
+
+	def post(self, request):
+		serializer = self.serializer_class(data=request.data)
+		context = {}
+		if serializer.is_valid():
+			try:
+				session = create_session(request.user, **serializer.validated_data)
+			except UploadError as exc:
+				context['response'] = 'Error'
+				context['error_message'] = str(exc)
+				return Response(context, status=status.HTTP_400_BAD_REQUEST)
+			context['response'] = 'Successfully started upload'
+			context['data'] = self.serializer_class(session).data
+			response_status = status.HTTP_201_CREATED
+		else:
+			context['response'] = 'Error'
+			context['error_message'] = serializer.errors
+			response_status = status.HTTP_400_BAD_REQUEST
+		return Response(context, status=response_status)
+
+
+class MlModelUploadDetailApiView(APIView):
+	'''
+	Rest Api View for Chunks of Resumable Model Upload
+	
+	Requirements:
+		- SuperUserAccount who started the upload
+	
+	Available Actions:
+		- Get: Return upload state (received - offset of the next chunk)
+		- Put: Write raw request body at the offset given by
+		  "Content-Range: bytes <start>-<end>/<size>" header (409 when start is not the upload offset)
+		- Delete: Abort upload (409 while a chunk is being written)
+	'''
+	permission_classes = (IsAdminUser,)
+	authentication_classes = (SessionAuthentication, TokenAuthentication,)
+	serializer_class = UploadSessionSerializer
+
+	def get(self, request, pk):
+		session = get_object_or_404(UploadSession, pk=pk, owner=request.user)
+		return Response(self.serializer_class(session).data)
+
+	def put(self, request, pk):
+		session = get_object_or_404(UploadSession, pk=pk, owner=request.user)
+		context = {}
+		try:
+			# body is read from the stream in blocks, it is never buffered whole
+			write_chunk(session, request.META.get('HTTP_CONTENT_RANGE'), request.stream)
+		except UploadConflict as exc:
+			context['response'] = 'Error'
+			context['error_message'] = str(exc)
+			response_status = status.HTTP_409_CONFLICT
+		except UploadError as exc:
+			context['response'] = 'Error'
+			context['error_message'] = str(exc)
+			response_status = status.HTTP_400_BAD_REQUEST
+		else:
+			context['response'] = 'Successfully received chunk'
+			response_status = status.HTTP_200_OK
+		context['received'] = session.received
+		return Response(context, status=response_status)
+
+	def delete(self, request, pk):
+		session = get_object_or_404(UploadSession, pk=pk, owner=request.user)
+		try:
+			abort_session(session)
+		except UploadConflict as exc:
+			return Response({'response': 'Error', 'error_message': str(exc)}, status=status.HTTP_409_CONFLICT)
+		return Response({'response': 'Successfully aborted upload'}, status=status.HTTP_204_NO_CONTENT)
+
+
+class MlModelUploadCommitApiView(APIView):
+	'''
+	Rest Api View for Finishing Resumable Model Upload
+	
+	Requirements:
+		- SuperUserAccount who started the upload
+		- All bytes of the file were received
+	
+	Available Actions:
+		- Post: Verify checksum and register new model
+	'''
+	permission_classes = (IsAdminUser,)
+	authentication_classes = (SessionAuthentication, TokenAuthentication,)
+
+	def post(self, request, pk):
+		session = get_object_or_404(UploadSession, pk=pk, owner=request.user)
+		context = {}
+		try:
+			model = commit_session(session)
+		except UploadConflict as exc:
+			context['response'] = 'Error'
+			context['error_message'] = str(exc)
+			return Response(context, status=status.HTTP_409_CONFLICT)
+		except UploadError as exc:
+			context['response'] = 'Error'
+			context['error_message'] = str(exc)
+			return Response(context, status=status.HTTP_400_BAD_REQUEST)
+		compaction = compact_model(model) if is_enabled(model) else None
+		start_validation(model)
+		context['response'] = 'Successfully registered new model'
+		context['data'] = MlModelSerializer(model).data
+		if compaction is not None:
+			context['compaction'] = ModelCompactionSerializer(compaction).data
+		return Response(context, status=status.HTTP_201_CREATED)
+
+
 class MlModelDetailApiView(APIView):
 	'''
 	Rest Api View for Algorithm Details
@@ -59,6 +221,8 @@ class MlModelDetailApiView(APIView):
 		- file: The reference to the physical algorithm file
 		- endpoint: <course_title>_<algorithm.id>_<days>_<creation_date>
 		- owner_name: The owner name
+		- status: pending, validating, ready or failed (validation_error contains the reason)
+		- load_time, row_latency, memory_size: Profile measured during validation
 
 	Requirements:
 		- Get: Session or Token Autentication
@@ -82,11 +246,27 @@ class MlModelDetailApiView(APIView):
 		model = get_object_or_404(MlModel, endpoint=endpoint)
 		context = {}
 		data = request.data.dict()
+		# uploaded files are pickles, kept file is in the current format
+		source_format = PICKLE_FORMAT
 		if not data['file']:
 			data['file'] = model.file.file
+			source_format = model.file_format
+		old_hash = model.file_hash
 		serializer = self.serializer_class(model, data=data, partial=True)
 		if serializer.is_valid():
-			serializer.save()
+			try:
+				serializer.validated_data['file'] = convert_upload(
+					serializer.validated_data['file'], source_format, serializer.validated_data.get('file_format', model.file_format)
+				)
+			except ModelFileError as exc:
+				context['response'] = 'Error'
+				context['error_message'] = {'file': [str(exc)]}
+				return Response(context, status=status.HTTP_400_BAD_REQUEST)
+			model = serializer.save()
+			store_file(model)
+			# new artifact is not used for predictions until it passes validation
+			if model.file_hash != old_hash:
+				start_validation(model)
 			context['response'] = 'Successfully update'
 			context['data'] = serializer.data
 			response_status = status.HTTP_200_OK
@@ -113,6 +293,8 @@ class MlModelListApiView(ListAPIView):
 		- version: The version of the model similar to software versioning
 		- endpoint: <algorithm_name>_<version>_<addition_date>
 		- owner_name: The owner name
+		- status: pending, validating, ready or failed
+		- load_time, row_latency, memory_size: Profile measured during validation
 		- url: Hyperlink to algorithm
 	
 	Requirements:
@@ -123,4 +305,116 @@ class MlModelListApiView(ListAPIView):
 	queryset = MlModel.objects.all().order_by('-created_at')
 	serializer_class = MlModelListSerializer
 	filter_backends = (SearchFilter,OrderingFilter)
-	search_fields = ('name', 'owner__username', 'version')
\ No newline at end of file
+	search_fields = ('name', 'owner__username', 'version')
+
+
+class MlModelReadinessApiView(APIView):
+	'''
+	Rest Api View for Models Readiness (warm-up status)
+	
+	Fields:
+		- response: disabled, warming_up or ready
+		- warmup_time: Duration of the whole warm-up in seconds
+		- models: Warm-up result of every model (warm, load_time, warmup_time, memory in bytes)
+		- loaded_models: Models currently held in the model registry
+
+	Available Actions:
+		- Get: Return 200 when models are warm, 503 during warm-up
+	'''
+	permission_classes = (AllowAny,)
+
+	def get(self, request):
+		with warmup_state.lock:
+			models = [dict(result, endpoint=endpoint) for endpoint, result in warmup_state.models.items()]
+		registry_stats = model_registry.stats()
+
+		context = {}
+		context['response'] = warmup_state.status
+		context['warmup_time'] = warmup_state.warmup_time
+		context['models'] = models
+		context['loaded_models'] = [
+			{'endpoint': entry['endpoint'], 'load_time': entry['load_time'], 'memory': entry['size']}
+			for entry in registry_stats['models']
+		]
+		if warmup_state.status == 'warming_up':
+			response_status = status.HTTP_503_SERVICE_UNAVAILABLE
+		else:
+			response_status = status.HTTP_200_OK
+		return Response(context, status=response_status)
+
+
+class MlModelBenchmarkApiView(APIView):
+	'''
+	Rest Api View for Models Latency and Throughput Benchmark
+	
+	Fields:
+		- algorithms: Benchmarked ready algorithms ids (all ready algorithms when empty)
+		- batch_sizes: Numbers of rows scored with one model call (default 1, 10, 100, 1000, at most 1000)
+		- repeat: Number of measured calls per batch size (at most 100)
+		Benchmark runs in the request, longer runs use manage.py benchmark_models.
+
+	Requirements:
+		- SuperUserAccount
+	
+	Available Actions:
+		- Get: Return stored benchmark results, the newest first
+		- Post: Run benchmark and store results
+	'''
+	permission_classes = (IsAdminUser,)
+	authentication_classes = (SessionAuthentication, TokenAuthentication,)
+	serializer_class = RunBenchmarkSerializer
+
+	def get(self, request):
+		results = ModelBenchmark.objects.select_related('algorithm').order_by('-created_at', 'algorithm', 'batch_size')
+		context = {}
+		context['results'] = ModelBenchmarkSerializer(results, many=True).data
+		return Response(context, status=status.HTTP_200_OK)
+
+	def post(self, request):
+		serializer = self.serializer_class(data=request.data)
+		context = {}
+		if serializer.is_valid():
+			results = benchmark_models(
+				serializer.validated_data.get('algorithms') or None,
+				serializer.validated_data['batch_sizes'],
+				serializer.validated_data['repeat'],
+			)
+			context['response'] = 'Successfully benchmarked models'
+			context['results'] = ModelBenchmarkSerializer(results, many=True).data
+			response_status = status.HTTP_201_CREATED
+		else:
+			context['response'] = 'Error'
+			context['error_message'] = serializer.errors
+			response_status = status.HTTP_400_BAD_REQUEST
+		return Response(context, status=response_status)
+
+
+class MlModelTimingsApiView(APIView):
+	'''
+	Rest Api View for Prediction Stage Timings aggregated per Model
+	
+	Fields:
+		- models: For every model endpoint number of predictions and per stage
+		  (load, open, unpickle, frame, preprocessing, title_analyzer, estimator, cache, ...)
+		  count, total, mean and max duration in seconds
+
+	Requirements:
+		- SuperUserAccount
+	
+	Available Actions:
+		- Get: Return aggregated stage timings
+		- Delete: Reset aggregated stage timings
+	'''
+	permission_classes = (IsAdminUser,)
+	authentication_classes = (SessionAuthentication, TokenAuthentication,)
+
+	def get(self, request):
+		context = {}
+		context['models'] = stage_stats.stats()
+		return Response(context, status=status.HTTP_200_OK)
+
+	def delete(self, request):
+		stage_stats.reset()
+		context = {}
+		context['response'] = 'Successfully reset stage timings'
+		return Response(context, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,96 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import numpy as np
+from Prediction_Pipeline.prediction_pipeline import model_registry, run_batch_prediction
+from Prediction_Pipeline.workers import measure_peak_rss, to_rows
+from .models import MlModel, ModelBenchmark
+from .warmup import WARMUP_SAMPLE
+
+
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1000)
+DEFAULT_REPEAT = 20
+
+# limits of benchmarks started from the API (run in the request thread),
+# longer runs use manage.py benchmark_models
+API_MAX_BATCH_SIZE = 1000
+API_MAX_REPEAT = 100
+
+LEVELS = ('All Levels', 'Beginner Level', 'Intermediate Level', 'Expert Level')
+
+
+def get_sample_rows(size):
+	'''
+	Function returns synthetic courses with varying numeric inputs and levels
+	'''
+	return [
+		SimpleNamespace(
+			course_title=WARMUP_SAMPLE.course_title,
+			price=20 + i % 181,
+			content_duration=1 + i % 50,
+			num_lectures=1 + i % 200,
+			days=1 + i % 730,
+			level=LEVELS[i % len(LEVELS)],
+		)
+		for i in range(size)
+	]
+
+
+def measure_memory(algorithm, rows, batch_sizes):
+	'''
+	Function returns peak RSS after every batch size measured in a fresh process
+	which loads only this model (other models and the server process do not count)
+	'''
+	context = multiprocessing.get_context('spawn')
+	with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+		return executor.submit(
+			measure_peak_rss, algorithm.file.path, algorithm.file_format, to_rows(rows), tuple(batch_sizes)
+		).result()
+
+
+def benchmark_model(algorithm, batch_sizes=DEFAULT_BATCH_SIZES, repeat=DEFAULT_REPEAT):
+	'''
+	Function measures cold load and latency of the MlModel for every batch size,
+	results are stored as ModelBenchmark objects
+	'''
+	model_registry.invalidate(algorithm.endpoint)
+	entry = model_registry.get_entry(algorithm)
+	rows = get_sample_rows(max(batch_sizes))
+	peaks = measure_memory(algorithm, rows, batch_sizes)
+
+	results = []
+	for batch_size, peak_rss in zip(batch_sizes, peaks):
+		batch = rows[:batch_size]
+		run_batch_prediction(algorithm, batch)
+		latencies = []
+		for _ in range(repeat):
+			start = time.perf_counter()
+			run_batch_prediction(algorithm, batch)
+			latencies.append(time.perf_counter() - start)
+		p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+		results.append(ModelBenchmark(
+			algorithm=algorithm,
+			file_hash=entry.file_hash,
+			batch_size=batch_size,
+			repeat=repeat,
+			cold_load_time=entry.load_time,
+			p50=p50,
+			p95=p95,
+			p99=p99,
+			rows_per_second=batch_size * repeat / sum(latencies),
+			peak_rss=peak_rss,
+		))
+	return ModelBenchmark.objects.bulk_create(results)
+
+
+def benchmark_models(algorithms=None, batch_sizes=DEFAULT_BATCH_SIZES, repeat=DEFAULT_REPEAT):
+	'''
+	Function benchmarks all ready (or given) MlModels
+	'''
+	if algorithms is None:
+		algorithms = MlModel.objects.filter(status=MlModel.READY).order_by('pk')
+	results = []
+	for algorithm in algorithms:
+		results.extend(benchmark_model(algorithm, batch_sizes, repeat))
+	return results
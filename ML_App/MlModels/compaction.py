@@ -0,0 +1,125 @@
+import json
+import os
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from Prediction_Pipeline.compaction import DEFAULT_OPTIONS, compact_pipeline, max_error
+from Prediction_Pipeline.model_registry import estimate_size
+from Prediction_Pipeline.prediction_pipeline import model_registry, load_model, save_model, build_input
+from Prediction_Pipeline.workers import COLUMNS
+from .models import ModelCompaction
+from .storage import replace_file
+
+
+DEFAULT_SAMPLE_SIZE = 1000
+DEFAULT_RTOL = 1e-3
+DEFAULT_ATOL = 1e-2
+
+
+def get_config(model=None):
+	'''
+	Function returns settings.ML_MODEL_COMPACTION with overrides of the MlModel
+	'''
+	config = dict(getattr(settings, 'ML_MODEL_COMPACTION', {}))
+	overrides = config.pop('MODELS', {})
+	if model is not None:
+		config.update(overrides.get(model.name, {}))
+	return config
+
+
+def is_enabled(model, compact=None):
+	'''
+	Function checks if the MlModel should be compacted (compact overrides settings)
+	'''
+	if compact is not None:
+		return compact
+	return get_config(model).get('ENABLED', False)
+
+
+@lru_cache(maxsize=4)
+def get_reference_sample(path, size):
+	'''
+	Function returns reference courses sampled from the CSV file (same rows on every call)
+	'''
+	df = pd.read_csv(path, usecols=COLUMNS)
+	df = df.sample(min(size, len(df)), random_state=0)
+	df['course_title'] = df['course_title'].fillna('').astype(str)
+	return [SimpleNamespace(**row) for row in df.to_dict('records')]
+
+
+def _predict(model, rows):
+	start = time.perf_counter()
+	predictions = model.predict(build_input(model, rows))
+	return predictions, (time.perf_counter() - start) / len(rows)
+
+
+def _compact(model, compaction, config, options, rtol, atol):
+	rows = get_reference_sample(config['SAMPLE_PATH'], config.get('SAMPLE_SIZE', DEFAULT_SAMPLE_SIZE))
+
+	path = model.file.path
+	original = load_model(path, model.file_format)
+	compacted = compact_pipeline(original, **options)
+
+	# first calls pay one-off costs (lazy imports, memory-mapped pages)
+	_predict(original, rows[:1])
+	_predict(compacted, rows[:1])
+	expected, compaction.original_row_latency = _predict(original, rows)
+	predictions, compaction.compacted_row_latency = _predict(compacted, rows)
+
+	tmp_path = f'{path}.compacting'
+	try:
+		save_model(compacted, tmp_path, model.file_format)
+		compaction.sample_size = len(rows)
+		compaction.compacted_size = os.path.getsize(tmp_path)
+		compaction.original_memory_size = estimate_size(original)
+		compaction.compacted_memory_size = estimate_size(compacted)
+		compaction.max_error = max_error(expected, predictions)
+		compaction.accepted = False
+		if not np.allclose(predictions, expected, rtol=rtol, atol=atol):
+			compaction.error = f'predictions differ more than RTOL={rtol}, ATOL={atol}'
+		elif compaction.compacted_size >= compaction.original_size:
+			compaction.error = 'compacted file is not smaller than the original'
+		else:
+			replace_file(model, tmp_path)
+			model_registry.invalidate(model.endpoint)
+			compaction.file_hash = model.file_hash
+			compaction.accepted = True
+	finally:
+		if os.path.exists(tmp_path):
+			os.remove(tmp_path)
+
+
+def compact_model(model):
+	'''
+	Function replaces the MlModel file with compacted one when its predictions
+	on the reference sample stay within tolerance, the result is stored as ModelCompaction
+
+	Compaction never fails the registration, errors are recorded as rejected
+	ModelCompaction and the original file is kept.
+	'''
+	config = get_config(model)
+	options = {name: config.get(name, default) for name, default in DEFAULT_OPTIONS.items()}
+	rtol, atol = config.get('RTOL', DEFAULT_RTOL), config.get('ATOL', DEFAULT_ATOL)
+	compaction = ModelCompaction(
+		algorithm=model,
+		source_hash=model.file_hash,
+		options=json.dumps(dict(options, RTOL=rtol, ATOL=atol)),
+		original_size=os.path.getsize(model.file.path),
+		accepted=False,
+	)
+	try:
+		_compact(model, compaction, config, options, rtol, atol)
+	except Exception as exc:
+		compaction = ModelCompaction(
+			algorithm=model,
+			source_hash=compaction.source_hash,
+			options=compaction.options,
+			original_size=compaction.original_size,
+			accepted=False,
+			error=f'{exc.__class__.__name__}: {exc}',
+		)
+	compaction.save()
+	return compaction
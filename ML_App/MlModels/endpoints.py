@@ -0,0 +1,136 @@
+'''
+Allocation of unique endpoints (<base>, <base>_1, <base>_2, ...) with per-base counters.
+
+Allocation costs the same number of queries however many endpoints share the
+base: counters of all requested bases are incremented with one UPDATE and read
+back in the same transaction, the stored endpoints are scanned only when a
+counter is created. The UPDATE locks counter rows, so concurrent allocations
+of one base never get the same number.
+'''
+import re
+from functools import reduce
+from operator import or_
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Q, When
+from . import models
+
+
+MAX_ATTEMPTS = 5
+
+_suffix_pattern = re.compile(r'[0-9]+')
+
+
+def get_scope(model_class):
+	return model_class._meta.label
+
+
+def format_endpoint(base, number):
+	'''
+	Function returns endpoint allocated for the base as number-th one (counted from 0)
+	'''
+	return base if number == 0 else f'{base}_{number}'
+
+
+def parse_endpoint(endpoint, bases):
+	'''
+	Function returns (base, number) of the endpoint allocated for one of the bases or None
+	'''
+	if endpoint in bases:
+		return endpoint, 0
+	base, _, suffix = endpoint.rpartition('_')
+	if base in bases and _suffix_pattern.fullmatch(suffix):
+		return base, int(suffix)
+	return None
+
+
+def count_taken(model_class, bases):
+	'''
+	Function returns for every base number of endpoints implied by stored objects (the highest number + 1)
+	'''
+	bases = set(bases)
+	condition = reduce(or_, (Q(endpoint__startswith=base) for base in bases))
+	taken = {}
+	for endpoint in model_class.objects.filter(condition).values_list('endpoint', flat=True):
+		parsed = parse_endpoint(endpoint, bases)
+		if parsed is not None:
+			base, number = parsed
+			taken[base] = max(taken.get(base, 0), number + 1)
+	return taken
+
+
+def _increment(scope, counts):
+	# one UPDATE for all bases, returns new values of existing counters
+	queryset = models.EndpointCounter.objects.filter(scope=scope, base__in=list(counts))
+	queryset.update(last=Case(
+		*(When(base=base, then=F('last') + count) for base, count in counts.items()),
+		output_field=IntegerField()
+	))
+	return dict(queryset.values_list('base', 'last'))
+
+
+def allocate_endpoints(model_class, counts, chunk_size=100):
+	'''
+	Function reserves endpoints, counts maps base endpoint to number of required endpoints
+
+	Returns dict base -> list of reserved endpoints.
+	'''
+	scope = get_scope(model_class)
+	bases = list(counts)
+	endpoints = {}
+	for i in range(0, len(bases), chunk_size):
+		chunk = {base: counts[base] for base in bases[i:i + chunk_size]}
+		with transaction.atomic():
+			last = _increment(scope, chunk)
+			missing = {base: count for base, count in chunk.items() if base not in last}
+			if missing:
+				taken = count_taken(model_class, missing)
+				# counters created concurrently are kept, they are incremented below
+				models.EndpointCounter.objects.bulk_create(
+					[models.EndpointCounter(scope=scope, base=base, last=taken.get(base, 0)) for base in missing],
+					ignore_conflicts=True
+				)
+				last.update(_increment(scope, missing))
+		for base, count in chunk.items():
+			endpoints[base] = [format_endpoint(base, number) for number in range(last[base] - count, last[base])]
+	return endpoints
+
+
+def sync_counter(model_class, base):
+	'''
+	Function moves the counter past endpoints stored without it (e.g. before counters existed)
+	'''
+	taken = count_taken(model_class, [base]).get(base, 0)
+	models.EndpointCounter.objects.filter(scope=get_scope(model_class), base=base, last__lt=taken).update(last=taken)
+
+
+def is_allocated_for(endpoint, base):
+	return bool(endpoint) and parse_endpoint(endpoint, {base}) is not None
+
+
+def assign_endpoint(instance, base):
+	'''
+	Function returns endpoint of the saved instance when it was allocated for the base,
+	otherwise reserves the next one
+	'''
+	if instance.pk and is_allocated_for(instance.endpoint, base):
+		return instance.endpoint
+	return allocate_endpoints(type(instance), {base: 1})[base][0]
+
+
+def save_with_endpoint(instance, base, save):
+	'''
+	Function assigns endpoint and saves the instance with save(),
+	allocation is retried when the endpoint was taken in the meantime
+	'''
+	model_class = type(instance)
+	for attempt in range(MAX_ATTEMPTS):
+		instance.endpoint = assign_endpoint(instance, base)
+		try:
+			with transaction.atomic():
+				return save()
+		except IntegrityError:
+			taken = model_class.objects.filter(endpoint=instance.endpoint).exclude(pk=instance.pk).exists()
+			if not taken or attempt == MAX_ATTEMPTS - 1:
+				raise
+			sync_counter(model_class, base)
+			instance.endpoint = ''
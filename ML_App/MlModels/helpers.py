@@ -1,5 +1,5 @@
 import os
-from . import models
+from . import endpoints
 
 def get_endpoint(instance):
 	''' 
@@ -8,24 +8,12 @@ def get_endpoint(instance):
 	return f'{instance.name}_{instance.version}_{instance.created_at.date()}'
 
 
-def create_endpoint(instance, new_endpoint=None, new_id=1):
+def create_endpoint(instance):
 	''' 
-	Function create unique endpoint for MlModel
+	Function returns unique endpoint for MlModel
+	(the current one is kept while the base endpoint does not change)
 	'''
-	if new_endpoint:
-		endpoint = new_endpoint
-	else:	
-		endpoint = get_endpoint(instance)
-	qs = models.MlModel.objects.filter(endpoint=endpoint).exclude(pk=instance.pk)
-	exists = qs.exists()
-	if exists:
-		if new_endpoint:
-			endpoint = f'{endpoint.rsplit("_", maxsplit=1)[0]}_{new_id}'
-		else:
-			endpoint = f'{endpoint}_{new_id}'
-		new_id += 1
-		return create_endpoint(instance, endpoint, new_id)
-	return endpoint
+	return endpoints.assign_endpoint(instance, get_endpoint(instance))
 
 
 def get_filepath(instance, *args):
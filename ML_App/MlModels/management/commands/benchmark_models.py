@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from MlModels.benchmark import benchmark_models, DEFAULT_BATCH_SIZES, DEFAULT_REPEAT
+from MlModels.models import MlModel
+
+
+class Command(BaseCommand):
+	help = 'Measure cold load, latency percentiles, throughput and peak RSS (fresh process per model) of MlModels'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--models', nargs='+', metavar='ENDPOINT', help='MlModel endpoints (default: all ready)')
+		parser.add_argument('--batch-sizes', nargs='+', type=int, default=list(DEFAULT_BATCH_SIZES))
+		parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+
+	def handle(self, *args, **options):
+		algorithms = MlModel.objects.filter(status=MlModel.READY).order_by('pk')
+		if options['models']:
+			algorithms = algorithms.filter(endpoint__in=options['models'])
+			if len(algorithms) != len(set(options['models'])):
+				raise CommandError('Unknown or not ready MlModel endpoint')
+
+		self.stdout.write(
+			f'{"model":<40} {"batch":>6} {"cold load":>10} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} '
+			f'{"rows/s":>10} {"peak RSS MB":>12}'
+		)
+		for result in benchmark_models(algorithms, options['batch_sizes'], options['repeat']):
+			self.stdout.write(
+				f'{result.algorithm.endpoint:<40} {result.batch_size:>6} {result.cold_load_time:>9.3f}s '
+				f'{result.p50 * 1000:>9.2f} {result.p95 * 1000:>9.2f} {result.p99 * 1000:>9.2f} '
+				f'{result.rows_per_second:>10.0f} {result.peak_rss / 2 ** 20:>12.1f}'
+			)
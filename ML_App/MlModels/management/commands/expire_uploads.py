@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from MlModels.uploads import expire_sessions
+
+
+class Command(BaseCommand):
+	help = 'Remove chunked uploads (and their partial files) which did not receive a chunk for a long time'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--expire-after', type=int, help='Seconds since the last chunk '
+															 '(default settings.ML_MODEL_UPLOADS["EXPIRE_AFTER"])')
+
+	def handle(self, *args, **options):
+		expired = expire_sessions(options['expire_after'])
+		self.stdout.write(self.style.SUCCESS(f'Removed {expired} expired uploads'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from MlModels.models import MlModel
+from MlModels.validation import requeue_stale_validations, start_validation
+
+
+class Command(BaseCommand):
+	help = 'Validate MlModels left pending or validating by stopped processes (or given MlModels)'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--models', nargs='+', metavar='ENDPOINT', help='MlModel endpoints (default: stale validations)')
+		parser.add_argument('--timeout', type=int, help='Seconds after which validation is stale '
+													   '(default settings.ML_MODEL_VALIDATION["STALE_TIMEOUT"])')
+
+	def handle(self, *args, **options):
+		if options['models']:
+			models = list(MlModel.objects.filter(endpoint__in=options['models']).order_by('pk'))
+			if len(models) != len(set(options['models'])):
+				raise CommandError('Unknown MlModel endpoint')
+			for model in models:
+				start_validation(model, background=False)
+		else:
+			models = requeue_stale_validations(options['timeout'], background=False)
+
+		for model in models:
+			self.stdout.write(f'{model.endpoint:<40} {model.status:<10} {model.validation_error}')
+		self.stdout.write(self.style.SUCCESS(f'Validated {len(models)} models'))
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.7 on 2026-10-18 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MlModels', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlmodel',
+            name='file_format',
+            field=models.CharField(choices=[('pickle', 'Pickle'), ('joblib_mmap', 'Joblib (memory-mapped)')], default='pickle', max_length=16),
+        ),
+    ]
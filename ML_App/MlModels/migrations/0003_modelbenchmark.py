@@ -0,0 +1,36 @@
+# Generated by Django 2.2.7 on 2026-10-18 04:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MlModels', '0002_mlmodel_file_format'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelBenchmark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64)),
+                ('batch_size', models.IntegerField()),
+                ('repeat', models.IntegerField()),
+                ('cold_load_time', models.FloatField()),
+                ('p50', models.FloatField()),
+                ('p95', models.FloatField()),
+                ('p99', models.FloatField()),
+                ('rows_per_second', models.FloatField()),
+                ('peak_rss', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('algorithm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='benchmarks', to='MlModels.MlModel')),
+            ],
+            options={
+                'verbose_name': 'Model Benchmark',
+                'verbose_name_plural': 'Model Benchmarks',
+            },
+        ),
+    ]
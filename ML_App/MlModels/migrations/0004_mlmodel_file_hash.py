@@ -0,0 +1,30 @@
+# Generated by Django 2.2.7 on 2026-10-18 04:24
+
+from django.db import migrations, models
+import os
+
+
+def compute_file_hashes(apps, schema_editor):
+    # existing files stay where they are, only their content hash is recorded
+    from Prediction_Pipeline.model_registry import file_hash
+
+    MlModel = apps.get_model('MlModels', 'MlModel')
+    for model in MlModel.objects.all():
+        if model.file and os.path.isfile(model.file.path):
+            MlModel.objects.filter(pk=model.pk).update(file_hash=file_hash(model.file.path))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MlModels', '0003_modelbenchmark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlmodel',
+            name='file_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.RunPython(compute_file_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.7 on 2026-10-18 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MlModels', '0005_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlmodel',
+            name='load_time',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='memory_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='row_latency',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        # models registered before validation already serve predictions
+        migrations.AddField(
+            model_name='mlmodel',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('validating', 'Validating'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='ready', max_length=16),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='mlmodel',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('validating', 'Validating'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='validated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='validation_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='mlmodel',
+            name='validation_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
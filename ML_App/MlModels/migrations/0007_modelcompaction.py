@@ -0,0 +1,40 @@
+# Generated by Django 2.2.7 on 2026-10-18 04:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MlModels', '0006_mlmodel_validation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelCompaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(max_length=64)),
+                ('file_hash', models.CharField(blank=True, max_length=64)),
+                ('options', models.TextField()),
+                ('sample_size', models.IntegerField(null=True)),
+                ('original_size', models.BigIntegerField()),
+                ('compacted_size', models.BigIntegerField(null=True)),
+                ('original_memory_size', models.BigIntegerField(null=True)),
+                ('compacted_memory_size', models.BigIntegerField(null=True)),
+                ('original_row_latency', models.FloatField(null=True)),
+                ('compacted_row_latency', models.FloatField(null=True)),
+                ('max_error', models.FloatField(null=True)),
+                ('accepted', models.BooleanField()),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('algorithm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compactions', to='MlModels.MlModel')),
+            ],
+            options={
+                'verbose_name': 'Model Compaction',
+                'verbose_name_plural': 'Model Compactions',
+            },
+        ),
+    ]
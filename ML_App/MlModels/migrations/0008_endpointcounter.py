@@ -0,0 +1,27 @@
+# Generated by Django 2.2.7 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MlModels', '0007_modelcompaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EndpointCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64)),
+                ('base', models.CharField(max_length=256)),
+                ('last', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Endpoint Counter',
+                'verbose_name_plural': 'Endpoint Counters',
+                'unique_together': {('scope', 'base')},
+            },
+        ),
+    ]
@@ -2,7 +2,15 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
 import os
-from .helpers import get_filepath, create_endpoint
+import uuid
+from .helpers import get_filepath, get_endpoint
+from .endpoints import save_with_endpoint
+from . import storage
+from Prediction_Pipeline.prediction_pipeline import FILE_FORMAT_CHOICES, PICKLE_FORMAT
+
+
+# partial files of chunked uploads
+UPLOAD_DIR = 'MlModels/algorithms/uploads'
 
 
 class MlModel(models.Model):
@@ -17,7 +25,28 @@ class MlModel(models.Model):
         owner: The reference to the owner (User model).
         file: The reference to the physical algorithm file.
         endpoint: Represents algorithm endpoint.
+        file_format: Format of the algorithm file (pickle or memory-mapped joblib).
+        file_hash: sha256 of the file content (name of the file in the content-addressed storage).
+        status: Validation state, only ready models can be used for predictions.
+        validation_error: Reason of the failed validation.
+        load_time: Time of loading the model file in seconds.
+        row_latency: Mean prediction time of one row in seconds.
+        memory_size: Approximate size of the loaded model in bytes.
+        validated_at: The date of the last validation.
+        validation_started_at: The date when the last validation was queued or started
+        (detects validations lost with their process).
 	'''
+	PENDING = 'pending'
+	VALIDATING = 'validating'
+	READY = 'ready'
+	FAILED = 'failed'
+	STATUS_CHOICES = (
+		(PENDING, 'Pending'),
+		(VALIDATING, 'Validating'),
+		(READY, 'Ready'),
+		(FAILED, 'Failed'),
+	)
+
 	owner = models.ForeignKey(User, on_delete=models.CASCADE)
 	name = models.CharField(max_length=128)
 	version = models.CharField(max_length=16)
@@ -25,14 +54,162 @@ class MlModel(models.Model):
 	description = models.TextField(max_length=1000, blank=True)
 	endpoint = models.SlugField(max_length=256, unique=True, blank=True)
 	file = models.FileField(upload_to=get_filepath, max_length=256)
+	file_format = models.CharField(max_length=16, choices=FILE_FORMAT_CHOICES, default=PICKLE_FORMAT)
+	file_hash = models.CharField(max_length=64, blank=True, db_index=True)
+	status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+	validation_error = models.TextField(blank=True)
+	load_time = models.FloatField(null=True, blank=True)
+	row_latency = models.FloatField(null=True, blank=True)
+	memory_size = models.BigIntegerField(null=True, blank=True)
+	validated_at = models.DateTimeField(null=True, blank=True)
+	validation_started_at = models.DateTimeField(null=True, blank=True)
 
 	class Meta():
 		verbose_name = "MlModel"
 		verbose_name_plural = "MlModels"
 
 	def __str__(self):
+		# content-addressed files are named by hash, endpoint is more readable
+		if storage.is_blob(self.file.name):
+			return f'{self.endpoint}'
 		return f'{os.path.basename(self.file.name)}'
 
 	def save(self, *args, **kwargs):
-		self.endpoint = create_endpoint(self)
-		super(MlModel, self).save(*args, **kwargs)
\ No newline at end of file
+		save_with_endpoint(self, get_endpoint(self), lambda: super(MlModel, self).save(*args, **kwargs))
+
+
+class EndpointCounter(models.Model):
+	''' 
+	Object represent number of endpoints allocated for one base endpoint
+
+	Atributes:
+		scope: Label of the model which owns endpoints (e.g. Requests.Request).
+		base: Base endpoint, allocated endpoints are <base>, <base>_1, <base>_2, ...
+		last: Number of already allocated endpoints.
+	'''
+	scope = models.CharField(max_length=64)
+	base = models.CharField(max_length=256)
+	last = models.IntegerField(default=0)
+
+	class Meta():
+		verbose_name = "Endpoint Counter"
+		verbose_name_plural = "Endpoint Counters"
+		unique_together = ('scope', 'base')
+
+	def __str__(self):
+		return f'{self.scope}_{self.base}_{self.last}'
+
+
+class ModelBenchmark(models.Model):
+	''' 
+	Object represent latency and throughput of the MlModel for one batch size
+
+	Atributes:
+		algorithm: Benchmarked algorithm.
+		file_hash: Content hash of the algorithm file (benchmarked model version).
+		batch_size: Number of rows scored with one model call.
+		repeat: Number of measured calls.
+		cold_load_time: Time of loading the model file in seconds.
+		p50, p95, p99: Percentiles of one call latency in seconds.
+		rows_per_second: Throughput of the model.
+		peak_rss: Peak resident memory in bytes of a fresh process which loaded only this model
+			and scored batches up to this one.
+		created_at: Date of the benchmark.
+	'''
+	algorithm = models.ForeignKey(MlModel, on_delete=models.CASCADE, related_name='benchmarks')
+	file_hash = models.CharField(max_length=64)
+	batch_size = models.IntegerField()
+	repeat = models.IntegerField()
+	cold_load_time = models.FloatField()
+	p50 = models.FloatField()
+	p95 = models.FloatField()
+	p99 = models.FloatField()
+	rows_per_second = models.FloatField()
+	peak_rss = models.BigIntegerField()
+	created_at = models.DateTimeField(default=timezone.now)
+
+	class Meta():
+		verbose_name = "Model Benchmark"
+		verbose_name_plural = "Model Benchmarks"
+
+	def __str__(self):
+		return f'{self.algorithm}_{self.batch_size}_{self.created_at.date()}'
+
+
+class ModelCompaction(models.Model):
+	''' 
+	Object represent compaction of the MlModel file done at registration
+
+	Atributes:
+		algorithm: Compacted algorithm.
+		source_hash: Content hash of the original file.
+		file_hash: Content hash of the compacted file (empty when it was rejected).
+		options: JSON encoded compaction options and tolerances.
+		sample_size: Number of reference rows used to compare predictions.
+		original_size, compacted_size: Size of the file in bytes.
+		original_memory_size, compacted_memory_size: Approximate size of the loaded model in bytes.
+		original_row_latency, compacted_row_latency: Mean prediction time of one row in seconds.
+		max_error: The largest absolute difference of reference predictions.
+		accepted: Compacted file replaced the original one.
+		error: Reason of the rejected compaction (measurements are empty when it failed).
+		created_at: Date of the compaction.
+	'''
+	algorithm = models.ForeignKey(MlModel, on_delete=models.CASCADE, related_name='compactions')
+	source_hash = models.CharField(max_length=64)
+	file_hash = models.CharField(max_length=64, blank=True)
+	options = models.TextField()
+	sample_size = models.IntegerField(null=True)
+	original_size = models.BigIntegerField()
+	compacted_size = models.BigIntegerField(null=True)
+	original_memory_size = models.BigIntegerField(null=True)
+	compacted_memory_size = models.BigIntegerField(null=True)
+	original_row_latency = models.FloatField(null=True)
+	compacted_row_latency = models.FloatField(null=True)
+	max_error = models.FloatField(null=True)
+	accepted = models.BooleanField()
+	error = models.TextField(blank=True)
+	created_at = models.DateTimeField(default=timezone.now)
+
+	class Meta():
+		verbose_name = "Model Compaction"
+		verbose_name_plural = "Model Compactions"
+
+	def __str__(self):
+		return f'{self.algorithm}_{self.created_at.date()}'
+
+
+class UploadSession(models.Model):
+	''' 
+	Object represent chunked, resumable upload of the MlModel file
+
+	Atributes:
+		id: Public identifier of the upload.
+		name, version, description, file_format: Attributes of the MlModel created on commit.
+		size: Declared size of the file in bytes.
+		checksum: Expected sha256 of the file (optional).
+		received: Number of bytes written to the partial file.
+		owner: User who uploads the model.
+		updated_at: Date of the last received chunk (abandoned uploads expire).
+	'''
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	owner = models.ForeignKey(User, on_delete=models.CASCADE)
+	name = models.CharField(max_length=128)
+	version = models.CharField(max_length=16)
+	description = models.TextField(max_length=1000, blank=True)
+	file_format = models.CharField(max_length=16, choices=FILE_FORMAT_CHOICES, default=PICKLE_FORMAT)
+	size = models.BigIntegerField()
+	checksum = models.CharField(max_length=64, blank=True)
+	received = models.BigIntegerField(default=0)
+	created_at = models.DateTimeField(default=timezone.now)
+	updated_at = models.DateTimeField(default=timezone.now)
+
+	class Meta():
+		verbose_name = "Upload Session"
+		verbose_name_plural = "Upload Sessions"
+
+	def __str__(self):
+		return f'{self.name}_{self.version}_{self.id}'
+
+	@property
+	def path(self):
+		return os.path.abspath(os.path.join(UPLOAD_DIR, f'{self.id}.part'))
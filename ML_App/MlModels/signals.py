@@ -3,23 +3,24 @@ from django.db.models.signals import post_delete, pre_save
 from django.dispatch import receiver
 from .models import MlModel
 from .helpers import get_filepath
+from .storage import is_blob, release_file
+from Prediction_Pipeline.prediction_pipeline import model_registry
 
 @receiver(post_delete, sender=MlModel)
 def auto_delete_file_on_delete(sender, instance, **kwargs):
     '''
     Delete file from filesystem
-    when corresponding MlModel's object is deleted.
+    when the last MlModel's object using it is deleted.
     '''
-    if instance.file:
-        if os.path.isfile(instance.file.path):
-            os.remove(instance.file.path)
+    model_registry.invalidate(instance.endpoint)
+    release_file(instance.file, exclude_pk=instance.pk)
 
 
 @receiver(pre_save, sender=MlModel)
 def auto_change_file_on_update(sender, instance, **kwargs):
     '''
     Delete old file from filesystem
-    when MlModel's file was replaced
+    when MlModel's file was replaced and no other model uses it
     or
     change file endopoint
     when model parameters was updated.
@@ -28,17 +29,20 @@ def auto_change_file_on_update(sender, instance, **kwargs):
         return False
 
     try:
-        old_file = MlModel.objects.get(pk=instance.pk).file
+        old_model = MlModel.objects.get(pk=instance.pk)
     except MlModel.DoesNotExist:
         return False
+    old_file = old_model.file
+
+    # loaded model is stale when the file or its endpoint changes
+    model_registry.invalidate(old_model.endpoint)
 
     # delete old file
     new_file = instance.file
     if not old_file == new_file:
-        if os.path.isfile(old_file.path):
-            os.remove(old_file.path)
+        release_file(old_file, exclude_pk=instance.pk)
 
-    # change file path when nessesary
-    elif not new_file == get_filepath(instance):
+    # change file path when nessesary (content-addressed files are never renamed)
+    elif not is_blob(new_file.name) and not new_file == get_filepath(instance):
         os.rename(f'{new_file}', f'{get_filepath(instance)}')
         instance.file = get_filepath(instance)
@@ -0,0 +1,111 @@
+import fcntl
+import os
+from contextlib import contextmanager
+from django.core.files.base import ContentFile
+from Prediction_Pipeline.model_registry import file_hash
+from Prediction_Pipeline.prediction_pipeline import prediction_cache, convert_model_content
+from . import models
+
+
+# content-addressed model files: <BLOB_DIR>/<sha256 of the content>
+BLOB_DIR = 'MlModels/algorithms/blobs'
+LOCK_NAME = '.lock'
+
+
+def is_blob(name):
+	''' 
+	Function checks if the file name points to the content-addressed storage
+	'''
+	return os.path.dirname(os.path.normpath(name)) == os.path.normpath(BLOB_DIR)
+
+
+@contextmanager
+def locked_storage():
+	''' 
+	Context manager holding exclusive lock of the storage (across threads and processes),
+	files are stored and referenced, or counted and removed, under the lock
+	'''
+	os.makedirs(BLOB_DIR, exist_ok=True)
+	with open(os.path.join(BLOB_DIR, LOCK_NAME), 'a') as f:
+		fcntl.flock(f, fcntl.LOCK_EX)
+		# lock is released when the file is closed
+		yield
+
+
+def store_path(path, digest=None):
+	''' 
+	Function moves file to the content-addressed storage, identical files are stored once,
+	the caller holds locked_storage() until the file is referenced by MlModel
+
+	Returns (storage file name, sha256 of the content).
+	'''
+	path = os.path.abspath(path)
+	digest = digest or file_hash(path)
+	blob_name = os.path.join(BLOB_DIR, digest)
+	blob_path = os.path.abspath(blob_name)
+	if path != blob_path:
+		if os.path.isfile(blob_path):
+			os.remove(path)
+		else:
+			os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+			os.replace(path, blob_path)
+	return blob_name, digest
+
+
+def convert_upload(file, source_format, target_format):
+	''' 
+	Function returns uploaded file converted to the target format before it is saved,
+	files which can not be unserialized raise ModelFileError
+	'''
+	if source_format == target_format:
+		return file
+	return ContentFile(convert_model_content(file, source_format, target_format), name=os.path.basename(file.name))
+
+
+def store_file(model):
+	''' 
+	Function moves uploaded MlModel file to the content-addressed storage
+	'''
+	with locked_storage():
+		blob_name, digest = store_path(model.file.path)
+		# update() does not send pre_save signal (no file rename/release)
+		models.MlModel.objects.filter(pk=model.pk).update(file=blob_name, file_hash=digest)
+	model.file.name = blob_name
+	model.file_hash = digest
+	return model
+
+
+def replace_file(model, path):
+	''' 
+	Function stores derived file (e.g. compacted model) as the new MlModel file
+	'''
+	with locked_storage():
+		blob_name, digest = store_path(path)
+		models.MlModel.objects.filter(pk=model.pk).update(file=blob_name, file_hash=digest)
+	if model.file.name != blob_name:
+		release_file(model.file, exclude_pk=model.pk)
+	model.file.name = blob_name
+	model.file_hash = digest
+	return model
+
+
+def count_references(name, exclude_pk=None):
+	''' 
+	Function returns number of MlModels which use the file
+	'''
+	return models.MlModel.objects.filter(file=name).exclude(pk=exclude_pk).count()
+
+
+def release_file(file, exclude_pk=None):
+	''' 
+	Function removes the file from filesystem when no other MlModel uses it
+	'''
+	if not file:
+		return False
+	# references are counted under the lock, a concurrent store_path can not reuse the removed file
+	with locked_storage():
+		if count_references(file.name, exclude_pk) or not os.path.isfile(file.path):
+			return False
+		prediction_cache.invalidate(file_hash(file.path))
+		os.remove(file.path)
+	return True
@@ -1,5 +1,12 @@
+from django.apps import apps
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import connection
 from django.db.models import signals
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
 from django.utils import timezone
 
 from rest_framework import status
@@ -8,9 +15,31 @@ from rest_framework.test import APITestCase
 
 from unittest.mock import patch
 
-from .models import MlModel
-
+from prometheus_client import REGISTRY
+
+from .models import MlModel, ModelBenchmark, ModelCompaction, UploadSession
+from .warmup import warm_up_models, warmup_state
+from .validation import requeue_stale_validations
+from . import storage, uploads
+from ML_App import wsgi
+from Prediction_Pipeline.model_registry import ModelRegistry
+from Prediction_Pipeline.prediction_pipeline import load_model, model_registry, requests_to_frame
+
+from sklearn.base import clone
+from sklearn.svm import SVR
+from datetime import timedelta
+from types import SimpleNamespace
+
+import fcntl
+import hashlib
+import importlib
+import io
+import numpy as np
 import os
+import pandas as pd
+import pickle
+import shutil
+import tempfile
 import factory
 
 
@@ -46,7 +75,12 @@ class CreateModelTestCase(APITestCase):
 		        "description": "First Version",
 		        "created_at": curr_date,
 		        "endpoint": f"SVR_V1_{curr_date}",
-		        "owner_name": self.user.username
+		        "owner_name": self.user.username,
+		        "status": MlModel.PENDING,
+		        "validation_error": "",
+		        "load_time": None,
+		        "row_latency": None,
+		        "memory_size": None
 		    }
 		}
 
@@ -54,10 +88,55 @@ class CreateModelTestCase(APITestCase):
 		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 		self.assertEqual(MlModel.objects.count(), 1)
 		
-		new_model_path = os.path.join('./MlModels/algorithms', response.data['data']['endpoint'])
+		new_model_path = MlModel.objects.get().file.path
 		if os.path.isfile(new_model_path):
 		    os.remove(new_model_path)
 
+	def test_create_mmap_model(self):
+		self.user.is_staff = True
+		self.client.force_authenticate(user=self.user)
+
+		model_path = "./MlModels/algorithms/KNeighborsRegressor_V1_2020-06-19"
+		with open(model_path, "rb") as file:
+			data = {
+				"name" : "KNeighborsRegressor",
+				"version" : "V1",
+				"file" : file,
+				"file_format": "joblib_mmap",
+			}
+			response = self.client.post("/api/models/create/", data)
+
+		model = MlModel.objects.get(endpoint=response.data['data']['endpoint'])
+		df = requests_to_frame([SimpleNamespace(course_title="django web course", price=100, content_duration=40,
+												num_lectures=40, days=365, level="All Levels")])
+		expected = load_model(model_path).predict(df)
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(model.file_format, "joblib_mmap")
+		self.assertEqual(list(model_registry.get_model(model).predict(df)), list(expected))
+
+		model_registry.invalidate(model.endpoint)
+		if os.path.isfile(model.file.path):
+		    os.remove(model.file.path)
+
+	def test_create_broken_mmap_model(self):
+		self.user.is_staff = True
+		self.client.force_authenticate(user=self.user)
+		files = set(os.listdir("./MlModels/algorithms"))
+
+		data = {
+			"name" : "SVR",
+			"version" : "V2",
+			"file" : SimpleUploadedFile("SVR_V2", b"not a pickle"),
+			"file_format": "joblib_mmap",
+		}
+		response = self.client.post("/api/models/create/", data)
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn("file", response.data['error_message'])
+		self.assertEqual(MlModel.objects.count(), 0)
+		self.assertEqual(set(os.listdir("./MlModels/algorithms")), files)
+
 	def test_no_permissions(self):
 		self.client.force_authenticate(user=self.user)
 
@@ -100,6 +179,10 @@ class ModelsListTestCase(APITestCase):
 		            "version": new_model.version,
 		            "endpoint": new_model.endpoint,
 		            "owner_name": new_model.owner.username,
+		            "status": MlModel.PENDING,
+		            "load_time": None,
+		            "row_latency": None,
+		            "memory_size": None,
 		            "url": f"http://testserver/api/models/{new_model.endpoint}/"
 		        },
 		    ]
@@ -143,7 +226,12 @@ class ModelDetailsTestCase(APITestCase):
 		    "description": self.new_model.description,
 		    "created_at": self.curr_date,
 		    "endpoint": self.new_model.endpoint,
-		    "owner_name": self.new_model.owner.username
+		    "owner_name": self.new_model.owner.username,
+		    "status": MlModel.PENDING,
+		    "validation_error": "",
+		    "load_time": None,
+		    "row_latency": None,
+		    "memory_size": None
 		}
 
 		self.assertEqual(response.data, expected_response)
@@ -181,7 +269,12 @@ class ModelDetailsTestCase(APITestCase):
 			    "description": data['description'],
 			    "created_at": self.curr_date,
 			    "endpoint": f"{self.new_model.name}_{data['version']}_{self.curr_date}",
-			    "owner_name": self.new_model.owner.username
+			    "owner_name": self.new_model.owner.username,
+			    "status": MlModel.PENDING,
+			    "validation_error": "",
+			    "load_time": None,
+			    "row_latency": None,
+			    "memory_size": None
 			}
 		}
 
@@ -189,6 +282,604 @@ class ModelDetailsTestCase(APITestCase):
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 		# delete new create file
-		updated_model_path = os.path.join('./MlModels/algorithms', expected_response['data']['endpoint'])
+		updated_model_path = MlModel.objects.get().file.path
 		if os.path.isfile(updated_model_path):
-			os.remove(updated_model_path)
\ No newline at end of file
+			os.remove(updated_model_path)
+
+	def test_put_broken_mmap_model(self):
+		data = {
+				"file": SimpleUploadedFile("SVR_V2", b"not a pickle"),
+				"file_format": "joblib_mmap"
+		}
+		response = self.client.put(f"/api/models/{self.new_model.endpoint}/", data)
+		model = MlModel.objects.get()
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(model.file.name, self.new_model.file.name)
+		self.assertEqual(model.file_format, "pickle")
+		self.assertTrue(os.path.isfile(self.model_path))
+
+
+class EndpointAllocationTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+		self.base = f"SVR_V1_{timezone.now().date()}"
+
+	def create_model(self, version='V1'):
+		return MlModel.objects.create(owner=self.user, name='SVR', version=version, file="not_existing_model")
+
+	def store_without_counter(self, *endpoints):
+		MlModel.objects.bulk_create(
+			[MlModel(owner=self.user, name='SVR', version='V1', file="not_existing_model", endpoint=endpoint)
+			 for endpoint in endpoints]
+		)
+
+	# to disable auto_change_file_on_update method
+	@factory.django.mute_signals(signals.pre_save)
+	def test_suffixes(self):
+		models = [self.create_model() for _ in range(3)]
+		models[0].description = "Changed"
+		models[0].save()
+		models[1].version = "V2"
+		models[1].save()
+
+		self.assertEqual([model.endpoint for model in models],
+						 [self.base, f"SVR_V2_{timezone.now().date()}", f"{self.base}_2"])
+
+	def test_flat_cost(self):
+		query_counts = []
+		for i in range(30):
+			with CaptureQueriesContext(connection) as queries:
+				self.create_model()
+			query_counts.append(len(queries))
+
+		self.assertEqual(MlModel.objects.last().endpoint, f"{self.base}_29")
+		self.assertEqual(len(set(query_counts[1:])), 1)
+		self.assertLessEqual(query_counts[-1], query_counts[0])
+
+	def test_stored_endpoints(self):
+		self.store_without_counter(self.base, f"{self.base}_1", f"{self.base}_5", f"{self.base}_x")
+
+		self.assertEqual(self.create_model().endpoint, f"{self.base}_6")
+
+	def test_retry_on_conflict(self):
+		self.create_model()
+		# endpoint taken without the counter, the next save hits unique constraint
+		self.store_without_counter(f"{self.base}_1", f"{self.base}_2")
+
+		self.assertEqual(self.create_model().endpoint, f"{self.base}_3")
+
+
+class ModelRegistryTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model_path = "./MlModels/algorithms/SVR_V1_2020-06-19"
+		self.model = MlModel.objects.create(owner=self.user,
+											name='SVR',
+											version='V1',
+											description='First Version',
+											file=self.model_path)
+		self.other_model = MlModel.objects.create(owner=self.user,
+												  name='SVR',
+												  version='V2',
+												  description='Seccond Version',
+												  file=self.model_path)
+
+	def test_cache_hit(self):
+		registry = ModelRegistry(loader=load_model)
+
+		first = registry.get_model(self.model)
+		second = registry.get_model(self.model)
+		stats = registry.stats()
+
+		self.assertIs(first, second)
+		self.assertEqual(stats['misses'], 1)
+		self.assertEqual(stats['hits'], 1)
+		self.assertGreater(stats['load_time'], 0)
+		self.assertEqual(stats['models'][0]['endpoint'], self.model.endpoint)
+
+	def test_lru_eviction(self):
+		registry = ModelRegistry(loader=load_model, max_memory=1)
+
+		registry.get_model(self.model)
+		registry.get_model(self.other_model)
+		stats = registry.stats()
+
+		self.assertEqual(stats['evictions'], 1)
+		self.assertEqual([entry['endpoint'] for entry in stats['models']], [self.other_model.endpoint])
+
+	def test_invalidate_on_delete(self):
+		copy_path = "./MlModels/algorithms/registry_test_copy"
+		shutil.copyfile(self.model_path, copy_path)
+		model = MlModel.objects.create(owner=self.user,
+									   name='SVR',
+									   version='V3',
+									   file=copy_path)
+
+		model_registry.get_model(model)
+		self.assertIn(model.endpoint, [entry['endpoint'] for entry in model_registry.stats()['models']])
+
+		model.delete()
+
+		self.assertNotIn(model.endpoint, [entry['endpoint'] for entry in model_registry.stats()['models']])
+		self.assertFalse(os.path.isfile(copy_path))
+
+
+class ContentAddressedStorageTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw",
+		                         			 is_staff=True)
+		self.client.force_authenticate(user=self.user)
+
+	def create_model(self, version, model_path="./MlModels/algorithms/SVR_V1_2020-06-19"):
+		with open(model_path, "rb") as file:
+			data = {"name": "SVR", "version": version, "file": file}
+			response = self.client.post("/api/models/create/", data)
+		return MlModel.objects.get(endpoint=response.data['data']['endpoint'])
+
+	def test_shared_file(self):
+		first_model = self.create_model("V1")
+		second_model = self.create_model("V2", "./MlModels/algorithms/LinearRegression_V1_2020-06-19")
+		blob_path = first_model.file.path
+
+		self.assertEqual(first_model.file.name, second_model.file.name)
+		self.assertEqual(first_model.file_hash, os.path.basename(blob_path))
+		self.assertEqual(str(first_model), first_model.endpoint)
+		self.assertFalse(os.path.isfile(os.path.join("./MlModels/algorithms", first_model.endpoint)))
+		self.assertIs(model_registry.get_model(first_model), model_registry.get_model(second_model))
+
+		first_model.delete()
+		self.assertTrue(os.path.isfile(blob_path))
+
+		second_model.delete()
+		self.assertFalse(os.path.isfile(blob_path))
+
+	def test_release_under_lock(self):
+		model = self.create_model("V1")
+		locked = []
+
+		def count_references(name, exclude_pk=None):
+			with open(os.path.join(storage.BLOB_DIR, storage.LOCK_NAME)) as f:
+				try:
+					fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+				except BlockingIOError:
+					locked.append(name)
+			return 0
+
+		with patch("MlModels.storage.count_references", count_references):
+			model.delete()
+
+		self.assertEqual(locked, [model.file.name])
+		self.assertFalse(os.path.isfile(model.file.path))
+
+	def test_shared_instance(self):
+		registry = ModelRegistry(loader=load_model)
+		algorithms = [
+			SimpleNamespace(endpoint=name, file_format="pickle",
+							file=SimpleNamespace(path=os.path.abspath(f"./MlModels/algorithms/{name}_V1_2020-06-19")))
+			for name in ("SVR", "LinearRegression")
+		]
+		first_model, second_model = [registry.get_model(algorithm) for algorithm in algorithms]
+
+		self.assertIs(first_model, second_model)
+		self.assertEqual(registry.memory_usage, registry.stats()['models'][0]['size'])
+
+
+class ResumableUploadTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw",
+		                         			 is_staff=True)
+		self.client.force_authenticate(user=self.user)
+
+		self.model_path = "./MlModels/algorithms/GradientBoostingRegressor_V1_2020-06-19"
+		with open(self.model_path, "rb") as file:
+			self.content = file.read()
+		self.size = len(self.content)
+
+	def start(self, **data):
+		data = dict({"name": "GradientBoostingRegressor", "version": "V1", "size": self.size}, **data)
+		response = self.client.post("/api/models/uploads/", data)
+		return f"/api/models/uploads/{response.data['data']['id']}/"
+
+	def send(self, url, start, end):
+		return self.client.put(url, self.content[start:end + 1], content_type="application/octet-stream",
+							   HTTP_CONTENT_RANGE=f"bytes {start}-{end}/{self.size}")
+
+	def test_upload(self):
+		url = self.start(checksum=hashlib.sha256(self.content).hexdigest())
+		middle = self.size // 2
+
+		self.assertEqual(self.send(url, 0, middle - 1).data['received'], middle)
+		self.assertEqual(self.send(url, 0, 10).status_code, status.HTTP_409_CONFLICT)
+		self.assertEqual(self.client.post(f"{url}commit/").status_code, status.HTTP_400_BAD_REQUEST)
+
+		# resume in other process, sha256 state is recomputed from the partial file
+		uploads._digests.clear()
+		self.assertEqual(self.client.get(url).data['received'], middle)
+		self.assertEqual(self.send(url, middle, self.size - 1).data['received'], self.size)
+
+		response = self.client.post(f"{url}commit/")
+		model = MlModel.objects.get(endpoint=response.data['data']['endpoint'])
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(model.file_hash, hashlib.sha256(self.content).hexdigest())
+		self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+		with open(model.file.path, "rb") as file:
+			self.assertEqual(file.read(), self.content)
+
+		model.delete()
+		self.assertFalse(os.path.isfile(model.file.path))
+
+	def test_wrong_checksum(self):
+		url = self.start(checksum="0" * 64)
+		self.send(url, 0, self.size - 1)
+		response = self.client.post(f"{url}commit/")
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(MlModel.objects.count(), 0)
+
+		partial_path = UploadSession.objects.get().path
+		self.client.delete(url)
+		self.assertFalse(os.path.isfile(partial_path))
+
+	def test_concurrent_chunk(self):
+		url = self.start()
+		session = UploadSession.objects.get()
+
+		# other request holds the upload while it writes its chunk
+		with uploads.locked_session(session):
+			self.assertEqual(self.send(url, 0, self.size - 1).status_code, status.HTTP_409_CONFLICT)
+			self.assertEqual(self.client.delete(url).status_code, status.HTTP_409_CONFLICT)
+		self.assertEqual(os.path.getsize(session.path), 0)
+
+		self.assertEqual(self.send(url, 0, self.size - 1).data['received'], self.size)
+		with open(session.path, "rb") as file:
+			self.assertEqual(file.read(), self.content)
+		self.client.delete(url)
+
+	def test_expire(self):
+		self.start()
+		session = UploadSession.objects.get()
+		UploadSession.objects.update(updated_at=timezone.now() - timedelta(days=2))
+		out = io.StringIO()
+
+		call_command("expire_uploads", stdout=out)
+
+		self.assertIn("Removed 1", out.getvalue())
+		self.assertEqual(UploadSession.objects.count(), 0)
+		self.assertFalse(os.path.isfile(session.path))
+
+
+class ModelWarmupTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model = MlModel.objects.create(owner=self.user,
+											name='SVR',
+											version='V1',
+											description='First Version',
+											file="./MlModels/algorithms/SVR_V1_2020-06-19",
+											status=MlModel.READY)
+		self.broken_model = MlModel.objects.create(owner=self.user,
+												   name='Broken',
+												   version='V1',
+												   file="./MlModels/algorithms/not_existing_model",
+												   status=MlModel.READY)
+		self.pending_model = MlModel.objects.create(owner=self.user,
+													name='SVR',
+													version='V2',
+													file="./MlModels/algorithms/SVR_V1_2020-06-19")
+		warmup_state.models.clear()
+
+	def test_warm_up(self):
+		warm_up_models()
+		response = self.client.get("/api/models/readiness/")
+		models = {model['endpoint']: model for model in response.data['models']}
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data['response'], 'ready')
+		self.assertTrue(models[self.model.endpoint]['warm'])
+		self.assertGreater(models[self.model.endpoint]['memory'], 0)
+		self.assertFalse(models[self.broken_model.endpoint]['warm'])
+		self.assertIsNotNone(models[self.broken_model.endpoint]['error'])
+		self.assertNotIn(self.pending_model.endpoint, models)
+
+	def test_not_measured(self):
+		labels = {'endpoint': self.model.endpoint, 'mode': 'batch'}
+		observations = REGISTRY.get_sample_value('ml_inference_duration_seconds_count', labels)
+		warm_up_models()
+
+		self.assertEqual(REGISTRY.get_sample_value('ml_inference_duration_seconds_count', labels), observations)
+
+	def test_top_n(self):
+		warm_up_models(top_n=1)
+
+		self.assertEqual(list(warmup_state.models), [self.model.endpoint])
+
+	@override_settings(ML_WARMUP={'ENABLED': True, 'BACKGROUND': False})
+	def test_started_by_server_only(self):
+		with patch("MlModels.warmup.warm_up_models") as warm_up:
+			apps.get_app_config("MlModels").ready()
+			warm_up.assert_not_called()
+
+			importlib.reload(wsgi)
+			warm_up.assert_called_once_with(None)
+
+	@override_settings(ML_WARMUP={'ENABLED': True, 'BACKGROUND': False})
+	def test_started_in_forked_worker(self):
+		# state inherited from the master process of gunicorn --preload
+		warmup_state.pid = os.getpid() + 1
+		self.addCleanup(setattr, warmup_state, "pid", None)
+		environ = {"REQUEST_METHOD": "GET", "PATH_INFO": "/api/models/readiness/", "SERVER_NAME": "testserver",
+				   "SERVER_PORT": "80", "wsgi.input": io.BytesIO(), "wsgi.url_scheme": "http"}
+
+		with patch("MlModels.warmup.warm_up_models") as warm_up:
+			wsgi.application(environ, lambda status, headers: None)
+			wsgi.application(environ, lambda status, headers: None)
+
+		warm_up.assert_called_once_with(None)
+		self.assertEqual(warmup_state.pid, os.getpid())
+
+
+@override_settings(ML_MODEL_VALIDATION={'BACKGROUND': False, 'SAMPLE_SIZE': 10})
+class ModelValidationTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw",
+		                         			 is_staff=True)
+		self.client.force_authenticate(user=self.user)
+
+		self.request_data = {
+			"course_title": "Django Web Course",
+			"price": 100,
+			"content_duration": 40,
+			"num_lectures": 40,
+			"days": 365,
+			"level": "All Levels",
+		}
+
+	def create_model(self, file):
+		data = {"name": "SVR", "version": "V1", "file": file}
+		response = self.client.post("/api/models/create/", data)
+		self.addCleanup(lambda: MlModel.objects.all().delete())
+		return response
+
+	def test_valid_model(self):
+		with open("./MlModels/algorithms/SVR_V1_2020-06-19", "rb") as file:
+			response = self.create_model(file)
+		model = MlModel.objects.get()
+
+		self.assertEqual(response.data['data']['status'], MlModel.READY)
+		self.assertEqual(model.status, MlModel.READY)
+		self.assertGreater(model.load_time, 0)
+		self.assertGreater(model.row_latency, 0)
+		self.assertGreater(model.memory_size, 0)
+		self.assertIsNotNone(model.validated_at)
+
+		response = self.client.post("/api/requests/create/", dict(self.request_data, algorithm=model.pk))
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+	def test_broken_model(self):
+		response = self.create_model(SimpleUploadedFile("broken_model", b"not a pickled model"))
+		model = MlModel.objects.get()
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(model.status, MlModel.FAILED)
+		self.assertIn("UnpicklingError", model.validation_error)
+		self.assertIsNone(model.load_time)
+
+		response = self.client.post("/api/requests/create/", dict(self.request_data, algorithm=model.pk))
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn("algorithm", response.data)
+
+	def create_stale_models(self):
+		started_at = timezone.now() - timedelta(hours=1)
+		stale = MlModel.objects.create(owner=self.user, name='SVR', version='V1',
+									   file="./MlModels/algorithms/SVR_V1_2020-06-19",
+									   status=MlModel.VALIDATING, validation_started_at=started_at)
+		running = MlModel.objects.create(owner=self.user, name='SVR', version='V2',
+										 file="./MlModels/algorithms/SVR_V1_2020-06-19",
+										 status=MlModel.VALIDATING, validation_started_at=timezone.now())
+		return stale, running
+
+	def test_requeue_stale_validations(self):
+		stale, running = self.create_stale_models()
+
+		self.assertEqual(requeue_stale_validations(), [stale])
+		self.assertEqual(MlModel.objects.get(pk=stale.pk).status, MlModel.READY)
+		self.assertEqual(MlModel.objects.get(pk=running.pk).status, MlModel.VALIDATING)
+		self.assertEqual(requeue_stale_validations(), [])
+
+	def test_validate_models_command(self):
+		stale, running = self.create_stale_models()
+		out = io.StringIO()
+
+		call_command("validate_models", stdout=out)
+		self.assertIn(stale.endpoint, out.getvalue())
+		self.assertEqual(MlModel.objects.get(pk=stale.pk).status, MlModel.READY)
+
+		call_command("validate_models", "--models", running.endpoint, stdout=out)
+		self.assertEqual(MlModel.objects.get(pk=running.pk).status, MlModel.READY)
+
+
+@override_settings(ML_MODEL_COMPACTION=dict(settings.ML_MODEL_COMPACTION, SAMPLE_SIZE=50))
+class ModelCompactionTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw",
+		                         			 is_staff=True)
+		self.client.force_authenticate(user=self.user)
+		self.model_path = "./MlModels/algorithms/SVR_V1_2020-06-19"
+		self.df = requests_to_frame([SimpleNamespace(course_title="django web course", price=100, content_duration=40,
+													 num_lectures=40, days=365, level="All Levels")])
+
+	def create_model(self):
+		with open(self.model_path, "rb") as file:
+			response = self.client.post("/api/models/create/", {"name": "SVR", "version": "V1", "file": file, "compact": True})
+		self.addCleanup(lambda: MlModel.objects.all().delete())
+		return response, MlModel.objects.get()
+
+	def test_compact(self):
+		response, model = self.create_model()
+		compaction = response.data['compaction']
+		compacted = load_model(model.file.path)
+		tfidf = compacted.named_steps['preprocessing'].transformer_list[0][1].named_steps['tfidf_vectorizer']
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertTrue(compaction['accepted'])
+		self.assertLess(compaction['compacted_size'], compaction['original_size'])
+		self.assertEqual(compaction['file_hash'], model.file_hash)
+		self.assertEqual(os.path.getsize(model.file.path), compaction['compacted_size'])
+		self.assertFalse(hasattr(tfidf, 'stop_words_'))
+		self.assertEqual(compacted.steps[-1][1].coef_.dtype, np.float32)
+		np.testing.assert_allclose(compacted.predict(self.df), load_model(self.model_path).predict(self.df), rtol=1e-3)
+
+	@override_settings(ML_MODEL_COMPACTION=dict(settings.ML_MODEL_COMPACTION, SAMPLE_SIZE=50,
+												MODELS={'SVR': {'RTOL': 0, 'ATOL': 0}}))
+	def test_rejected(self):
+		response, model = self.create_model()
+		compaction = ModelCompaction.objects.get()
+
+		self.assertFalse(response.data['compaction']['accepted'])
+		self.assertGreater(compaction.max_error, 0)
+		self.assertIn("predictions differ", compaction.error)
+		self.assertEqual(compaction.file_hash, "")
+		with open(self.model_path, "rb") as file:
+			self.assertEqual(model.file_hash, hashlib.sha256(file.read()).hexdigest())
+		self.assertFalse(os.path.isfile(f"{model.file.path}.compacting"))
+
+	def test_svr(self):
+		# bundled SVR file holds LinearRegression, libsvm needs float64 parameters
+		pipeline = clone(load_model("./MlModels/algorithms/LinearRegression_V1_2020-06-19"))
+		pipeline.steps[-1] = ('regressor', SVR())
+		df = pd.read_csv(settings.ML_MODEL_COMPACTION['SAMPLE_PATH']).head(200)
+		pipeline.fit(df[list(self.df.columns)], df['num_subscribers'])
+		tmp_dir = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, tmp_dir)
+		self.model_path = os.path.join(tmp_dir, "SVR_V2")
+		with open(self.model_path, "wb") as file:
+			pickle.dump(pipeline, file)
+
+		response, model = self.create_model()
+		compacted = load_model(model.file.path)
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertTrue(response.data['compaction']['accepted'])
+		self.assertEqual(compacted.steps[-1][1].support_vectors_.dtype, np.float64)
+		np.testing.assert_allclose(compacted.predict(self.df), pipeline.predict(self.df), rtol=1e-3)
+
+	def test_not_smaller(self):
+		with patch("MlModels.compaction.save_model", lambda model, path, file_format: shutil.copy(self.model_path, path)):
+			response, model = self.create_model()
+		compaction = ModelCompaction.objects.get()
+
+		self.assertFalse(compaction.accepted)
+		self.assertEqual(compaction.compacted_size, compaction.original_size)
+		self.assertIn("not smaller", response.data['compaction']['error'])
+		self.assertEqual(compaction.file_hash, "")
+
+	def test_k_neighbors(self):
+		self.model_path = "./MlModels/algorithms/KNeighborsRegressor_V1_2020-06-19"
+		response, model = self.create_model()
+		compacted = load_model(model.file.path)
+
+		self.assertTrue(response.data['compaction']['accepted'])
+		self.assertEqual(compacted.steps[-1][1]._fit_X.dtype, np.float32)
+		np.testing.assert_allclose(compacted.predict(self.df), load_model(self.model_path).predict(self.df), rtol=1e-3)
+
+	@override_settings(ML_MODEL_COMPACTION=dict(settings.ML_MODEL_COMPACTION, SAMPLE_PATH="not_existing.csv"),
+					   ML_MODEL_VALIDATION={'BACKGROUND': False, 'SAMPLE_SIZE': 10})
+	def test_failed(self):
+		response, model = self.create_model()
+		compaction = ModelCompaction.objects.get()
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertFalse(compaction.accepted)
+		self.assertIn("not_existing.csv", compaction.error)
+		self.assertIsNone(compaction.compacted_size)
+		self.assertEqual(model.status, MlModel.READY)
+		with open(self.model_path, "rb") as file:
+			self.assertEqual(model.file_hash, hashlib.sha256(file.read()).hexdigest())
+
+
+class ModelBenchmarkTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_superuser(username="testuser",
+												  email="testuser@email.com",
+												  password="some_strong_psw")
+
+		self.model = MlModel.objects.create(owner=self.user,
+											name='SVR',
+											version='V1',
+											description='First Version',
+											file="./MlModels/algorithms/SVR_V1_2020-06-19",
+											status=MlModel.READY)
+		self.client.force_authenticate(user=self.user)
+
+	def test_benchmark(self):
+		labels = {'endpoint': self.model.endpoint, 'mode': 'batch'}
+		observations = REGISTRY.get_sample_value('ml_inference_duration_seconds_count', labels)
+		response = self.client.post("/api/models/benchmark/", {"batch_sizes": [1, 10], "repeat": 3}, format='json')
+		results = response.data['results']
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual([result['batch_size'] for result in results], [1, 10])
+		self.assertEqual(ModelBenchmark.objects.count(), 2)
+		self.assertEqual(results[0]['algorithm'], self.model.endpoint)
+		self.assertGreater(results[0]['cold_load_time'], 0)
+		self.assertLessEqual(results[0]['p50'], results[0]['p99'])
+		self.assertGreater(results[1]['rows_per_second'], 0)
+		self.assertGreater(results[1]['peak_rss'], 0)
+		self.assertEqual(len(self.client.get("/api/models/benchmark/").data['results']), 2)
+		self.assertEqual(REGISTRY.get_sample_value('ml_inference_duration_seconds_count', labels), observations)
+
+	def test_not_ready(self):
+		pending_model = MlModel.objects.create(owner=self.user,
+											   name='SVR',
+											   version='V2',
+											   file="./MlModels/algorithms/not_existing_model",
+											   status=MlModel.PENDING)
+		response = self.client.post("/api/models/benchmark/", {"batch_sizes": [1], "repeat": 1}, format='json')
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual([result['algorithm'] for result in response.data['results']], [self.model.endpoint])
+
+		response = self.client.post("/api/models/benchmark/", {"algorithms": [pending_model.pk], "repeat": 1}, format='json')
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn("algorithms", response.data['error_message'])
+
+	def test_limits(self):
+		response = self.client.post("/api/models/benchmark/", {"batch_sizes": [10000], "repeat": 1000}, format='json')
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(set(response.data['error_message']), {"batch_sizes", "repeat"})
+		self.assertEqual(ModelBenchmark.objects.count(), 0)
+
+	def test_no_permissions(self):
+		self.client.force_authenticate(user=User.objects.create_user(username="otheruser", password="psw"))
+		response = self.client.post("/api/models/benchmark/", {"repeat": 1}, format='json')
+
+		self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+		self.assertEqual(ModelBenchmark.objects.count(), 0)
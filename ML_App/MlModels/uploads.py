@@ -0,0 +1,227 @@
+import fcntl
+import hashlib
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from Prediction_Pipeline.prediction_pipeline import convert_model_file, ModelFileError, PICKLE_FORMAT
+from .models import MlModel, UploadSession
+from .storage import locked_storage, store_path, count_references
+
+
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+DEFAULT_EXPIRE_AFTER = 24 * 3600
+READ_SIZE = 1024 * 1024
+
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+# sha256 state of uploads handled by this process: upload id -> (offset, hash)
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+class UploadError(Exception):
+	'''
+	Raised when the chunk or the finished upload is not valid
+	'''
+
+
+class UploadConflict(UploadError):
+	'''
+	Raised when the chunk does not start at the current upload offset
+	'''
+
+
+def get_config():
+	return getattr(settings, 'ML_MODEL_UPLOADS', {})
+
+
+def get_max_size():
+	return get_config().get('MAX_SIZE', DEFAULT_MAX_SIZE)
+
+
+def parse_content_range(header):
+	'''
+	Function returns (start, end, total) of the Content-Range header (end included)
+	'''
+	match = CONTENT_RANGE.match(header or '')
+	if not match:
+		raise UploadError('Content-Range header "bytes <start>-<end>/<total>" is required')
+	start, end, total = match.groups()
+	start, end = int(start), int(end)
+	if end < start:
+		raise UploadError('Content-Range end is smaller than start')
+	return start, end, None if total == '*' else int(total)
+
+
+def _get_digest(session):
+	# hash state is kept in memory, other processes (or restarts) recompute it from the partial file
+	with _digests_lock:
+		offset, digest = _digests.pop(session.pk, (None, None))
+	if offset == session.received:
+		return digest
+	digest = hashlib.sha256()
+	if session.received:
+		with open(session.path, 'rb') as f:
+			remaining = session.received
+			while remaining:
+				chunk = f.read(min(READ_SIZE, remaining))
+				if not chunk:
+					raise UploadError('partial file is shorter than received bytes')
+				digest.update(chunk)
+				remaining -= len(chunk)
+	return digest
+
+
+@contextmanager
+def locked_session(session):
+	'''
+	Context manager holding exclusive lock of the partial file (one writer of the upload
+	across threads and processes), session.received is refreshed under the lock
+	'''
+	try:
+		f = open(session.path, 'r+b')
+	except FileNotFoundError:
+		raise UploadError('upload does not exist')
+	with f:
+		try:
+			fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+		except BlockingIOError:
+			raise UploadConflict('upload is being changed by other request')
+		received = UploadSession.objects.filter(pk=session.pk).values_list('received', flat=True).first()
+		if received is None:
+			raise UploadError('upload does not exist')
+		session.received = received
+		# lock is released when the file is closed
+		yield f
+
+
+def create_session(owner, **fields):
+	'''
+	Function starts new upload with empty partial file
+	'''
+	if fields['size'] > get_max_size():
+		raise UploadError(f'file can have at most {get_max_size()} bytes')
+	# abandoned uploads are removed when new ones start
+	expire_sessions()
+	session = UploadSession.objects.create(owner=owner, **fields)
+	os.makedirs(os.path.dirname(session.path), exist_ok=True)
+	open(session.path, 'wb').close()
+	return session
+
+
+def write_chunk(session, content_range, stream):
+	'''
+	Function appends chunk read from the stream to the partial file and updates sha256 on the fly
+
+	Returns new upload offset, bytes which arrived before the stream ended are kept,
+	so the client can resume from the returned offset.
+	'''
+	start, end, total = parse_content_range(content_range)
+	if stream is None:
+		raise UploadError('chunk is empty')
+	if total is not None and total != session.size:
+		raise UploadError(f'upload size is {session.size} bytes')
+	if end >= session.size:
+		raise UploadError('chunk ends after the end of the file')
+	with locked_session(session) as f:
+		if start != session.received:
+			raise UploadConflict(f'upload continues at byte {session.received}')
+
+		digest = _get_digest(session)
+		remaining = end - start + 1
+		written = 0
+		f.seek(start)
+		f.truncate()
+		while remaining:
+			chunk = stream.read(min(READ_SIZE, remaining))
+			if not chunk:
+				break
+			f.write(chunk)
+			digest.update(chunk)
+			written += len(chunk)
+			remaining -= len(chunk)
+		f.flush()
+
+		offset = start + written
+		UploadSession.objects.filter(pk=session.pk).update(received=offset, updated_at=timezone.now())
+		session.received = offset
+		with _digests_lock:
+			_digests[session.pk] = (offset, digest)
+	return offset
+
+
+def commit_session(session):
+	'''
+	Function verifies finished upload and creates MlModel from it atomically
+	'''
+	with locked_session(session):
+		return _commit_session(session)
+
+
+def _commit_session(session):
+	if session.received != session.size:
+		raise UploadError(f'upload is not finished ({session.received} of {session.size} bytes)')
+	checksum = _get_digest(session).hexdigest()
+	if session.checksum and session.checksum.lower() != checksum:
+		raise UploadError('sha256 checksum does not match')
+
+	digest = checksum
+	if session.file_format != PICKLE_FORMAT:
+		try:
+			convert_model_file(session.path, PICKLE_FORMAT, session.file_format)
+		except ModelFileError as exc:
+			raise UploadError(str(exc)) from exc
+		digest = None
+	with locked_storage():
+		blob_name, digest = store_path(session.path, digest)
+		try:
+			with transaction.atomic():
+				model = MlModel.objects.create(
+					owner=session.owner,
+					name=session.name,
+					version=session.version,
+					description=session.description,
+					file=blob_name,
+					file_format=session.file_format,
+					file_hash=digest,
+				)
+				session.delete()
+		except Exception:
+			if not count_references(blob_name):
+				os.remove(os.path.abspath(blob_name))
+			raise
+	return model
+
+
+def abort_session(session):
+	'''
+	Function removes unfinished upload with its partial file
+	'''
+	if os.path.isfile(session.path):
+		with locked_session(session):
+			os.remove(session.path)
+	with _digests_lock:
+		_digests.pop(session.pk, None)
+	session.delete()
+
+
+def expire_sessions(expire_after=None):
+	'''
+	Function removes uploads which did not receive a chunk for expire_after seconds,
+	returns number of removed uploads
+	'''
+	expire_after = expire_after or get_config().get('EXPIRE_AFTER', DEFAULT_EXPIRE_AFTER)
+	expired = 0
+	for session in UploadSession.objects.filter(updated_at__lt=timezone.now() - timedelta(seconds=expire_after)):
+		try:
+			abort_session(session)
+		except UploadError:
+			# chunk is being written right now, the upload is not abandoned
+			continue
+		expired += 1
+	return expired
@@ -0,0 +1,118 @@
+import threading
+import time
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from Prediction_Pipeline.model_registry import estimate_size
+from Prediction_Pipeline.prediction_pipeline import load_model, build_input
+from .benchmark import get_sample_rows
+from .models import MlModel
+
+
+DEFAULT_SAMPLE_SIZE = 100
+DEFAULT_STALE_TIMEOUT = 600
+
+
+def get_config():
+	return getattr(settings, 'ML_MODEL_VALIDATION', {})
+
+
+def profile_model(model):
+	'''
+	Function loads fresh copy of the MlModel file and runs smoke prediction
+
+	Returns dict with load_time, row_latency and memory_size,
+	raises exception when the model can not be loaded or returns invalid predictions.
+	'''
+	rows = get_sample_rows(get_config().get('SAMPLE_SIZE', DEFAULT_SAMPLE_SIZE))
+
+	start = time.perf_counter()
+	loaded = load_model(model.file.path, model.file_format)
+	load_time = time.perf_counter() - start
+
+	# first call pays one-off costs (lazy imports, memory-mapped pages)
+	loaded.predict(build_input(loaded, rows[:1]))
+	start = time.perf_counter()
+	predictions = np.asarray(loaded.predict(build_input(loaded, rows)), dtype=float)
+	row_latency = (time.perf_counter() - start) / len(rows)
+
+	if predictions.shape != (len(rows),):
+		raise ValueError(f'expected {len(rows)} predictions, model returned shape {predictions.shape}')
+	if not np.all(np.isfinite(predictions)):
+		raise ValueError('model returned non finite predictions')
+
+	return {
+		'load_time': load_time,
+		'row_latency': row_latency,
+		'memory_size': estimate_size(loaded),
+	}
+
+
+def validate_model(model):
+	'''
+	Function validates and profiles the MlModel, the result is stored on the model
+	'''
+	# update() does not send pre_save signal (no file rename/release)
+	queryset = MlModel.objects.filter(pk=model.pk)
+	queryset.update(status=MlModel.VALIDATING, validation_started_at=timezone.now())
+	fields = {'validated_at': timezone.now()}
+	try:
+		fields.update(profile_model(model))
+	except Exception as exc:
+		fields.update(status=MlModel.FAILED, validation_error=f'{exc.__class__.__name__}: {exc}',
+					  load_time=None, row_latency=None, memory_size=None)
+	else:
+		fields.update(status=MlModel.READY, validation_error='')
+	queryset.update(**fields)
+	for name, value in fields.items():
+		setattr(model, name, value)
+	return model
+
+
+def _validate_in_thread(pk):
+	try:
+		model = MlModel.objects.filter(pk=pk).first()
+		if model is not None:
+			validate_model(model)
+	finally:
+		connection.close()
+
+
+def start_validation(model, background=None):
+	'''
+	Function marks the MlModel as pending and validates it,
+	in background thread after the transaction commits when settings.ML_MODEL_VALIDATION['BACKGROUND']
+	'''
+	started_at = timezone.now()
+	MlModel.objects.filter(pk=model.pk).update(status=MlModel.PENDING, validation_error='', validation_started_at=started_at)
+	model.status, model.validation_error, model.validation_started_at = MlModel.PENDING, '', started_at
+	if background is None:
+		background = get_config().get('BACKGROUND', True)
+	if background:
+		transaction.on_commit(lambda: threading.Thread(
+			target=_validate_in_thread, args=(model.pk,), name=f'model-validation-{model.pk}', daemon=True
+		).start())
+		return None
+	return validate_model(model)
+
+
+def requeue_stale_validations(timeout=None, background=None):
+	'''
+	Function restarts validations lost with their process (pending or validating longer than timeout),
+	returns restarted MlModels
+	'''
+	timeout = timeout or get_config().get('STALE_TIMEOUT', DEFAULT_STALE_TIMEOUT)
+	stale = MlModel.objects.filter(
+		Q(validation_started_at__lt=timezone.now() - timedelta(seconds=timeout)) | Q(validation_started_at__isnull=True),
+		status__in=(MlModel.PENDING, MlModel.VALIDATING),
+	)
+	restarted = []
+	for model in stale.order_by('pk'):
+		# conditional update, concurrently starting processes restart every model once
+		if stale.filter(pk=model.pk).update(validation_started_at=timezone.now()):
+			start_validation(model, background)
+			restarted.append(model)
+	return restarted
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count
+from Prediction_Pipeline.prediction_pipeline import model_registry, run_batch_prediction
+from .models import MlModel
+
+
+# synthetic course used for warm-up predictions
+WARMUP_SAMPLE = SimpleNamespace(
+	course_title='complete python web development course',
+	price=100,
+	content_duration=20,
+	num_lectures=20,
+	days=365,
+	level='All Levels',
+)
+
+
+class WarmupState:
+	'''
+	Progress and results of the models warm-up
+
+	Atributes:
+		status: disabled, warming_up or ready.
+		pid: Process which started the warm-up.
+		started_at, finished_at: perf_counter timestamps of the warm-up.
+		models: Warm-up result for every MlModel endpoint.
+	'''
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.status = 'disabled'
+		self.pid = None
+		self.started_at = None
+		self.finished_at = None
+		self.models = {}
+
+	@property
+	def warmup_time(self):
+		if self.started_at is None or self.finished_at is None:
+			return None
+		return self.finished_at - self.started_at
+
+
+warmup_state = WarmupState()
+
+
+def _reset_lock():
+	# lock may be held by the parent's warm-up thread which does not exist in the child
+	warmup_state.lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_lock)
+
+
+def get_warmup_queryset(top_n=None):
+	'''
+	Function returns MlModels to warm up, the most used first
+	'''
+	queryset = MlModel.objects.filter(status=MlModel.READY).annotate(num_requests=Count('request')).order_by('-num_requests', 'pk')
+	if top_n:
+		queryset = queryset[:top_n]
+	return queryset
+
+
+def warm_up_model(model):
+	'''
+	Function loads model to the registry and runs synthetic prediction
+	'''
+	result = {'warm': False, 'load_time': None, 'warmup_time': None, 'memory': None, 'error': None}
+	start = time.perf_counter()
+	try:
+		entry = model_registry.get_entry(model)
+		run_batch_prediction(model, [WARMUP_SAMPLE])
+	except Exception as exc:
+		result['error'] = f'{exc.__class__.__name__}: {exc}'
+	else:
+		result['warm'] = True
+		result['load_time'] = entry.load_time
+		result['memory'] = entry.size
+	result['warmup_time'] = time.perf_counter() - start
+	with warmup_state.lock:
+		warmup_state.models[model.endpoint] = result
+	return result
+
+
+def warm_up_models(top_n=None):
+	'''
+	Function warms up all (or top_n most used) MlModels,
+	validations lost with a previous process are restarted first
+	'''
+	from .validation import requeue_stale_validations
+
+	warmup_state.status = 'warming_up'
+	warmup_state.started_at = time.perf_counter()
+	warmup_state.finished_at = None
+	try:
+		requeue_stale_validations()
+		for model in get_warmup_queryset(top_n):
+			warm_up_model(model)
+	except DatabaseError:
+		# tables do not exist yet (e.g. before the first migration)
+		pass
+	warmup_state.finished_at = time.perf_counter()
+	warmup_state.status = 'ready'
+	return warmup_state
+
+
+def start_warmup():
+	'''
+	Function starts warm-up configured by settings.ML_WARMUP (called by ML_App.wsgi)
+	'''
+	config = getattr(settings, 'ML_WARMUP', {})
+	if not config.get('ENABLED', False):
+		return None
+	warmup_state.pid = os.getpid()
+	top_n = config.get('TOP_N')
+	if config.get('BACKGROUND', True):
+		warmup_state.status = 'warming_up'
+		thread = threading.Thread(target=warm_up_models, args=(top_n,), name='models-warmup', daemon=True)
+		thread.start()
+		return thread
+	return warm_up_models(top_n)
+
+
+def ensure_warmup():
+	'''
+	Function starts warm-up in a process forked after it was started (workers of
+	gunicorn --preload inherit the state but not the warm-up thread), called by ML_App.wsgi
+	for every request
+	'''
+	pid = os.getpid()
+	if warmup_state.pid in (None, pid):
+		return None
+	with warmup_state.lock:
+		if warmup_state.pid == pid:
+			return None
+		warmup_state.pid = pid
+	return start_warmup()
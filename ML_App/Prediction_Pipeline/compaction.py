@@ -0,0 +1,110 @@
+'''
+Compaction of fitted prediction pipelines.
+
+The derived pipeline drops fitted attributes which are only kept for
+inspection or refitting (e.g. TfidfVectorizer.stop_words_) and stores
+float64 arrays of fitted estimators as float32. Only estimators which accept
+float32 parameters are downcast (compiled code of e.g. libsvm requires
+float64 buffers). Compaction works on a copy, predictions of the result are
+compared with the original by the caller.
+'''
+from sklearn.base import BaseEstimator
+from sklearn.feature_extraction.text import TfidfTransformer
+from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge, SGDRegressor
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.preprocessing import MaxAbsScaler, MinMaxScaler, RobustScaler, StandardScaler
+import copy
+import numpy as np
+import scipy.sparse as sp
+
+
+# fitted attributes which are not used by transform/predict
+UNUSED_ATTRIBUTES = (
+    'stop_words_',
+    'train_score_',
+    'oob_improvement_',
+    '_residues',
+    '_rng',
+)
+
+# estimators whose fitted float arrays are only used in numpy operations
+FLOAT32_ESTIMATORS = (
+    LinearRegression,
+    Ridge,
+    Lasso,
+    ElasticNet,
+    SGDRegressor,
+    # brute force search casts the float32 training data back for distances,
+    # tree based search keeps its own float64 copy in _tree
+    KNeighborsRegressor,
+    TfidfTransformer,
+    MinMaxScaler,
+    StandardScaler,
+    MaxAbsScaler,
+    RobustScaler,
+)
+
+DEFAULT_OPTIONS = {
+    'DROP_UNUSED': True,
+    'FLOAT32': True,
+}
+
+
+def iter_estimators(obj, seen=None):
+    '''
+    Generator of all estimators nested in the object (pipeline steps, ensemble members, ...)
+    '''
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+
+    if isinstance(obj, BaseEstimator):
+        yield obj
+        values = vars(obj).values()
+    elif isinstance(obj, (list, tuple)):
+        values = obj
+    elif isinstance(obj, dict):
+        values = obj.values()
+    elif isinstance(obj, np.ndarray) and obj.dtype == object:
+        values = obj.flat
+    else:
+        return
+    for value in list(values):
+        yield from iter_estimators(value, seen)
+
+
+def _is_fitted_attribute(name):
+    return name.endswith('_') or name.startswith('_')
+
+
+def _to_float32(value):
+    if isinstance(value, np.ndarray) and value.dtype == np.float64:
+        return value.astype(np.float32)
+    if sp.issparse(value) and value.dtype == np.float64:
+        return value.astype(np.float32)
+    return None
+
+
+def compact_pipeline(model, DROP_UNUSED=True, FLOAT32=True):
+    '''
+    Function returns compacted copy of the fitted pipeline
+    '''
+    model = copy.deepcopy(model)
+    for estimator in iter_estimators(model):
+        for name, value in list(vars(estimator).items()):
+            if DROP_UNUSED and name in UNUSED_ATTRIBUTES:
+                delattr(estimator, name)
+            elif FLOAT32 and isinstance(estimator, FLOAT32_ESTIMATORS) and _is_fitted_attribute(name):
+                converted = _to_float32(value)
+                if converted is not None:
+                    setattr(estimator, name, converted)
+    return model
+
+
+def max_error(expected, predictions):
+    '''
+    Function returns the largest absolute difference of predictions
+    '''
+    return float(np.max(np.abs(np.asarray(predictions, dtype=float) - np.asarray(expected, dtype=float))))
@@ -0,0 +1,94 @@
+'''
+Scoring of CSV files shaped like Analitics/udemy_courses_cleaned.csv.
+
+The file is read with pandas in fixed-size chunks and every chunk is scored
+with one model call, so memory usage does not depend on the file size and
+the first rows can be sent to the client before the whole file is processed.
+Every chunk is validated before it is scored, a broken chunk after the first
+one ends the stream with an error marker (the response status is already sent).
+'''
+from django.conf import settings
+from .prediction_pipeline import make_columns_prediction
+from .workers import COLUMNS
+import json
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+CSV_FORMAT = 'csv'
+NDJSON_FORMAT = 'ndjson'
+OUTPUT_FORMATS = {
+    CSV_FORMAT: 'text/csv',
+    NDJSON_FORMAT: 'application/x-ndjson',
+}
+
+NUMERIC_COLUMNS = ('price', 'content_duration', 'num_lectures', 'days')
+
+
+def get_chunk_size():
+    return getattr(settings, 'ML_CSV_SCORING', {}).get('CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def validate_chunk(chunk):
+    '''
+    Function raises ValueError with the first invalid line of the DataFrame chunk
+    '''
+    missing = [column for column in COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f'missing columns: {", ".join(missing)}')
+    # index continues over chunks, line 1 is the header
+    for column in NUMERIC_COLUMNS:
+        invalid = chunk.index[pd.to_numeric(chunk[column], errors='coerce').isna()]
+        if len(invalid):
+            raise ValueError(f'line {invalid[0] + 2}: {column} is not a number')
+    levels = [level for level, _ in settings.LEVEL_CHOICES]
+    invalid = chunk.index[~chunk['level'].isin(levels)]
+    if len(invalid):
+        raise ValueError(f'line {invalid[0] + 2}: unknown level {chunk["level"][invalid[0]]!r}')
+
+
+def score_chunk(algorithm, chunk):
+    '''
+    Function adds prediction column to the validated DataFrame chunk
+    '''
+    validate_chunk(chunk)
+    chunk['course_title'] = chunk['course_title'].fillna('').astype(str)
+    columns = {column: chunk[column].tolist() for column in COLUMNS}
+    chunk['prediction'] = np.round(make_columns_prediction(algorithm, columns)).astype(int)
+    return chunk
+
+
+def format_error(message, output_format=CSV_FORMAT):
+    '''
+    Function returns the last part of a stream broken by the invalid chunk
+    '''
+    if output_format == NDJSON_FORMAT:
+        return json.dumps({'error': message}) + '\n'
+    return f'# error: {message}\n'
+
+
+def iter_scored_csv(file, algorithm, output_format=CSV_FORMAT, chunk_size=None):
+    '''
+    Generator of scored file parts (CSV with header in the first part or NDJSON lines),
+    errors of the first chunk are raised, later ones end the stream with format_error()
+    '''
+    chunks = iter(pd.read_csv(file, chunksize=chunk_size or get_chunk_size()))
+    first = True
+    while True:
+        try:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            chunk = score_chunk(algorithm, chunk)
+        except ValueError as exc:
+            if first:
+                raise
+            yield format_error(str(exc), output_format)
+            return
+        if output_format == NDJSON_FORMAT:
+            yield chunk.to_json(orient='records', lines=True) + '\n'
+        else:
+            yield chunk.to_csv(index=False, header=first)
+        first = False
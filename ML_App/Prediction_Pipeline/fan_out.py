@@ -0,0 +1,124 @@
+'''
+Scoring one input against many models with a shared preprocessing stage.
+
+Fitted preprocessing steps (everything before the final estimator) are
+fingerprinted, models whose preprocessing is identical transform the input
+only once and then run their estimators in parallel on a thread pool.
+'''
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from .prediction_pipeline import model_registry, build_input
+from .metrics import INFERENCE_LATENCY, PREDICTIONS_IN_FLIGHT
+import hashlib
+import pickle
+import threading
+import time
+import weakref
+
+
+DEFAULT_MAX_WORKERS = 4
+
+_fingerprints = weakref.WeakKeyDictionary()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    '''
+    Function returns thread pool shared by fan-out predictions
+    '''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            config = getattr(settings, 'ML_FAN_OUT', {})
+            _executor = ThreadPoolExecutor(
+                max_workers=config.get('MAX_WORKERS', DEFAULT_MAX_WORKERS),
+                thread_name_prefix='fan-out'
+            )
+        return _executor
+
+
+def split_pipeline(model):
+    '''
+    Function returns (preprocessing steps, final estimator) of the model
+    '''
+    steps = getattr(model, 'steps', None)
+    if not steps:
+        return [], model
+    preprocessing = [step for _, step in steps[:-1] if step is not None and step != 'passthrough']
+    return preprocessing, steps[-1][1]
+
+
+def preprocessing_fingerprint(model):
+    '''
+    Function returns hash of fitted preprocessing steps (computed once per loaded model)
+    '''
+    fingerprint = _fingerprints.get(model)
+    if fingerprint is None:
+        preprocessing, _ = split_pipeline(model)
+        fingerprint = hashlib.sha256(pickle.dumps(preprocessing)).hexdigest()
+        _fingerprints[model] = fingerprint
+    return fingerprint
+
+
+def preprocess(preprocessing, X):
+    for step in preprocessing:
+        X = step.transform(X)
+    return X
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def make_multi_prediction(algorithms, request):
+    '''
+    Function scores one request with every given MlModel
+
+    Returns list of dicts with algorithm, prediction, latency (whole model time
+    in seconds) and preprocessing_latency (time of the shared preprocessing stage).
+    '''
+    PREDICTIONS_IN_FLIGHT.inc(len(algorithms))
+    try:
+        results = _make_multi_prediction(algorithms, request)
+    finally:
+        PREDICTIONS_IN_FLIGHT.dec(len(algorithms))
+    for result in results:
+        INFERENCE_LATENCY.labels(result['algorithm'].endpoint, 'multi').observe(result['latency'])
+    return results
+
+
+def _make_multi_prediction(algorithms, request):
+    executor = get_executor()
+    models = [model_registry.get_model(algorithm) for algorithm in algorithms]
+
+    # one preprocessing task per distinct fitted preprocessing
+    groups = {}
+    for model in models:
+        fingerprint = preprocessing_fingerprint(model)
+        if fingerprint not in groups:
+            groups[fingerprint] = (split_pipeline(model)[0], build_input(model, [request]))
+    feature_tasks = {
+        fingerprint: executor.submit(_timed, preprocess, preprocessing, X)
+        for fingerprint, (preprocessing, X) in groups.items()
+    }
+    features = {fingerprint: task.result() for fingerprint, task in feature_tasks.items()}
+
+    predict_tasks = []
+    for model in models:
+        X, _ = features[preprocessing_fingerprint(model)]
+        predict_tasks.append(executor.submit(_timed, split_pipeline(model)[1].predict, X))
+
+    results = []
+    for algorithm, model, task in zip(algorithms, models, predict_tasks):
+        prediction, predict_latency = task.result()
+        _, preprocessing_latency = features[preprocessing_fingerprint(model)]
+        results.append({
+            'algorithm': algorithm,
+            'prediction': prediction,
+            'latency': preprocessing_latency + predict_latency,
+            'preprocessing_latency': preprocessing_latency,
+        })
+    return results
@@ -0,0 +1,124 @@
+'''
+Stage-level timing of the prediction pipeline.
+
+Code of the pipeline wraps its stages with `stage(name)`, durations are added
+to the Timings collected by the innermost active `collect()` block of the
+current thread (and merged to the outer block when the inner one ends).
+Outside of a collect() block a stage costs one thread-local lookup.
+
+Stages of the single prediction:
+    load: model registry lookup, includes open and unpickle of the file on registry miss
+    frame: building model input (ColumnFrame or DataFrame)
+    preprocessing: fitted feature pipeline, includes title_analyzer
+    title_analyzer: text preprocessing of course titles
+    estimator: final estimator of the pipeline
+    cache: prediction cache lookup, includes the stages above on cache miss
+    scheduler, workers: waiting for micro-batched or worker process result
+'''
+from collections import defaultdict
+from django.conf import settings
+import threading
+import time
+
+
+_local = threading.local()
+
+
+def timing_enabled():
+    return getattr(settings, 'ML_STAGE_TIMING', {}).get('ENABLED', True)
+
+
+class Timings(dict):
+    '''
+    Dict of stage name -> duration in seconds
+    '''
+    def add(self, name, seconds):
+        self[name] = self.get(name, 0.0) + seconds
+
+    def merge(self, other):
+        for name, seconds in other.items():
+            self.add(name, seconds)
+
+    def server_timing(self):
+        '''
+        Return value of the Server-Timing header (durations in milliseconds)
+        '''
+        return ', '.join(f'{name};dur={seconds * 1000:.3f}' for name, seconds in self.items())
+
+
+class collect:
+    '''
+    Context manager collecting stage timings of the current thread
+    '''
+    __slots__ = ('timings', 'parent')
+
+    def __enter__(self):
+        self.parent = getattr(_local, 'timings', None)
+        self.timings = _local.timings = Timings()
+        return self.timings
+
+    def __exit__(self, *exc_info):
+        _local.timings = self.parent
+        if self.parent is not None:
+            self.parent.merge(self.timings)
+
+
+class stage:
+    '''
+    Context manager measuring one pipeline stage
+    '''
+    __slots__ = ('name', 'timings', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = getattr(_local, 'timings', None)
+        if self.timings is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.start)
+
+
+class StageStats:
+    '''
+    Aggregated stage timings per MlModel endpoint
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = defaultdict(dict)
+            self._predictions = defaultdict(int)
+
+    def record(self, endpoint, timings):
+        with self._lock:
+            self._predictions[endpoint] += 1
+            model_stats = self._stats[endpoint]
+            for name, seconds in timings.items():
+                count, total, maximum = model_stats.get(name, (0, 0.0, 0.0))
+                model_stats[name] = (count + 1, total + seconds, max(maximum, seconds))
+
+    def stats(self):
+        '''
+        Return {endpoint: {predictions, stages: {stage: count, total, mean, max}}}
+        '''
+        with self._lock:
+            return {
+                endpoint: {
+                    'predictions': self._predictions[endpoint],
+                    'stages': {
+                        name: {'count': count, 'total': total, 'mean': total / count, 'max': maximum}
+                        for name, (count, total, maximum) in model_stats.items()
+                    },
+                }
+                for endpoint, model_stats in self._stats.items()
+            }
+
+
+stage_stats = StageStats()
@@ -0,0 +1,43 @@
+'''
+Prometheus metrics of the prediction pipeline.
+
+With the prometheus_multiproc_dir environment variable set (before Django starts)
+values are written to that directory and aggregated over all worker processes
+by the /metrics view.
+'''
+from prometheus_client import Counter, Gauge, Histogram
+
+
+INFERENCE_LATENCY = Histogram(
+    'ml_inference_duration_seconds',
+    'Latency of model inference per MlModel endpoint and mode (single, batch, columns or multi)',
+    ['endpoint', 'mode'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+)
+PREDICTIONS_IN_FLIGHT = Gauge(
+    'ml_predictions_in_flight',
+    'Number of predictions being computed',
+    multiprocess_mode='livesum',
+)
+MODEL_CACHE_REQUESTS = Counter(
+    'ml_model_cache_requests',
+    'Lookups of unserialized models in the model registry',
+    ['result'],
+)
+PREDICTION_CACHE_REQUESTS = Counter(
+    'ml_prediction_cache_requests',
+    'Lookups of prediction results in the prediction cache',
+    ['result'],
+)
+MICRO_BATCH_SIZE = Histogram(
+    'ml_micro_batch_size',
+    'Number of requests scored together by the micro-batching scheduler per MlModel endpoint',
+    ['endpoint'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+MICRO_BATCH_QUEUE_DELAY = Histogram(
+    'ml_micro_batch_queue_delay_seconds',
+    'Time requests wait in the micro-batching queue per MlModel endpoint',
+    ['endpoint'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1),
+)
@@ -0,0 +1,217 @@
+'''
+Per-process registry of unserialized prediction pipelines.
+
+Models are kept in memory between requests, keyed by MlModel endpoint and
+validated against the model file, so the pickle is only loaded again when the
+file changes or the entry is evicted. MlModels whose files have the same
+content hash share one loaded instance.
+'''
+from collections import OrderedDict
+from django.conf import settings
+from .metrics import MODEL_CACHE_REQUESTS
+import numpy as np
+import hashlib
+import os
+import sys
+import threading
+import time
+import types
+
+
+DEFAULT_MAX_MEMORY = 512 * 1024 * 1024
+
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+)
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    '''
+    Function returns sha256 hex digest of the file content
+    '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def estimate_size(obj, seen=None):
+    '''
+    Function returns approximate number of bytes held by an object graph
+    (numpy buffers are counted by their nbytes)
+    '''
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+    if isinstance(obj, _SHARED_TYPES):
+        # classes, functions and modules are not owned by the model
+        return 0
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += estimate_size(vars(obj), seen)
+    return size
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class _Entry:
+    '''
+    Single loaded model with the metadata of the file it was loaded from
+    '''
+    __slots__ = ('model', 'path', 'file_format', 'file_hash', 'signature', 'size', 'load_time')
+
+    def __init__(self, model, path, file_format, file_hash, signature, size, load_time):
+        self.model = model
+        self.path = path
+        self.file_format = file_format
+        self.file_hash = file_hash
+        self.signature = signature
+        self.size = size
+        self.load_time = load_time
+
+
+class ModelRegistry:
+    '''
+    LRU cache of loaded models with a memory budget
+
+    Atributes:
+        loader: Function (file path, file format) which unserializes model.
+        max_memory: Memory budget in bytes, by default taken from
+            settings.ML_MODEL_REGISTRY['MAX_MEMORY'].
+    '''
+    def __init__(self, loader, max_memory=None):
+        self.loader = loader
+        self._max_memory = max_memory
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.reset_stats()
+
+    @property
+    def max_memory(self):
+        if self._max_memory is not None:
+            return self._max_memory
+        config = getattr(settings, 'ML_MODEL_REGISTRY', {})
+        return config.get('MAX_MEMORY', DEFAULT_MAX_MEMORY)
+
+    @property
+    def memory_usage(self):
+        with self._lock:
+            return self._memory_usage()
+
+    def _memory_usage(self):
+        # shared instances are counted once
+        sizes = {id(entry.model): entry.size for entry in self._entries.values()}
+        return sum(sizes.values())
+
+    def _find_shared(self, digest, file_format):
+        for entry in self._entries.values():
+            if entry.file_hash == digest and entry.file_format == file_format:
+                return entry
+        return None
+
+    def get_model(self, algorithm):
+        '''
+        Return unserialized model for given MlModel, load it when necessary
+        '''
+        return self.get_entry(algorithm).model
+
+    def get_entry(self, algorithm):
+        '''
+        Return registry entry for given MlModel, load it when necessary
+        '''
+        key = algorithm.endpoint
+        path = algorithm.file.path
+        signature = _file_signature(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.path == path and entry.signature == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                MODEL_CACHE_REQUESTS.labels('hit').inc()
+                return entry
+            self.misses += 1
+        MODEL_CACHE_REQUESTS.labels('miss').inc()
+
+        digest = file_hash(path)
+        with self._lock:
+            shared = self._find_shared(digest, algorithm.file_format)
+        if shared is not None:
+            entry = _Entry(shared.model, path, shared.file_format, digest, signature, shared.size, 0.0)
+        else:
+            start = time.perf_counter()
+            model = self.loader(path, algorithm.file_format)
+            load_time = time.perf_counter() - start
+            entry = _Entry(model, path, algorithm.file_format, digest, signature, estimate_size(model), load_time)
+
+        with self._lock:
+            self.load_time += entry.load_time
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+        return entry
+
+    def invalidate(self, endpoint=None):
+        '''
+        Remove model from registry (all models when endpoint is not given)
+        '''
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(endpoint, None)
+
+    def _evict(self):
+        # the most recently used model always stays, even if it exceeds the budget
+        while self._memory_usage() > self.max_memory and len(self._entries) > 1:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_time = 0.0
+
+    def stats(self):
+        '''
+        Return hit/miss/load time statistics and the list of loaded models
+        '''
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'load_time': self.load_time,
+                'memory_usage': self.memory_usage,
+                'max_memory': self.max_memory,
+                'models': [
+                    {
+                        'endpoint': key,
+                        'file_hash': entry.file_hash,
+                        'size': entry.size,
+                        'load_time': entry.load_time,
+                    }
+                    for key, entry in self._entries.items()
+                ],
+            }
@@ -0,0 +1,222 @@
+'''
+Cache of prediction results with single-flight deduplication.
+
+Results are keyed on the normalized request input plus the content hash of
+the model file, so a changed model never serves stale predictions. Concurrent
+identical requests wait for one in-flight computation instead of running the
+model again.
+'''
+from collections import OrderedDict
+from concurrent.futures import Future
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from .metrics import PREDICTION_CACHE_REQUESTS
+import hashlib
+import threading
+import time
+
+
+DEFAULT_BACKEND = 'Prediction_Pipeline.prediction_cache.LocMemBackend'
+
+
+def make_key(file_hash, request):
+    '''
+    Function returns normalized cache key of the prediction request
+    '''
+    return (
+        file_hash,
+        request.course_title.strip().lower(),
+        float(request.price),
+        float(request.content_duration),
+        int(request.num_lectures),
+        request.level,
+        int(request.days),
+    )
+
+
+class LocMemBackend:
+    '''
+    In-process LRU backend with time to live
+
+    Atributes:
+        MAX_ENTRIES: Maximal number of stored predictions.
+        TIMEOUT: Time to live of the prediction in seconds (None - forever).
+    '''
+    def __init__(self, MAX_ENTRIES=10000, TIMEOUT=3600):
+        self.max_entries = MAX_ENTRIES
+        self.timeout = TIMEOUT
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, file_hash):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == file_hash]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoCacheBackend:
+    '''
+    Backend storing predictions in the Django cache framework
+
+    Every model file hash has its own generation number stored in the cache,
+    invalidation bumps the generation so old entries are never read again.
+
+    Atributes:
+        CACHE_ALIAS: Name of the cache from settings.CACHES.
+        TIMEOUT: Time to live of the prediction in seconds.
+    '''
+    prefix = 'ml-prediction'
+
+    def __init__(self, CACHE_ALIAS='default', TIMEOUT=3600):
+        self.cache = caches[CACHE_ALIAS]
+        self.timeout = TIMEOUT
+
+    def _generation_key(self, file_hash):
+        return f'{self.prefix}:generation:{file_hash}'
+
+    def _cache_key(self, key):
+        file_hash = key[0]
+        generation = self.cache.get(self._generation_key(file_hash), 0)
+        digest = hashlib.sha1(repr(key[1:]).encode()).hexdigest()
+        return f'{self.prefix}:{file_hash}:{generation}:{digest}'
+
+    def get(self, key):
+        return self.cache.get(self._cache_key(key))
+
+    def set(self, key, value):
+        self.cache.set(self._cache_key(key), value, self.timeout)
+
+    def invalidate(self, file_hash):
+        generation_key = self._generation_key(file_hash)
+        self.cache.add(generation_key, 0, None)
+        self.cache.incr(generation_key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class PredictionCache:
+    '''
+    Prediction cache facade with single-flight computation
+
+    Atributes:
+        backend: Cache backend, by default built from settings.ML_PREDICTION_CACHE.
+    '''
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def config(self):
+        return getattr(settings, 'ML_PREDICTION_CACHE', {})
+
+    @property
+    def enabled(self):
+        return self.config.get('ENABLED', False)
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            backend_class = import_string(self.config.get('BACKEND', DEFAULT_BACKEND))
+            self._backend = backend_class(**self.config.get('OPTIONS', {}))
+        return self._backend
+
+    def get_or_compute(self, key, compute):
+        '''
+        Return cached value or compute it, identical concurrent calls share one computation
+        '''
+        value = self.backend.get(key)
+        if value is not None:
+            self._count('hit')
+            return value
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            self._count('shared')
+            return future.result()
+
+        self._count('miss')
+        try:
+            value = compute()
+            self.backend.set(key, value)
+            future.set_result(value)
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+        return value
+
+    def _count(self, result):
+        # counters are shared by request threads
+        with self._lock:
+            self._stats[result] += 1
+        PREDICTION_CACHE_REQUESTS.labels(result).inc()
+
+    def invalidate(self, file_hash):
+        '''
+        Remove all predictions of the model file
+        '''
+        self.backend.invalidate(file_hash)
+
+    def reset(self):
+        '''
+        Drop backend, it is created again from settings on the next use
+        '''
+        self._backend = None
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'hit': 0, 'miss': 0, 'shared': 0}
+
+    @property
+    def hits(self):
+        return self._stats['hit']
+
+    @property
+    def misses(self):
+        return self._stats['miss']
+
+    @property
+    def shared(self):
+        return self._stats['shared']
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self._stats['hit'],
+                'misses': self._stats['miss'],
+                'shared': self._stats['shared'],
+            }
@@ -5,12 +5,24 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.preprocessing import OneHotEncoder
-from nltk.stem import PorterStemmer
-from nltk.corpus import stopwords
-import string
-import re
+from sklearn.pipeline import Pipeline, FeatureUnion
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+import io
+import joblib
+import os
 import pickle
+import weakref
+import numpy as np
 import pandas as pd
+from .model_registry import ModelRegistry, file_hash
+from .prediction_cache import PredictionCache, make_key
+from .scheduler import MicroBatchScheduler
+from .workers import COLUMNS, InferencePool
+from .instrumentation import collect, stage, stage_stats, timing_enabled
+from .metrics import INFERENCE_LATENCY, PREDICTIONS_IN_FLIGHT
+from .text_features import title_features
 
 
 class DataFrameSelector(BaseEstimator, TransformerMixin):
@@ -26,51 +38,320 @@ class DataFrameSelector(BaseEstimator, TransformerMixin):
     def transform(self, X, y=None):
         return X[self.attribute_names]
 
+
+class ColumnFrame:
+    '''
+    Minimal column container accepted by DataFrameSelector (pandas-free fast path)
+
+    Atributes:
+        columns: Dict of column name -> list of values.
+    '''
+    __slots__ = ('columns',)
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def _column(self, name):
+        values = self.columns[name]
+        if len(values) and isinstance(values[0], str):
+            return np.array(values, dtype=object)
+        return np.asarray(values)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._column(key)
+        columns = [self._column(name) for name in key]
+        if any(column.dtype == object for column in columns):
+            return np.array(columns, dtype=object).T
+        return np.column_stack(columns)
+
     
 def title_analyzer(txt):
     '''
     Function performs full text preprocessing for TfidfVectorizer
     '''
-    # text standarization (lower case)
-    txt_lower = txt.lower()
-    
-    # removing punctuation using translate method
-    punctuation_table = str.maketrans( {key: None for key in string.punctuation} ) 
-    txt_lower.translate(punctuation_table)
-    
-    # tokenization
-    token_pattern = re.compile(r'\b\w\w+\b', re.ASCII)
-    tokens = re.findall(token_pattern, txt_lower)
-    
-    # tokens standarization and cleaning
-    tokens_stemmed = [PorterStemmer().stem(token) for token in tokens]
-    tokens_without_stopwords = [token for token in tokens_stemmed if token not in stopwords.words('english')]
-    tokens_without_numbers = [token for token in tokens_without_stopwords if not token.isdigit()]
+    with stage('title_analyzer'):
+        return title_features.analyze(txt)
 
-    return tokens_without_numbers
 
+PICKLE_FORMAT = 'pickle'
+JOBLIB_MMAP_FORMAT = 'joblib_mmap'
+FILE_FORMAT_CHOICES = (
+    (PICKLE_FORMAT, 'Pickle'),
+    (JOBLIB_MMAP_FORMAT, 'Joblib (memory-mapped)'),
+)
 
-def make_prediction(request):
+
+def _pipeline_helper(module, name):
+    # pipeline helpers were pickled from the training notebook (__main__)
+    if module == '__main__' and name in ('DataFrameSelector', 'title_analyzer'):
+        return globals()[name]
+    return None
+
+
+class ModelUnpickler(pickle.Unpickler):
     '''
-    Function make prediction from serialized data
+    Unpickler which resolves pipeline helpers pickled from the training notebook (__main__)
     '''
-    print(request)
-    algorithm = request.algorithm
-    print(algorithm)
-    print(algorithm.file.path)
-    with open(algorithm.file.path, 'rb') as f:
-        model = pickle.load(f)
-    
-    # transform JSON to pandas DataFrame
-    df = pd.DataFrame(
+    def find_class(self, module, name):
+        return _pipeline_helper(module, name) or super().find_class(module, name)
+
+
+def get_mmap_mode():
+    # copy-on-write mapping shares page cache between processes like read-only one,
+    # but also works with estimators which need writable buffers (e.g. KNeighbors trees)
+    return getattr(settings, 'ML_MODEL_STORAGE', {}).get('MMAP_MODE', 'c')
+
+
+def load_model(path, file_format=PICKLE_FORMAT):
+    '''
+    Function unserializes prediction pipeline from the file
+    '''
+    if file_format == JOBLIB_MMAP_FORMAT:
+        # converted files reference imported helpers, joblib opens and maps the file itself
+        with stage('unpickle'):
+            return joblib.load(path, mmap_mode=get_mmap_mode())
+    with stage('open'):
+        f = open(path, 'rb')
+    with f, stage('unpickle'):
+        return ModelUnpickler(f).load()
+
+
+class ModelFileError(Exception):
+    '''
+    Raised when the model file can not be unserialized
+    '''
+
+
+def _load_for_conversion(load):
+    try:
+        return load()
+    except Exception as exc:
+        raise ModelFileError(f'model file can not be loaded ({exc.__class__.__name__}: {exc})') from exc
+
+
+def convert_model_file(path, source_format, target_format):
+    '''
+    Function rewrites model file to the other format (atomically)
+    '''
+    if source_format == target_format:
+        return
+    model = _load_for_conversion(lambda: load_model(path, source_format))
+    tmp_path = f'{path}.converting'
+    save_model(model, tmp_path, target_format)
+    os.replace(tmp_path, path)
+
+
+def convert_model_content(f, source_format, target_format):
+    '''
+    Function returns content of the opened model file converted to the other format
+    '''
+    f.seek(0)
+    if source_format == JOBLIB_MMAP_FORMAT:
+        model = _load_for_conversion(lambda: joblib.load(f))
+    else:
+        model = _load_for_conversion(lambda: ModelUnpickler(f).load())
+    buffer = io.BytesIO()
+    dump_model(model, buffer, target_format)
+    return buffer.getvalue()
+
+
+def dump_model(model, f, file_format=PICKLE_FORMAT):
+    '''
+    Function serializes prediction pipeline to the opened file in given format
+    '''
+    if file_format == JOBLIB_MMAP_FORMAT:
+        joblib.dump(model, f)
+    else:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def save_model(model, path, file_format=PICKLE_FORMAT):
+    '''
+    Function serializes prediction pipeline to the file in given format
+    '''
+    with open(path, 'wb') as f:
+        dump_model(model, f, file_format)
+
+
+model_registry = ModelRegistry(loader=load_model)
+prediction_cache = PredictionCache()
+inference_pool = InferencePool()
+
+
+@receiver(setting_changed)
+def reset_prediction_cache(setting, **kwargs):
+    if setting == 'ML_PREDICTION_CACHE':
+        prediction_cache.reset()
+
+
+_column_frame_support = weakref.WeakKeyDictionary()
+
+
+def _reads_columns_only(estimator):
+    # True when every path from the input starts with DataFrameSelector
+    if isinstance(estimator, DataFrameSelector):
+        return True
+    if isinstance(estimator, Pipeline):
+        steps = [step for _, step in estimator.steps if step is not None and step != 'passthrough']
+        return bool(steps) and _reads_columns_only(steps[0])
+    if isinstance(estimator, FeatureUnion):
+        transformers = [t for _, t in estimator.transformer_list if t is not None and t != 'drop']
+        return bool(transformers) and all(_reads_columns_only(t) for t in transformers)
+    return False
+
+
+def supports_column_frame(model):
+    '''
+    Function checks if the fitted pipeline can be fed with ColumnFrame instead of DataFrame
+    '''
+    supported = _column_frame_support.get(model)
+    if supported is None:
+        supported = _column_frame_support[model] = _reads_columns_only(model)
+    return supported
+
+
+def requests_to_columns(requests):
+    '''
+    Function transforms prediction requests to ColumnFrame
+    '''
+    return ColumnFrame(
+        {
+          'course_title': [request.course_title for request in requests],
+          'price' : [request.price for request in requests],
+          'content_duration': [request.content_duration for request in requests],
+          'num_lectures' : [request.num_lectures for request in requests],
+          'days' : [request.days for request in requests],
+          'level' : [request.level for request in requests]
+        }
+    )
+
+
+def build_input(model, requests):
+    '''
+    Function returns model input for requests, DataFrame is built only when the pipeline needs it
+    '''
+    if supports_column_frame(model):
+        return requests_to_columns(requests)
+    return requests_to_frame(requests)
+
+
+def requests_to_frame(requests):
+    '''
+    Function transforms prediction requests to pandas DataFrame
+    '''
+    return pd.DataFrame(
         { 
-          'course_title': [request.course_title],
-          'price' : [request.price], 
-          'content_duration': [request.content_duration], 
-          'num_lectures' : [request.num_lectures],
-          'days' : [request.days],
-          'level' : [request.level]
+          'course_title': [request.course_title for request in requests],
+          'price' : [request.price for request in requests], 
+          'content_duration': [request.content_duration for request in requests], 
+          'num_lectures' : [request.num_lectures for request in requests],
+          'days' : [request.days for request in requests],
+          'level' : [request.level for request in requests]
         }
     )
-    prediction = model.predict(df)
-    return prediction
\ No newline at end of file
+
+
+def make_prediction(request):
+    '''
+    Function make prediction from serialized data
+    '''
+    endpoint = request.algorithm.endpoint
+    with PREDICTIONS_IN_FLIGHT.track_inprogress(), INFERENCE_LATENCY.labels(endpoint, 'single').time():
+        if not timing_enabled():
+            return _make_prediction(request)
+
+        with collect() as timings:
+            prediction = _make_prediction(request)
+    stage_stats.record(endpoint, timings)
+    return prediction
+
+
+def _make_prediction(request):
+    if not prediction_cache.enabled:
+        return compute_prediction(request)
+
+    # the key uses the stored content hash, a cache hit never loads the model into this process
+    with stage('load'):
+        algorithm_hash = request.algorithm.file_hash or file_hash(request.algorithm.file.path)
+    with stage('cache'):
+        prediction = prediction_cache.get_or_compute(
+            make_key(algorithm_hash, request),
+            lambda: compute_prediction(request).tolist()
+        )
+    return np.array(prediction)
+
+
+def compute_prediction(request):
+    '''
+    Function runs the model for single request (without prediction cache)
+    '''
+    if micro_batch_scheduler.enabled:
+        with stage('scheduler'):
+            return micro_batch_scheduler.predict(request)
+    if inference_pool.enabled:
+        with stage('workers'):
+            return inference_pool.predict(request.algorithm, [request])
+
+    with stage('load'):
+        model = model_registry.get_model(request.algorithm)
+    return predict_staged(model, [request])
+
+
+def predict_staged(model, requests):
+    '''
+    Function runs the pipeline step by step, every step is measured as separate stage
+    '''
+    with stage('frame'):
+        X = build_input(model, requests)
+    steps = getattr(model, 'steps', None)
+    if not steps:
+        with stage('estimator'):
+            return model.predict(X)
+    with stage('preprocessing'):
+        for _, step in steps[:-1]:
+            if step is not None and step != 'passthrough':
+                X = step.transform(X)
+    with stage('estimator'):
+        return steps[-1][1].predict(X)
+
+
+def make_batch_prediction(algorithm, requests):
+    '''
+    Function make predictions for many requests with one call of the model
+    '''
+    with PREDICTIONS_IN_FLIGHT.track_inprogress(), INFERENCE_LATENCY.labels(algorithm.endpoint, 'batch').time():
+        return run_batch_prediction(algorithm, requests)
+
+
+def run_batch_prediction(algorithm, requests):
+    '''
+    Function runs the model for many requests without metrics
+    (used by the micro-batch scheduler, its single predictions are measured by make_prediction,
+    and by benchmarks and warm-up which would skew the latency histograms)
+    '''
+    if inference_pool.enabled:
+        return inference_pool.predict(algorithm, requests)
+
+    model = model_registry.get_model(algorithm)
+    return model.predict(build_input(model, requests))
+
+
+def make_columns_prediction(algorithm, columns):
+    '''
+    Function make predictions for input given as dict of columns (one list of values per feature)
+    '''
+    with PREDICTIONS_IN_FLIGHT.track_inprogress(), INFERENCE_LATENCY.labels(algorithm.endpoint, 'columns').time():
+        if inference_pool.enabled:
+            return inference_pool.predict_rows(algorithm, zip(*(columns[name] for name in COLUMNS)))
+
+        model = model_registry.get_model(algorithm)
+        if supports_column_frame(model):
+            return model.predict(ColumnFrame(columns))
+        return model.predict(pd.DataFrame(columns))
+
+
+micro_batch_scheduler = MicroBatchScheduler(predict_batch=run_batch_prediction)
@@ -0,0 +1,157 @@
+'''
+Micro-batching scheduler for concurrent single predictions.
+
+Requests for the same MlModel which arrive within a short window are scored
+with one vectorized model call, every caller receives only its own result.
+'''
+from concurrent.futures import Future
+from django.conf import settings
+import queue
+import threading
+import time
+from .metrics import MICRO_BATCH_SIZE, MICRO_BATCH_QUEUE_DELAY
+
+
+DEFAULT_WINDOW = 0.005
+DEFAULT_MAX_BATCH_SIZE = 32
+
+
+class _Job:
+    __slots__ = ('request', 'future', 'enqueued_at')
+
+    def __init__(self, request):
+        self.request = request
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatchScheduler:
+    '''
+    Collects prediction requests per model and runs them in batches
+
+    Atributes:
+        predict_batch: Function (algorithm, requests) -> predictions.
+        window: Maximal time in seconds the first request of a batch waits
+            for others, by default settings.ML_MICRO_BATCHING['WINDOW'].
+        max_batch_size: Batch is run as soon as it reaches this size,
+            by default settings.ML_MICRO_BATCHING['MAX_BATCH_SIZE'].
+    '''
+    def __init__(self, predict_batch, window=None, max_batch_size=None):
+        self.predict_batch = predict_batch
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def config(self):
+        return getattr(settings, 'ML_MICRO_BATCHING', {})
+
+    @property
+    def enabled(self):
+        return self.config.get('ENABLED', False)
+
+    @property
+    def window(self):
+        if self._window is not None:
+            return self._window
+        return self.config.get('WINDOW', DEFAULT_WINDOW)
+
+    @property
+    def max_batch_size(self):
+        if self._max_batch_size is not None:
+            return self._max_batch_size
+        return self.config.get('MAX_BATCH_SIZE', DEFAULT_MAX_BATCH_SIZE)
+
+    def submit(self, request):
+        '''
+        Queue request and return Future with its prediction
+        '''
+        job = _Job(request)
+        self._get_queue(request.algorithm.endpoint).put(job)
+        return job.future
+
+    def predict(self, request, timeout=None):
+        '''
+        Queue request and wait for its prediction
+        '''
+        return self.submit(request).result(timeout)
+
+    def _get_queue(self, key):
+        with self._lock:
+            jobs = self._queues.get(key)
+            if jobs is None:
+                jobs = self._queues[key] = queue.Queue()
+                worker = threading.Thread(
+                    target=self._worker, args=(jobs,),
+                    name=f'micro-batch-{key}', daemon=True
+                )
+                worker.start()
+            return jobs
+
+    def _worker(self, jobs):
+        while True:
+            batch = [jobs.get()]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(jobs.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        started_at = time.perf_counter()
+        try:
+            predictions = self.predict_batch(
+                batch[0].request.algorithm, [job.request for job in batch]
+            )
+        except Exception as exc:
+            self._record(batch, started_at)
+            for job in batch:
+                job.future.set_exception(exc)
+        else:
+            # statistics are recorded before callers are woken up
+            self._record(batch, started_at)
+            for i, job in enumerate(batch):
+                job.future.set_result(predictions[i:i + 1])
+
+    def _record(self, batch, started_at):
+        delays = [started_at - job.enqueued_at for job in batch]
+        endpoint = batch[0].request.algorithm.endpoint
+        MICRO_BATCH_SIZE.labels(endpoint).observe(len(batch))
+        for delay in delays:
+            MICRO_BATCH_QUEUE_DELAY.labels(endpoint).observe(delay)
+        with self._stats_lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.max_batch_size_seen = max(self.max_batch_size_seen, len(batch))
+            self.queue_delay += sum(delays)
+            self.max_queue_delay = max(self.max_queue_delay, max(delays))
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.batches = 0
+            self.requests = 0
+            self.max_batch_size_seen = 0
+            self.queue_delay = 0.0
+            self.max_queue_delay = 0.0
+
+    def stats(self):
+        '''
+        Return batch size and queueing delay statistics
+        '''
+        with self._stats_lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0,
+                'max_batch_size': self.max_batch_size_seen,
+                'mean_queue_delay': self.queue_delay / self.requests if self.requests else 0,
+                'max_queue_delay': self.max_queue_delay,
+            }
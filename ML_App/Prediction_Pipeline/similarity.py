@@ -0,0 +1,184 @@
+'''
+Lookup of the most similar courses from the Udemy dataset.
+
+Course titles are vectorized once with the title analyzer used by the
+prediction pipelines (TF-IDF, L2 normalized rows) and the matrix is stored
+transposed as CSR arrays (one row of document weights per term) in .npy
+files. The arrays are memory-mapped, a query slices only the rows of its own
+terms and scores all courses with one sparse dot product.
+'''
+from collections import Counter
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from sklearn.feature_extraction.text import TfidfVectorizer
+from .text_features import title_features
+import json
+import os
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+DEFAULT_TOP_K = 10
+
+COURSE_COLUMNS = ('course_id', 'course_title', 'url', 'price', 'num_subscribers', 'level', 'subject')
+
+# .npy arrays of the transposed TF-IDF matrix and of the idf weights
+ARRAYS = ('data', 'indices', 'indptr', 'idf')
+VOCABULARY_FILE = 'vocabulary.json'
+COURSES_FILE = 'courses.json'
+
+
+class IndexNotFound(Exception):
+    '''
+    Raised when the similarity index was not built yet
+    '''
+
+
+def _save(index_dir, name, write):
+    # files are replaced atomically, readers never see partially written one,
+    # temporary files are unique so concurrent builds do not write into the same file
+    with tempfile.NamedTemporaryFile(dir=index_dir, prefix=f'{name}.', suffix='.tmp', delete=False) as f:
+        write(f)
+    os.replace(f.name, os.path.join(index_dir, name))
+
+
+def build_index(source, index_dir):
+    '''
+    Function builds TF-IDF index of course titles from the CSV file, returns number of courses
+    '''
+    df = pd.read_csv(source, usecols=COURSE_COLUMNS)
+    df['course_title'] = df['course_title'].fillna('').astype(str)
+
+    vectorizer = TfidfVectorizer(analyzer=title_features.analyze, lowercase=False, dtype=np.float32)
+    postings = vectorizer.fit_transform(df['course_title']).T.tocsr()
+    postings.sort_indices()
+
+    os.makedirs(index_dir, exist_ok=True)
+    arrays = {
+        'data': postings.data.astype(np.float32),
+        'indices': postings.indices.astype(np.int32),
+        'indptr': postings.indptr.astype(np.int32),
+        'idf': vectorizer.idf_.astype(np.float32),
+    }
+    for name, array in arrays.items():
+        _save(index_dir, f'{name}.npy', lambda f, array=array: np.save(f, array))
+
+    vocabulary = {term: int(column) for term, column in vectorizer.vocabulary_.items()}
+    courses = json.loads(df.to_json(orient='records'))
+    _save(index_dir, VOCABULARY_FILE, lambda f: f.write(json.dumps(vocabulary).encode()))
+    # courses are written last, their presence marks complete index
+    _save(index_dir, COURSES_FILE, lambda f: f.write(json.dumps(courses).encode()))
+    return len(courses)
+
+
+def index_exists(index_dir):
+    return os.path.isfile(os.path.join(index_dir, COURSES_FILE))
+
+
+class SimilarityIndex:
+    '''
+    Memory-mapped TF-IDF index of course titles
+
+    Atributes:
+        postings: CSR matrix (terms x courses) of L2 normalized TF-IDF weights.
+        idf: Inverse document frequency of every term.
+        vocabulary: Term to row of postings mapping.
+        courses: Course details in the order of postings columns.
+    '''
+    def __init__(self, postings, idf, vocabulary, courses):
+        self.postings = postings
+        self.idf = idf
+        self.vocabulary = vocabulary
+        self.courses = courses
+
+    @classmethod
+    def load(cls, index_dir, mmap_mode='r'):
+        if not index_exists(index_dir):
+            raise IndexNotFound(f'similarity index does not exist in {index_dir}')
+        arrays = {name: np.load(os.path.join(index_dir, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAYS}
+        with open(os.path.join(index_dir, VOCABULARY_FILE)) as f:
+            vocabulary = json.load(f)
+        with open(os.path.join(index_dir, COURSES_FILE)) as f:
+            courses = json.load(f)
+        postings = sp.csr_matrix(
+            (arrays['data'], arrays['indices'], arrays['indptr']),
+            shape=(len(arrays['idf']), len(courses)),
+            copy=False,
+        )
+        return cls(postings, arrays['idf'], vocabulary, courses)
+
+    def vectorize(self, title):
+        '''
+        Return (terms, weights) of the L2 normalized TF-IDF vector of the title
+        '''
+        counts = Counter(self.vocabulary[token] for token in title_features.analyze(title) if token in self.vocabulary)
+        terms = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * self.idf[terms]
+        norm = np.linalg.norm(weights)
+        return terms, (weights / norm if norm else weights)
+
+    def search(self, title, k=DEFAULT_TOP_K):
+        '''
+        Return list of (course, cosine similarity) of k most similar courses, the most similar first
+        '''
+        terms, weights = self.vectorize(title)
+        if not len(terms):
+            return []
+        scores = self.postings[terms].T.dot(weights)
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        # ties are ordered by dataset position so results are stable
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(self.courses[i], float(scores[i])) for i in candidates]
+
+
+class SimilarCourses:
+    '''
+    Similarity index loaded once per process, configured by settings.ML_SIMILAR_COURSES
+    '''
+    def __init__(self):
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def config(self):
+        return getattr(settings, 'ML_SIMILAR_COURSES', {})
+
+    def get_index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    index_dir = self.config['INDEX_DIR']
+                    if not index_exists(index_dir) and self.config.get('AUTO_BUILD', False):
+                        build_index(self.config['SOURCE'], index_dir)
+                    self._index = SimilarityIndex.load(index_dir)
+        return self._index
+
+    def preload(self):
+        '''
+        Memory-map existing index (index is never built at startup)
+        '''
+        if self.config.get('PRELOAD', False) and index_exists(self.config.get('INDEX_DIR', '')):
+            self.get_index()
+
+    def search(self, title, k=None):
+        return self.get_index().search(title, k or self.config.get('TOP_K', DEFAULT_TOP_K))
+
+    def reset(self):
+        with self._lock:
+            self._index = None
+
+
+similar_courses = SimilarCourses()
+
+
+@receiver(setting_changed)
+def reset_similar_courses(setting, **kwargs):
+    if setting == 'ML_SIMILAR_COURSES':
+        similar_courses.reset()
@@ -0,0 +1,242 @@
+from django.test import SimpleTestCase
+
+from prometheus_client import REGISTRY
+
+from types import SimpleNamespace
+
+from benchmarks.bench_title_analyzer import legacy_title_analyzer
+
+from .prediction_cache import PredictionCache, LocMemBackend, DjangoCacheBackend, make_key
+from .prediction_pipeline import load_model, requests_to_frame, requests_to_columns, supports_column_frame
+from .scheduler import MicroBatchScheduler
+from .text_features import TitleAnalyzer
+from .workers import InferencePool
+
+from concurrent.futures.process import BrokenProcessPool
+
+import glob
+import numpy as np
+import os
+import threading
+import time
+
+
+def fake_request(value, endpoint='model_V1'):
+	return SimpleNamespace(value=value, algorithm=SimpleNamespace(endpoint=endpoint))
+
+
+class ColumnFrameTestCase(SimpleTestCase):
+
+	def setUp(self):
+		self.requests = [
+			SimpleNamespace(course_title="Django Web Course", price=100, content_duration=40,
+							num_lectures=40, days=365, level="All Levels"),
+			SimpleNamespace(course_title="Learn Trading 101", price=0, content_duration=1.5,
+							num_lectures=10, days=30, level="Beginner Level"),
+		]
+
+	def test_identical_predictions(self):
+		for path in sorted(filter(os.path.isfile, glob.glob("./MlModels/algorithms/*"))):
+			model = load_model(path)
+
+			self.assertTrue(supports_column_frame(model))
+			for requests in (self.requests[:1], self.requests):
+				np.testing.assert_array_equal(
+					model.predict(requests_to_columns(requests)),
+					model.predict(requests_to_frame(requests))
+				)
+
+
+class TitleAnalyzerTestCase(SimpleTestCase):
+
+	titles = [
+		"Learn Python 3.8: The Complete Bootcamp!",
+		"Django & REST APIs - from Beginner to Expert (2020)",
+		"the and of in 100 200",
+		"",
+		"Running, runners and RUNS; C++ / C# in 24 hours",
+		"Learn Python 3.8: The Complete Bootcamp!",
+	]
+
+	def test_analyze(self):
+		analyzer = TitleAnalyzer()
+
+		for title in self.titles:
+			self.assertEqual(analyzer.analyze(title), legacy_title_analyzer(title))
+
+	def test_analyze_many(self):
+		analyzer = TitleAnalyzer()
+
+		self.assertEqual(analyzer.analyze_many(self.titles), [legacy_title_analyzer(title) for title in self.titles])
+
+
+class MicroBatchSchedulerTestCase(SimpleTestCase):
+
+	def setUp(self):
+		self.calls = []
+
+	def predict_batch(self, algorithm, requests):
+		self.calls.append((algorithm.endpoint, len(requests)))
+		return np.array([request.value * 10 for request in requests])
+
+	def test_single_batch(self):
+		scheduler = MicroBatchScheduler(self.predict_batch, window=0.2, max_batch_size=10)
+
+		futures = [scheduler.submit(fake_request(value)) for value in range(5)]
+		results = [future.result(timeout=5) for future in futures]
+
+		self.assertEqual([result.tolist() for result in results], [[0], [10], [20], [30], [40]])
+		self.assertEqual(self.calls, [('model_V1', 5)])
+		self.assertEqual(scheduler.stats()['max_batch_size'], 5)
+
+	def test_max_batch_size(self):
+		scheduler = MicroBatchScheduler(self.predict_batch, window=0.2, max_batch_size=2)
+
+		futures = [scheduler.submit(fake_request(value)) for value in range(4)]
+		[future.result(timeout=5) for future in futures]
+		stats = scheduler.stats()
+
+		self.assertEqual(stats['batches'], 2)
+		self.assertEqual(stats['mean_batch_size'], 2)
+
+	def test_batches_per_model(self):
+		scheduler = MicroBatchScheduler(self.predict_batch, window=0.2, max_batch_size=10)
+
+		futures = [scheduler.submit(fake_request(1, 'model_V1')), scheduler.submit(fake_request(2, 'model_V2'))]
+		[future.result(timeout=5) for future in futures]
+
+		self.assertEqual(sorted(self.calls), [('model_V1', 1), ('model_V2', 1)])
+
+	def test_metrics(self):
+		scheduler = MicroBatchScheduler(self.predict_batch, window=0.2, max_batch_size=3)
+		labels = {'endpoint': 'metrics_V1'}
+		batches = REGISTRY.get_sample_value('ml_micro_batch_size_count', labels) or 0
+		requests = REGISTRY.get_sample_value('ml_micro_batch_size_sum', labels) or 0
+		delays = REGISTRY.get_sample_value('ml_micro_batch_queue_delay_seconds_count', labels) or 0
+
+		futures = [scheduler.submit(fake_request(value, 'metrics_V1')) for value in range(3)]
+		[future.result(timeout=5) for future in futures]
+
+		self.assertEqual(REGISTRY.get_sample_value('ml_micro_batch_size_count', labels), batches + 1)
+		self.assertEqual(REGISTRY.get_sample_value('ml_micro_batch_size_sum', labels), requests + 3)
+		self.assertEqual(REGISTRY.get_sample_value('ml_micro_batch_queue_delay_seconds_count', labels), delays + 3)
+
+	def test_exception(self):
+		def predict_batch(algorithm, requests):
+			raise ValueError('broken model')
+
+		scheduler = MicroBatchScheduler(predict_batch, window=0, max_batch_size=10)
+
+		with self.assertRaises(ValueError):
+			scheduler.predict(fake_request(1), timeout=5)
+
+
+class PredictionCacheTestCase(SimpleTestCase):
+
+	def setUp(self):
+		self.request = SimpleNamespace(course_title=" Django Web Course", price=100, content_duration=40,
+									   num_lectures=40, level="All Levels", days=365)
+		self.key = make_key("hash", self.request)
+
+	def test_normalized_key(self):
+		other_request = SimpleNamespace(**dict(vars(self.request), course_title="django web course", price=100.0))
+
+		self.assertEqual(make_key("hash", other_request), self.key)
+		self.assertNotEqual(make_key("other_hash", other_request), self.key)
+
+	def test_hit(self):
+		cache = PredictionCache(LocMemBackend())
+
+		first = cache.get_or_compute(self.key, lambda: [1.0])
+		second = cache.get_or_compute(self.key, lambda: [2.0])
+
+		self.assertEqual(first, second)
+		self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'shared': 0})
+
+	def test_single_flight(self):
+		cache = PredictionCache(LocMemBackend())
+		started, release = threading.Event(), threading.Event()
+		calls = []
+
+		def compute():
+			calls.append(1)
+			started.set()
+			release.wait(5)
+			return [1.0]
+
+		results = []
+		leader = threading.Thread(target=lambda: results.append(cache.get_or_compute(self.key, compute)))
+		leader.start()
+		started.wait(5)
+		followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute(self.key, compute)))
+					 for _ in range(3)]
+		[follower.start() for follower in followers]
+		time.sleep(0.05)
+		release.set()
+		[thread.join(5) for thread in [leader] + followers]
+
+		self.assertEqual(len(calls), 1)
+		self.assertEqual(results, [[1.0]] * 4)
+
+	def test_lru_and_ttl(self):
+		backend = LocMemBackend(MAX_ENTRIES=1, TIMEOUT=None)
+		backend.set(("hash", 1), [1.0])
+		backend.set(("hash", 2), [2.0])
+
+		self.assertIsNone(backend.get(("hash", 1)))
+		self.assertEqual(backend.get(("hash", 2)), [2.0])
+
+		backend = LocMemBackend(TIMEOUT=-1)
+		backend.set(("hash", 1), [1.0])
+
+		self.assertIsNone(backend.get(("hash", 1)))
+
+	def test_invalidate(self):
+		for backend in (LocMemBackend(), DjangoCacheBackend()):
+			cache = PredictionCache(backend)
+			cache.get_or_compute(self.key, lambda: [1.0])
+			cache.get_or_compute(make_key("other_hash", self.request), lambda: [2.0])
+
+			cache.invalidate("hash")
+
+			self.assertIsNone(backend.get(self.key))
+			self.assertEqual(backend.get(make_key("other_hash", self.request)), [2.0])
+			backend.clear()
+
+
+class InferencePoolTestCase(SimpleTestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.pool = InferencePool(processes=1, timeout=60, preload=False)
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.pool.shutdown()
+		super().tearDownClass()
+
+	def setUp(self):
+		self.model_path = os.path.abspath("./MlModels/algorithms/GradientBoostingRegressor_V1_2020-06-19")
+		self.algorithm = SimpleNamespace(file=SimpleNamespace(path=self.model_path), file_format='pickle')
+		self.requests = [
+			SimpleNamespace(course_title="django web course", price=100, content_duration=40,
+							num_lectures=40, days=days, level="All Levels")
+			for days in (30, 365)
+		]
+
+	def test_predict(self):
+		expected = load_model(self.model_path).predict(requests_to_frame(self.requests))
+
+		predictions = self.pool.predict(self.algorithm, self.requests)
+
+		np.testing.assert_allclose(predictions, expected)
+
+	def test_restart_on_crash(self):
+		restarts = self.pool.restarts
+
+		with self.assertRaises(BrokenProcessPool):
+			self.pool.call(os._exit, 1)
+
+		self.assertEqual(self.pool.restarts, restarts + 2)
+		self.assertEqual(len(self.pool.predict(self.algorithm, self.requests)), 2)
\ No newline at end of file
@@ -0,0 +1,73 @@
+'''
+Text featurization engine used by title_analyzer.
+
+All expensive objects (stopword set, stemmer, token pattern) are created once
+per process and stems are memoized, so analyzing a title costs one regex scan
+plus a dictionary lookup per token.
+'''
+from functools import lru_cache
+from nltk.stem import PorterStemmer
+from nltk.corpus import stopwords
+import re
+import threading
+
+
+STEM_CACHE_SIZE = 50000
+
+
+class TitleAnalyzer:
+    '''
+    Tokenizer, stemmer and stopword filter for course titles
+
+    Produces exactly the same tokens as the analyzer the TfidfVectorizers were
+    fitted with: lower case words of two or more characters, Porter stemmed,
+    without english stopwords and numbers.
+    '''
+    token_pattern = re.compile(r'\b\w\w+\b', re.ASCII)
+
+    def __init__(self, stem_cache_size=STEM_CACHE_SIZE):
+        self._stemmer = PorterStemmer()
+        self._stopwords = None
+        self._lock = threading.Lock()
+        self.stem = lru_cache(maxsize=stem_cache_size)(self._stemmer.stem)
+
+    @property
+    def stopwords(self):
+        # corpus is loaded lazily, NLTK data is not needed until the first title
+        if self._stopwords is None:
+            with self._lock:
+                if self._stopwords is None:
+                    self._stopwords = frozenset(stopwords.words('english'))
+        return self._stopwords
+
+    def analyze(self, txt):
+        '''
+        Return list of tokens for a single title
+        '''
+        stop = self.stopwords
+        stem = self.stem
+        tokens = []
+        for token in self.token_pattern.findall(txt.lower()):
+            token = stem(token)
+            if token not in stop and not token.isdigit():
+                tokens.append(token)
+        return tokens
+
+    def analyze_many(self, titles):
+        '''
+        Return list of tokens for every title, repeated titles are analyzed once
+        '''
+        analyzed = {}
+        results = []
+        for txt in titles:
+            tokens = analyzed.get(txt)
+            if tokens is None:
+                tokens = analyzed[txt] = self.analyze(txt)
+            results.append(list(tokens))
+        return results
+
+    def cache_info(self):
+        return self.stem.cache_info()
+
+
+title_features = TitleAnalyzer()
@@ -0,0 +1,225 @@
+'''
+Pool of long-lived worker processes for model inference.
+
+Web workers send compact rows (tuples in COLUMNS order) together with the
+model file path, format and signature, worker processes keep their own loaded models
+so CPU heavy estimators scale across cores outside of the web worker's GIL.
+'''
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import numpy as np
+import pandas as pd
+
+
+COLUMNS = ('course_title', 'price', 'content_duration', 'num_lectures', 'days', 'level')
+
+DEFAULT_PROCESSES = 2
+DEFAULT_TIMEOUT = 30
+DEFAULT_START_METHOD = 'spawn'
+
+# models loaded in the worker process: path -> (signature, model)
+_worker_models = {}
+
+
+class InferenceTimeout(Exception):
+    '''
+    Raised when worker process does not return prediction in time
+    '''
+
+
+def file_signature(path):
+    '''
+    Function returns cheap signature of the file (mtime, size)
+    '''
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _get_worker_model(path, file_format, signature):
+    from .prediction_pipeline import load_model
+
+    cached = _worker_models.get(path)
+    if cached is None or cached[0] != signature:
+        cached = _worker_models[path] = (signature, load_model(path, file_format))
+    return cached[1]
+
+
+def init_worker(files):
+    '''
+    Function preloads model files, initializer of worker processes (files - (path, format) pairs)
+    '''
+    for path, file_format in files:
+        try:
+            _get_worker_model(path, file_format, file_signature(path))
+        except Exception:
+            # broken artifact should not prevent the worker from starting
+            pass
+
+
+def _rows_to_input(model, rows):
+    from .prediction_pipeline import ColumnFrame, supports_column_frame
+
+    if supports_column_frame(model):
+        return ColumnFrame(dict(zip(COLUMNS, (list(column) for column in zip(*rows)))))
+    return pd.DataFrame.from_records(rows, columns=COLUMNS)
+
+
+def predict_in_worker(path, file_format, signature, rows):
+    '''
+    Function returns predictions for rows in COLUMNS order, the model loaded in this process
+    is reused while the file signature does not change
+    '''
+    model = _get_worker_model(path, file_format, signature)
+    return model.predict(_rows_to_input(model, rows)).tolist()
+
+
+def get_peak_rss():
+    '''
+    Function returns peak resident memory of the process in bytes
+    '''
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def measure_peak_rss(path, file_format, rows, batch_sizes):
+    '''
+    Function loads the model, scores batches of rows and returns peak RSS of the process
+    after every batch size (meant to run in a fresh process which holds no other model)
+    '''
+    from .prediction_pipeline import load_model
+
+    model = load_model(path, file_format)
+    peaks = []
+    for batch_size in batch_sizes:
+        model.predict(_rows_to_input(model, rows[:batch_size]))
+        peaks.append(get_peak_rss())
+    return peaks
+
+
+def to_rows(requests):
+    '''
+    Function transforms requests to tuples in COLUMNS order
+    '''
+    return tuple(tuple(getattr(request, column) for column in COLUMNS) for request in requests)
+
+
+class InferencePool:
+    '''
+    Process pool with preloaded models, timeouts and restart after crash
+
+    Atributes:
+        processes: Number of worker processes.
+        timeout: Maximal time of one prediction call in seconds.
+        preload: Load all registered models when workers start.
+        All attributes default to settings.ML_INFERENCE_WORKERS.
+    '''
+    def __init__(self, processes=None, timeout=None, preload=None):
+        self._processes = processes
+        self._timeout = timeout
+        self._preload = preload
+        self._executor = None
+        self._lock = threading.Lock()
+        self.restarts = 0
+
+    @property
+    def config(self):
+        return getattr(settings, 'ML_INFERENCE_WORKERS', {})
+
+    @property
+    def enabled(self):
+        return self.config.get('ENABLED', False)
+
+    @property
+    def processes(self):
+        return self._processes or self.config.get('PROCESSES', DEFAULT_PROCESSES)
+
+    @property
+    def timeout(self):
+        return self._timeout or self.config.get('TIMEOUT', DEFAULT_TIMEOUT)
+
+    @property
+    def preload(self):
+        if self._preload is not None:
+            return self._preload
+        return self.config.get('PRELOAD', True)
+
+    def get_preload_files(self):
+        from MlModels.models import MlModel
+
+        files = []
+        for model in MlModel.objects.all():
+            if model.file and os.path.isfile(model.file.path):
+                files.append((model.file.path, model.file_format))
+        return files
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                files = self.get_preload_files() if self.preload else []
+                context = multiprocessing.get_context(self.config.get('START_METHOD', DEFAULT_START_METHOD))
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=context,
+                    initializer=init_worker,
+                    initargs=(files,),
+                )
+            return self._executor
+
+    def restart(self, executor=None):
+        '''
+        Terminate worker processes, new ones are started on the next call
+        '''
+        with self._lock:
+            if executor is not None and executor is not self._executor:
+                return
+            executor, self._executor = self._executor, None
+            self.restarts += 1
+        if executor is not None:
+            for process in list((getattr(executor, '_processes', None) or {}).values()):
+                process.terminate()
+            executor.shutdown(wait=False)
+
+    def call(self, func, *args):
+        '''
+        Run function in the worker process, restart the pool and retry once after crash
+        '''
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return executor.submit(func, *args).result(timeout=self.timeout)
+            except TimeoutError:
+                self.restart(executor)
+                raise InferenceTimeout(f'prediction did not finish in {self.timeout}s')
+            except BrokenProcessPool:
+                self.restart(executor)
+                if attempt:
+                    raise
+
+    def predict(self, algorithm, requests):
+        '''
+        Return predictions of the MlModel for given requests
+        '''
+        return self.predict_rows(algorithm, to_rows(requests))
+
+    def predict_rows(self, algorithm, rows):
+        '''
+        Return predictions of the MlModel for rows in COLUMNS order
+        '''
+        path = algorithm.file.path
+        predictions = self.call(
+            predict_in_worker, path, algorithm.file_format, file_signature(path), tuple(rows)
+        )
+        return np.array(predictions)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
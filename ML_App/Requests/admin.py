@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Request
+from .models import Request, PredictionJob
 
 # Register your models here.
-admin.site.register(Request)
\ No newline at end of file
+admin.site.register(Request)
+admin.site.register(PredictionJob)
\ No newline at end of file
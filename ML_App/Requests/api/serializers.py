@@ -3,11 +3,23 @@ from rest_framework.serializers import(
 	ValidationError, 
 	ModelSerializer,
 	SerializerMethodField,
+	PrimaryKeyRelatedField,
+	ListField,
+	IntegerField,
+	FloatField,
+	ChoiceField,
+	Field,
+	FileField,
+	CharField,
+	Serializer,
 )
 from Requests.models import Request
+from MlModels.models import MlModel
 from MlModels.api.serializers import MlModelSerializer
 from Prediction_Pipeline.prediction_pipeline import make_prediction
+from Prediction_Pipeline.csv_scoring import OUTPUT_FORMATS, CSV_FORMAT
 from ML_App.settings import LEVEL_CHOICES
+from django.conf import settings
 
 
 class RequestCreateUpdateSerializer(ModelSerializer):
@@ -67,6 +79,187 @@ class RequestCreateUpdateSerializer(ModelSerializer):
 		return input_data
 
 
+class RequestCompareSerializer(RequestCreateUpdateSerializer):
+	''' 
+	Request Serializer for Compare Api View
+	
+	Fields:
+	 	course_title: The name of the courses.
+        price: The price in $.
+        content_duration: The course time duration in hours.
+        num_lectures: The number of course lectures.
+        level: The experience level of the course.
+        days: Number of days to predict the number of subscribers.
+        algorithms: Related algorithms (all ready algorithms when empty).
+	'''
+	algorithms = PrimaryKeyRelatedField(many=True, required=False, queryset=MlModel.objects.filter(status=MlModel.READY))
+
+	class Meta:
+		model = Request
+		fields = (
+			'course_title',
+			'price',
+			'content_duration',
+			'num_lectures',
+			'days',
+			'level',
+			'algorithms',
+		)
+
+
+class RequestCurveSerializer(RequestCreateUpdateSerializer):
+	''' 
+	Request Serializer for Days Curve Api View
+	
+	Fields:
+	 	course_title: The name of the courses.
+        price: The price in $.
+        content_duration: The course time duration in hours.
+        num_lectures: The number of course lectures.
+        level: The experience level of the course.
+        days: List of numbers of days (optional).
+        days_start, days_stop, days_step: Range of days used when days list is empty (stop included).
+        algorithm: Related algorithm.
+	'''
+	days = ListField(child=IntegerField(), required=False)
+	days_start = IntegerField(default=30)
+	days_stop = IntegerField(default=730)
+	days_step = IntegerField(default=30, min_value=1)
+
+	class Meta:
+		model = Request
+		fields = (
+			'course_title',
+			'price',
+			'content_duration',
+			'num_lectures',
+			'days',
+			'days_start',
+			'days_stop',
+			'days_step',
+			'level',
+			'algorithm',
+		)
+
+	def validate(self, input_data):
+		days_start, days_stop, days_step = input_data.pop('days_start'), input_data.pop('days_stop'), input_data.pop('days_step')
+		# range is sized before its values are built, huge ranges are rejected without allocating them
+		days = input_data.get('days') or range(days_start, days_stop + 1, days_step)
+		max_points = settings.ML_CURVE['MAX_POINTS']
+
+		if not days:
+			raise ValidationError({"response": "days range is empty"})
+
+		if len(days) > max_points:
+			raise ValidationError({"response": f"curve can contain at most {max_points} points"})
+		days = list(days)
+
+		input_data = super().validate(dict(input_data, days=min(days)))
+		input_data['days'] = days
+		return input_data
+
+
+class GridField(Field):
+	'''
+	Sweep dimension given as list of values or as {"start", "stop", "step"} range (stop included)
+	'''
+	def __init__(self, child, **kwargs):
+		self.child = child
+		super().__init__(**kwargs)
+
+	def to_internal_value(self, data):
+		if isinstance(data, dict):
+			try:
+				start, stop, step = (self.child.to_internal_value(data[key]) for key in ('start', 'stop', 'step'))
+			except KeyError:
+				raise ValidationError('range requires start, stop and step')
+			if step <= 0 or stop < start:
+				raise ValidationError('range requires step > 0 and stop >= start')
+			size = int((stop - start) / step + 1e-9) + 1
+			if size > settings.ML_SWEEP['MAX_POINTS']:
+				raise ValidationError(f'range can contain at most {settings.ML_SWEEP["MAX_POINTS"]} values')
+			return [start + i * step for i in range(size)]
+		if not isinstance(data, list):
+			data = [data]
+		if not data:
+			raise ValidationError('list of values can not be empty')
+		return [self.child.to_internal_value(value) for value in data]
+
+	def to_representation(self, value):
+		return value
+
+
+class RequestSweepSerializer(RequestCreateUpdateSerializer):
+	''' 
+	Request Serializer for What-If Sweep Api View
+	
+	Fields:
+	 	course_title: The name of the courses.
+        price: Prices in $ (list or range).
+        content_duration: Course time durations in hours (list or range).
+        num_lectures: Numbers of course lectures (list or range).
+        level: Experience levels of the course (list).
+        days: Number of days to predict the number of subscribers.
+        algorithm: Related algorithm.
+	'''
+	GRID_FIELDS = ('price', 'content_duration', 'num_lectures', 'level')
+
+	price = GridField(FloatField())
+	content_duration = GridField(FloatField())
+	num_lectures = GridField(IntegerField())
+	level = GridField(ChoiceField(choices=LEVEL_CHOICES), required=False, default=['All Levels'])
+
+	def validate(self, input_data):
+		max_points = settings.ML_SWEEP['MAX_POINTS']
+		size = 1
+		for name in self.GRID_FIELDS:
+			size *= len(input_data[name])
+
+		if size > max_points:
+			raise ValidationError({"response": f"grid can contain at most {max_points} points"})
+
+		# limits are checked for the smallest and the largest value of every dimension
+		numeric = self.GRID_FIELDS[:-1]
+		for bound in (min, max):
+			super().validate(dict(input_data, **{name: bound(input_data[name]) for name in numeric}))
+
+		input_data['course_title'] = input_data['course_title'].lower()
+		input_data['size'] = size
+		return input_data
+
+
+class ScoreCsvSerializer(Serializer):
+	''' 
+	Serializer for Streaming CSV Scoring Api View
+	
+	Fields:
+	 	file: CSV file with course_title, price, content_duration, num_lectures, days and level columns.
+        algorithm: Related algorithm.
+        output_format: csv or ndjson.
+	'''
+	file = FileField()
+	algorithm = PrimaryKeyRelatedField(queryset=MlModel.objects.filter(status=MlModel.READY))
+	output_format = ChoiceField(choices=list(OUTPUT_FORMATS), default=CSV_FORMAT)
+
+
+class SimilarCoursesSerializer(Serializer):
+	''' 
+	Serializer for Similar Courses Api View
+	
+	Fields:
+	 	course_title: The name of the course.
+        k: Number of returned courses (default ML_SIMILAR_COURSES['TOP_K']).
+	'''
+	course_title = CharField(max_length=256)
+	k = IntegerField(min_value=1, required=False)
+
+	def validate_k(self, k):
+		max_k = settings.ML_SIMILAR_COURSES['MAX_K']
+		if k > max_k:
+			raise ValidationError(f'k can be at most {max_k}')
+		return k
+
+
 class RequestDetailSerializer(ModelSerializer):
 	''' 
 	Request Serializer for Retrive Api View
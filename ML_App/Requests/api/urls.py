@@ -1,6 +1,13 @@
 from django.urls import path, include
 from .views import (
 	RequestCreateApiView,
+	RequestBatchCreateApiView,
+	RequestCompareApiView,
+	RequestCurveApiView,
+	RequestSweepApiView,
+	RequestScoreCsvApiView,
+	RequestSimilarCoursesApiView,
+	RequestJobDetailApiView,
 	RequestDetailApiView,
 	RequestListApiView
 )
@@ -9,9 +16,16 @@ from ML_App.routers import DefaultRouterWithSimpleViews
 
 router = DefaultRouterWithSimpleViews()
 router.register(r'create', RequestCreateApiView, 'create')
+router.register(r'batch', RequestBatchCreateApiView, 'batch')
+router.register(r'compare', RequestCompareApiView, 'compare')
+router.register(r'curve', RequestCurveApiView, 'curve')
+router.register(r'sweep', RequestSweepApiView, 'sweep')
+router.register(r'score', RequestScoreCsvApiView, 'score')
+router.register(r'similar', RequestSimilarCoursesApiView, 'similar')
 router.register(r'list', RequestListApiView, 'list')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('jobs/<int:pk>/', RequestJobDetailApiView.as_view(), name='job'),
     path('<str:endpoint>/', RequestDetailApiView.as_view(), name='detail'),
 ]
\ No newline at end of file
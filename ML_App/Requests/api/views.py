@@ -5,13 +5,32 @@ from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from types import SimpleNamespace
+import itertools
 from .serializers import (
 	RequestCreateUpdateSerializer,
+	RequestCompareSerializer,
+	RequestCurveSerializer,
+	RequestSweepSerializer,
+	ScoreCsvSerializer,
+	SimilarCoursesSerializer,
 	RequestDetailSerializer, 
 	RequestListSerializer
 )
-from Requests.models import Request
+from Requests.models import Request, PredictionJob
+from Requests.jobs import enqueue_job
+from MlModels.models import MlModel
+from Prediction_Pipeline.fan_out import make_multi_prediction
+from Prediction_Pipeline.prediction_pipeline import make_batch_prediction, make_columns_prediction
+from Prediction_Pipeline.csv_scoring import iter_scored_csv, OUTPUT_FORMATS
+from Prediction_Pipeline.similarity import similar_courses, IndexNotFound
+from Prediction_Pipeline.instrumentation import collect
+from Requests.helpers import create_endpoints, predict_requests
 from ML_App.permissions import IsOwnerOrReadOnly
 
 
@@ -23,26 +42,33 @@ class RequestBaseApiView(APIView):
 	permission_classes = (IsAuthenticated,)
 	authentication_classes = (SessionAuthentication, TokenAuthentication,)
 
+	def get_input_data(self, request_data):
+		input_data = {}
+		input_data['course_title'] = request_data.course_title
+		input_data['price'] = request_data.price
+		input_data['content_duration'] = request_data.content_duration
+		input_data['num_lectures'] = request_data.num_lectures
+		input_data['days'] = request_data.days 
+		input_data['level'] = request_data.level
+		return input_data
+
+	def get_request_data(self, request_data):
+		data = {}
+		data['input_data'] = self.get_input_data(request_data)
+		data['algorithm'] = request_data.algorithm.__str__()
+		data['prediction'] = request_data.prediction
+		data['created_at'] = request_data.created_at.date()
+		data['endpoint'] = request_data.endpoint
+		data['owner'] = request_data.owner.username
+		return data
+
 	def response(self, request, serializer, succes_status):
 		if serializer.is_valid():
 			request_data = serializer.save(owner=request.user)
-
-			input_data = {}
-			input_data['course_title'] = request_data.course_title
-			input_data['price'] = request_data.price
-			input_data['content_duration'] = request_data.content_duration
-			input_data['num_lectures'] = request_data.num_lectures
-			input_data['days'] = request_data.days 
-			input_data['level'] = request_data.level
 			
 			response_data = {}
 			response_data['response'] = 'Successfully Create/Update Request'
-			response_data['input_data'] = input_data
-			response_data['algorithm'] = request_data.algorithm.__str__()
-			response_data['prediction'] = request_data.prediction
-			response_data['created_at'] = request_data.created_at.date()
-			response_data['endpoint'] = request_data.endpoint
-			response_data['owner'] = request_data.owner.username
+			response_data.update(self.get_request_data(request_data))
 
 			return Response(data=response_data, status=succes_status)
 		return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -65,12 +91,342 @@ class RequestCreateApiView(RequestBaseApiView):
 		- Active user
 		- Session or Token Autentication
 	
+	Query Parameters:
+		- mode=async: Queue the request and return job id (202) instead of waiting for prediction
+
+	Response Headers:
+		- Server-Timing: Prediction stages durations (when ML_STAGE_TIMING['SERVER_TIMING'] is set)
+	
 	Available Actions:
 		- Post: Create new prediction request
 	"""
 	def post(self, request):
 		serializer = self.serializer_class(data=request.data)
-		return self.response(request, serializer, succes_status=status.HTTP_201_CREATED)
+		if request.query_params.get('mode') == 'async':
+			return self.queue(request, serializer)
+		if not getattr(settings, 'ML_STAGE_TIMING', {}).get('SERVER_TIMING', False):
+			return self.response(request, serializer, succes_status=status.HTTP_201_CREATED)
+
+		with collect() as timings:
+			response = self.response(request, serializer, succes_status=status.HTTP_201_CREATED)
+		if timings:
+			response['Server-Timing'] = timings.server_timing()
+		return response
+
+	def queue(self, request, serializer):
+		if not serializer.is_valid():
+			return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+		job = enqueue_job(request.user, serializer.validated_data)
+
+		response_data = {}
+		response_data['response'] = 'Successfully Queued Request'
+		response_data['job'] = job.pk
+		response_data['status'] = job.status
+		response_data['url'] = reverse('Requests-api:job', kwargs={'pk': job.pk})
+		return Response(data=response_data, status=status.HTTP_202_ACCEPTED)
+
+
+class RequestBatchCreateApiView(RequestBaseApiView):
+	"""
+	Rest Api View for Create Many Prediction Requests at once
+
+	Fields:
+		- List of requests, each with the fields of the create view
+
+    Requirements:
+		- Active user
+		- Session or Token Autentication
+		- At most ML_BATCH_PREDICTION['MAX_SIZE'] requests
+	
+	Available Actions:
+		- Post: Create new prediction requests (one model call per algorithm)
+	"""
+	def post(self, request):
+		max_size = settings.ML_BATCH_PREDICTION['MAX_SIZE']
+		if isinstance(request.data, list) and len(request.data) > max_size:
+			return Response(
+				{"response": [f"batch can contain at most {max_size} requests"]},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		serializer = self.serializer_class(data=request.data, many=True)
+		if not serializer.is_valid():
+			return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+		request_models = [Request(owner=request.user, **data) for data in serializer.validated_data]
+		predict_requests(request_models)
+		for request_model, endpoint in zip(request_models, create_endpoints(request_models)):
+			request_model.endpoint = endpoint
+		with transaction.atomic():
+			Request.objects.bulk_create(request_models)
+
+		response_data = {}
+		response_data['response'] = 'Successfully Create Requests'
+		response_data['count'] = len(request_models)
+		response_data['data'] = [self.get_request_data(request_model) for request_model in request_models]
+		return Response(data=response_data, status=status.HTTP_201_CREATED)
+
+
+class RequestCompareApiView(RequestBaseApiView):
+	"""
+	Rest Api View for Compare Predictions of Many Algorithms
+
+	Fields:
+	 	- course_title: The name of the courses
+        - price: The price in $
+        - content_duration: The course time duration in hours
+        - num_lectures: The number of course lectures
+        - level: The experience level of the course
+        - days: Number of days to predict the number of subscribers
+        - algorithms: Related algorithms (all ready algorithms when empty)
+
+    Requirements:
+		- Active user
+		- Session or Token Autentication
+	
+	Available Actions:
+		- Post: Score input with every selected algorithm (nothing is saved)
+	"""
+	serializer_class = RequestCompareSerializer
+
+	def post(self, request):
+		serializer = self.serializer_class(data=request.data)
+		if not serializer.is_valid():
+			return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+		input_data = dict(serializer.validated_data)
+		algorithms = input_data.pop('algorithms', None) or list(MlModel.objects.filter(status=MlModel.READY).order_by('pk'))
+		request_model = Request(owner=request.user, **input_data)
+
+		results = []
+		for result in make_multi_prediction(algorithms, request_model):
+			results.append({
+				'algorithm': result['algorithm'].__str__(),
+				'endpoint': result['algorithm'].endpoint,
+				'prediction': round(result['prediction'][0]),
+				'latency_ms': round(result['latency'] * 1000, 3),
+				'preprocessing_ms': round(result['preprocessing_latency'] * 1000, 3),
+			})
+
+		response_data = {}
+		response_data['response'] = 'Successfully Compare Algorithms'
+		response_data['input_data'] = self.get_input_data(request_model)
+		response_data['results'] = results
+		return Response(data=response_data, status=status.HTTP_200_OK)
+
+
+class RequestCurveApiView(RequestBaseApiView):
+	"""
+	Rest Api View for Predicted Subscribers over Time
+
+	Fields:
+	 	- course_title: The name of the courses
+        - price: The price in $
+        - content_duration: The course time duration in hours
+        - num_lectures: The number of course lectures
+        - level: The experience level of the course
+        - days: List of numbers of days (optional)
+        - days_start, days_stop, days_step: Range of days, default 30-730 every 30 days
+        - algorithm: Related algorithm
+
+    Requirements:
+		- Active user
+		- Session or Token Autentication
+		- At most ML_CURVE['MAX_POINTS'] days
+	
+	Available Actions:
+		- Post: Predict the whole curve with one model call (nothing is saved)
+	"""
+	serializer_class = RequestCurveSerializer
+
+	def post(self, request):
+		serializer = self.serializer_class(data=request.data)
+		if not serializer.is_valid():
+			return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+		input_data = dict(serializer.validated_data)
+		days, algorithm = input_data.pop('days'), input_data.pop('algorithm')
+		rows = [SimpleNamespace(days=point, **input_data) for point in days]
+		predictions = make_batch_prediction(algorithm, rows)
+
+		response_data = {}
+		response_data['response'] = 'Successfully Predict Curve'
+		response_data['input_data'] = input_data
+		response_data['algorithm'] = algorithm.__str__()
+		response_data['days'] = days
+		response_data['predictions'] = [round(prediction) for prediction in predictions]
+		return Response(data=response_data, status=status.HTTP_200_OK)
+
+
+class RequestSweepApiView(RequestBaseApiView):
+	"""
+	Rest Api View for What-If Sweep over Price/Duration/Lectures/Level Grid
+
+	Fields:
+	 	- course_title: The name of the courses
+        - price: Prices in $, list or {"start", "stop", "step"} range
+        - content_duration: Course time durations in hours, list or range
+        - num_lectures: Numbers of course lectures, list or range
+        - level: Experience levels of the course, list (default All Levels)
+        - days: Number of days to predict the number of subscribers
+        - algorithm: Related algorithm
+
+    Requirements:
+		- Active user
+		- Session or Token Autentication
+		- At most ML_SWEEP['MAX_POINTS'] grid points
+	
+	Available Actions:
+		- Post: Score cartesian grid in chunks of ML_SWEEP['CHUNK_SIZE'] points (nothing is saved)
+	"""
+	serializer_class = RequestSweepSerializer
+
+	def post(self, request):
+		serializer = self.serializer_class(data=request.data)
+		if not serializer.is_valid():
+			return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+		input_data = dict(serializer.validated_data)
+		algorithm, size = input_data.pop('algorithm'), input_data.pop('size')
+		grid_fields = self.serializer_class.GRID_FIELDS
+		grid = list(zip(*itertools.product(*(input_data.pop(name) for name in grid_fields))))
+		columns = dict(zip(grid_fields, grid))
+
+		chunk_size = settings.ML_SWEEP['CHUNK_SIZE']
+		predictions = []
+		for start in range(0, size, chunk_size):
+			chunk = {name: column[start:start + chunk_size] for name, column in columns.items()}
+			length = len(chunk['price'])
+			chunk['course_title'] = [input_data['course_title']] * length
+			chunk['days'] = [input_data['days']] * length
+			predictions.extend(round(prediction) for prediction in make_columns_prediction(algorithm, chunk))
+		columns['prediction'] = predictions
+
+		response_data = {}
+		response_data['response'] = 'Successfully Sweep Parameters'
+		response_data['input_data'] = input_data
+		response_data['algorithm'] = algorithm.__str__()
+		response_data['size'] = size
+		response_data['columns'] = {name: list(column) for name, column in columns.items()}
+		return Response(data=response_data, status=status.HTTP_200_OK)
+
+
+class RequestScoreCsvApiView(RequestBaseApiView):
+	"""
+	Rest Api View for Streaming Scoring of CSV File
+
+	Fields:
+		- file: CSV file shaped like udemy_courses_cleaned.csv (course_title, price,
+		  content_duration, num_lectures, days and level columns are required)
+		- algorithm: Related algorithm
+		- output_format: csv (default) or ndjson
+
+    Requirements:
+		- Active user
+		- Session or Token Autentication
+	
+	Available Actions:
+		- Post: Stream back input rows with prediction column, scored in chunks
+		  of ML_CSV_SCORING['CHUNK_SIZE'] rows (nothing is saved), an invalid row
+		  after the first chunk ends the stream with "# error: ..." line (CSV)
+		  or {"error": ...} line (NDJSON)
+	"""
+	serializer_class = ScoreCsvSerializer
+
+	def post(self, request):
+		serializer = self.serializer_class(data=request.data)
+		if not serializer.is_valid():
+			return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+		output_format = serializer.validated_data['output_format']
+		parts = iter_scored_csv(
+			serializer.validated_data['file'],
+			serializer.validated_data['algorithm'],
+			output_format
+		)
+		# first chunk is scored eagerly so broken files are reported with 400
+		try:
+			first_part = next(parts, '')
+		except ValueError as exc:
+			return Response({"file": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+
+		response = StreamingHttpResponse(
+			itertools.chain([first_part], parts),
+			content_type=OUTPUT_FORMATS[output_format]
+		)
+		response['Content-Disposition'] = f'attachment; filename="predictions.{output_format}"'
+		return response
+
+
+class RequestSimilarCoursesApiView(RequestBaseApiView):
+	"""
+	Rest Api View for Courses from the Udemy Dataset with the most Similar Title
+
+	Fields:
+		- course_title: The name of the course (query parameter)
+		- k: Number of returned courses (query parameter, default ML_SIMILAR_COURSES['TOP_K'])
+
+    Requirements:
+		- Active user
+		- Session or Token Autentication
+	
+	Available Actions:
+		- Get: Return the most similar courses with cosine similarity of their
+		  TF-IDF title vectors, the most similar first (503 until the index is built)
+	"""
+	serializer_class = SimilarCoursesSerializer
+
+	def get(self, request):
+		serializer = self.serializer_class(data=request.query_params)
+		if not serializer.is_valid():
+			return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+		course_title = serializer.validated_data['course_title']
+		response_data = {}
+		try:
+			results = similar_courses.search(course_title, serializer.validated_data.get('k'))
+		except IndexNotFound:
+			response_data['response'] = 'Error'
+			response_data['error_message'] = 'Similarity index is not built, run "python manage.py build_similarity_index"'
+			return Response(data=response_data, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+		response_data['course_title'] = course_title
+		response_data['results'] = [dict(course, similarity=round(score, 4)) for course, score in results]
+		return Response(data=response_data, status=status.HTTP_200_OK)
+
+
+class RequestJobDetailApiView(RequestBaseApiView):
+	"""
+	Rest Api View for Asynchronous Prediction Request Status
+
+	Fields:
+		- job: Job id
+		- status: queued, running, done or failed
+		- created_at, started_at, finished_at: Job timestamps
+		- error: Error message of the failed job
+		- data: Created prediction request (when done)
+
+    Requirements:
+		- Active user is owner of the job
+		- Session or Token Autentication
+	
+	Available Actions:
+		- Get: Retrive job status and result
+	"""
+	def get(self, request, pk):
+		job = get_object_or_404(PredictionJob, pk=pk, owner=request.user)
+
+		response_data = {}
+		response_data['job'] = job.pk
+		response_data['status'] = job.status
+		response_data['created_at'] = job.created_at
+		response_data['started_at'] = job.started_at
+		response_data['finished_at'] = job.finished_at
+		if job.status == PredictionJob.FAILED:
+			response_data['error'] = job.error
+		if job.request is not None:
+			response_data['data'] = self.get_request_data(job.request)
+		return Response(data=response_data, status=status.HTTP_200_OK)
 
 
 class RequestDetailApiView(RequestBaseApiView):
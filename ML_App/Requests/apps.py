@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class RequestsConfig(AppConfig):
     name = 'Requests'
+
+    def ready(self):
+        from Prediction_Pipeline.similarity import similar_courses
+        similar_courses.preload()
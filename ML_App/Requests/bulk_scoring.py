@@ -0,0 +1,163 @@
+'''
+Offline bulk scoring of CSV files and stored Request rows.
+
+Input is read in chunks, every chunk is scored in a process pool whose workers
+load each model file once (Prediction_Pipeline.workers) and results are written
+back with bulk_create/bulk_update, one transaction per chunk.
+'''
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from django.db import transaction
+from Prediction_Pipeline.workers import (
+	COLUMNS,
+	file_signature,
+	to_rows,
+	init_worker,
+	predict_in_worker,
+)
+from .helpers import create_endpoints
+from .models import Request
+import multiprocessing
+import time
+import pandas as pd
+
+
+def iter_csv_chunks(path, chunk_size):
+	'''
+	Function yields (DataFrame chunk, rows in COLUMNS order) of the CSV file
+	'''
+	for chunk in pd.read_csv(path, chunksize=chunk_size):
+		chunk['course_title'] = chunk['course_title'].fillna('').astype(str)
+		yield chunk, tuple(chunk[list(COLUMNS)].itertuples(index=False, name=None))
+
+
+def iter_request_chunks(algorithm, chunk_size):
+	'''
+	Function yields (Request objects, rows in COLUMNS order) of the algorithm (keyset pagination)
+	'''
+	last_pk = 0
+	while True:
+		requests = list(
+			Request.objects.filter(algorithm=algorithm, pk__gt=last_pk)
+			.select_related('algorithm').order_by('pk')[:chunk_size]
+		)
+		if not requests:
+			return
+		last_pk = requests[-1].pk
+		yield requests, to_rows(requests)
+
+
+class BulkScorer:
+	'''
+	Scores chunks of rows in worker processes, results are returned in input order
+
+	Atributes:
+		algorithms: MlModels preloaded by every worker process.
+		processes: Number of worker processes (0 - score in the current process).
+		max_in_flight: Maximal number of submitted but not written chunks.
+	'''
+	def __init__(self, algorithms, processes=None, max_in_flight=None):
+		self.algorithms = algorithms
+		self.processes = multiprocessing.cpu_count() if processes is None else processes
+		self.max_in_flight = max_in_flight or 2 * max(self.processes, 1)
+		self.executor = None
+
+	def __enter__(self):
+		if self.processes:
+			files = [(algorithm.file.path, algorithm.file_format) for algorithm in self.algorithms]
+			self.executor = ProcessPoolExecutor(
+				max_workers=self.processes,
+				mp_context=multiprocessing.get_context('spawn'),
+				initializer=init_worker,
+				initargs=(files,),
+			)
+		return self
+
+	def __exit__(self, *exc_info):
+		if self.executor is not None:
+			self.executor.shutdown(wait=True)
+			self.executor = None
+
+	def _submit(self, algorithm, rows):
+		path = algorithm.file.path
+		args = (path, algorithm.file_format, file_signature(path), rows)
+		if self.executor is None:
+			return predict_in_worker(*args)
+		return self.executor.submit(predict_in_worker, *args)
+
+	def score(self, tasks):
+		'''
+		Generator of (algorithm, payload, predictions) for tasks of (algorithm, payload, rows)
+		'''
+		in_flight = deque()
+		for algorithm, payload, rows in tasks:
+			in_flight.append((algorithm, payload, self._submit(algorithm, rows)))
+			if len(in_flight) >= self.max_in_flight:
+				yield self._result(*in_flight.popleft())
+		while in_flight:
+			yield self._result(*in_flight.popleft())
+
+	def _result(self, algorithm, payload, predictions):
+		if self.executor is not None:
+			predictions = predictions.result()
+		return algorithm, payload, predictions
+
+
+def save_csv_predictions(algorithm, chunk, predictions, owner):
+	'''
+	Function creates Request objects for scored CSV chunk with bulk insert
+	'''
+	requests = [
+		Request(
+			owner=owner,
+			algorithm=algorithm,
+			course_title=str(course_title).lower(),
+			price=price,
+			content_duration=content_duration,
+			num_lectures=num_lectures,
+			days=days,
+			level=level,
+			prediction=round(prediction),
+		)
+		for (course_title, price, content_duration, num_lectures, days, level), prediction
+		in zip(chunk[list(COLUMNS)].itertuples(index=False, name=None), predictions)
+	]
+	for request, endpoint in zip(requests, create_endpoints(requests)):
+		request.endpoint = endpoint
+	with transaction.atomic():
+		Request.objects.bulk_create(requests)
+	return len(requests)
+
+
+def save_request_predictions(requests, predictions):
+	'''
+	Function updates predictions of stored Request objects with bulk update
+	'''
+	for request, prediction in zip(requests, predictions):
+		request.prediction = round(prediction)
+	with transaction.atomic():
+		Request.objects.bulk_update(requests, ['prediction'])
+	return len(requests)
+
+
+class Progress:
+	'''
+	Counter of scored rows with throughput
+	'''
+	def __init__(self):
+		self.rows = 0
+		self.start = time.perf_counter()
+
+	def add(self, rows):
+		self.rows += rows
+
+	@property
+	def elapsed(self):
+		return time.perf_counter() - self.start
+
+	@property
+	def throughput(self):
+		return self.rows / self.elapsed if self.elapsed else 0.0
+
+	def __str__(self):
+		return f'{self.rows} rows in {self.elapsed:.2f}s ({self.throughput:.0f} rows/s)'
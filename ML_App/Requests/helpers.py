@@ -1,29 +1,46 @@
-import os
+from collections import Counter, defaultdict
 from Requests import models
+from MlModels.endpoints import allocate_endpoints, assign_endpoint
+from Prediction_Pipeline.prediction_pipeline import make_batch_prediction
 
 def get_endpoint(instance):
 	''' 
 	Function returns base Request endpoint
 	'''
 	course_title = instance.course_title.lower().replace(' ', '-')
-	return f'{course_title}_{instance.algorithm.id}_{instance.days}_{instance.created_at.date()}'
+	return f'{course_title}_{instance.algorithm_id}_{instance.days}_{instance.created_at.date()}'
 
 
-def create_endpoint(instance, new_endpoint=None, new_id=1):
+def create_endpoint(instance):
 	''' 
-	Function create unique endpoint for Request
+	Function returns unique endpoint for Request
+	(the current one is kept while the base endpoint does not change)
 	'''
-	if new_endpoint:
-		endpoint = new_endpoint
-	else:	
-		endpoint = get_endpoint(instance)
-	qs = models.Request.objects.filter(endpoint=endpoint).exclude(pk=instance.pk)
-	exists = qs.exists()
-	if exists:
-		if new_endpoint:
-			endpoint = f'{endpoint.rsplit("_", maxsplit=1)[0]}_{new_id}'
-		else:
-			endpoint = f'{endpoint}_{new_id}'
-		new_id += 1
-		return create_endpoint(instance, endpoint, new_id)
-	return endpoint
\ No newline at end of file
+	return assign_endpoint(instance, get_endpoint(instance))
+
+
+def create_endpoints(instances):
+	''' 
+	Function create unique endpoints for many new Request objects
+	(one counter update per chunk of distinct base endpoints)
+	'''
+	bases = [get_endpoint(instance) for instance in instances]
+	allocated = {
+		base: iter(endpoints) for base, endpoints in allocate_endpoints(models.Request, Counter(bases)).items()
+	}
+	return [next(allocated[base]) for base in bases]
+
+
+def predict_requests(instances):
+	''' 
+	Function set predictions for many Request objects, 
+	the model is called once per algorithm
+	'''
+	groups = defaultdict(list)
+	for instance in instances:
+		groups[instance.algorithm].append(instance)
+	for algorithm, group in groups.items():
+		predictions = make_batch_prediction(algorithm, group)
+		for instance, prediction in zip(group, predictions):
+			instance.prediction = round(prediction)
+	return instances
\ No newline at end of file
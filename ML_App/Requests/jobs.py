@@ -0,0 +1,112 @@
+'''
+Local DB-backed queue of asynchronous prediction requests.
+
+Web workers only store the validated input as PredictionJob, worker processes
+(manage.py run_prediction_workers) claim queued jobs with a conditional UPDATE,
+so every job is processed by exactly one worker, and save Request objects.
+'''
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from MlModels.models import MlModel
+from .models import Request, PredictionJob
+import json
+import os
+import socket
+import time
+
+
+DEFAULT_POLL_INTERVAL = 1
+DEFAULT_STALE_TIMEOUT = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def get_config():
+	return getattr(settings, 'ML_PREDICTION_JOBS', {})
+
+
+def enqueue_job(owner, input_data):
+	'''
+	Function stores validated Request input data as queued PredictionJob
+	'''
+	payload = dict(input_data)
+	payload['algorithm'] = payload['algorithm'].pk
+	return PredictionJob.objects.create(owner=owner, payload=json.dumps(payload))
+
+
+def requeue_stale_jobs(timeout=None):
+	'''
+	Function returns jobs of dead workers (running longer than timeout) to the queue
+	'''
+	timeout = timeout or get_config().get('STALE_TIMEOUT', DEFAULT_STALE_TIMEOUT)
+	max_attempts = get_config().get('MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+	stale = PredictionJob.objects.filter(
+		status=PredictionJob.RUNNING,
+		started_at__lt=timezone.now() - timedelta(seconds=timeout)
+	)
+	stale.filter(attempts__gte=max_attempts).update(
+		status=PredictionJob.FAILED, error='worker did not finish the job', finished_at=timezone.now()
+	)
+	return stale.update(status=PredictionJob.QUEUED, worker='')
+
+
+def claim_job(worker):
+	'''
+	Function atomically moves the oldest queued job to running state, returns None when queue is empty
+	'''
+	while True:
+		job_id = PredictionJob.objects.filter(status=PredictionJob.QUEUED) \
+			.order_by('created_at', 'pk').values_list('pk', flat=True).first()
+		if job_id is None:
+			return None
+		claimed = PredictionJob.objects.filter(pk=job_id, status=PredictionJob.QUEUED).update(
+			status=PredictionJob.RUNNING,
+			worker=worker,
+			started_at=timezone.now(),
+			attempts=F('attempts') + 1
+		)
+		if claimed:
+			return PredictionJob.objects.get(pk=job_id)
+		# other worker was faster, try the next job
+
+
+def run_job(job):
+	'''
+	Function creates Request (prediction included) for the claimed job
+	'''
+	try:
+		payload = json.loads(job.payload)
+		payload['algorithm'] = MlModel.objects.get(pk=payload['algorithm'])
+		request_model = Request(owner_id=job.owner_id, **payload)
+		request_model.save()
+	except Exception as exc:
+		job.status = PredictionJob.FAILED
+		job.error = f'{exc.__class__.__name__}: {exc}'
+	else:
+		job.status = PredictionJob.DONE
+		job.request = request_model
+	job.finished_at = timezone.now()
+	job.save(update_fields=['status', 'error', 'request', 'finished_at'])
+	return job
+
+
+def run_worker(name=None, poll_interval=None, burst=False):
+	'''
+	Function processes queued jobs until interrupted (or until the queue is empty in burst mode)
+
+	Returns number of processed jobs.
+	'''
+	name = name or f'{socket.gethostname()}:{os.getpid()}'
+	poll_interval = poll_interval or get_config().get('POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+	processed = 0
+	while True:
+		requeue_stale_jobs()
+		job = claim_job(name)
+		if job is None:
+			if burst:
+				return processed
+			time.sleep(poll_interval)
+			continue
+		run_job(job)
+		processed += 1
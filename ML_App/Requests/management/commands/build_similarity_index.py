@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from Prediction_Pipeline.similarity import build_index, similar_courses
+import time
+
+
+class Command(BaseCommand):
+	help = 'Build TF-IDF index of course titles used by the similar courses lookup'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--source', default=settings.ML_SIMILAR_COURSES['SOURCE'],
+							help='CSV file shaped like udemy_courses_cleaned.csv')
+		parser.add_argument('--index-dir', default=settings.ML_SIMILAR_COURSES['INDEX_DIR'])
+
+	def handle(self, *args, **options):
+		start = time.perf_counter()
+		courses = build_index(options['source'], options['index_dir'])
+		similar_courses.reset()
+		self.stdout.write(self.style.SUCCESS(
+			f'Indexed {courses} courses in {options["index_dir"]} ({time.perf_counter() - start:.2f}s)'
+		))
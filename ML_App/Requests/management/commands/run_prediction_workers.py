@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+from Requests.jobs import run_worker
+import multiprocessing
+import os
+import socket
+
+
+def worker_process(name, poll_interval, burst):
+	# forked process must not reuse parent's DB connections
+	connections.close_all()
+	run_worker(name, poll_interval, burst)
+
+
+class Command(BaseCommand):
+	help = 'Run worker processes for asynchronous prediction jobs'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+		parser.add_argument('--poll-interval', type=float, default=None, help='Seconds between queue polls')
+		parser.add_argument('--burst', action='store_true', help='Exit when the queue is empty')
+
+	def handle(self, *args, **options):
+		workers, poll_interval, burst = options['workers'], options['poll_interval'], options['burst']
+		prefix = f'{socket.gethostname()}:{os.getpid()}'
+
+		if workers == 1:
+			processed = run_worker(f'{prefix}:0', poll_interval, burst)
+			self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
+			return
+
+		connections.close_all()
+		processes = [
+			multiprocessing.Process(target=worker_process, args=(f'{prefix}:{i}', poll_interval, burst))
+			for i in range(workers)
+		]
+		for process in processes:
+			process.start()
+		self.stdout.write(f'Started {workers} prediction workers')
+		try:
+			for process in processes:
+				process.join()
+		except KeyboardInterrupt:
+			for process in processes:
+				process.terminate()
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from MlModels.models import MlModel
+from Requests.bulk_scoring import (
+	BulkScorer,
+	Progress,
+	iter_csv_chunks,
+	iter_request_chunks,
+	save_csv_predictions,
+	save_request_predictions,
+)
+
+
+class Command(BaseCommand):
+	help = 'Score CSV file (creates Requests) or re-score stored Requests with one or more MlModels'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--models', nargs='+', metavar='ENDPOINT', help='MlModel endpoints (default: all ready)')
+		parser.add_argument('--csv', help='CSV file shaped like udemy_courses_cleaned.csv')
+		parser.add_argument('--owner', help='Username of the owner of Requests created from CSV')
+		parser.add_argument('--chunk-size', type=int, default=1000)
+		parser.add_argument('--processes', type=int, default=None,
+							help='Number of worker processes (default: CPU count, 0 - no pool)')
+
+	def get_algorithms(self, endpoints):
+		algorithms = MlModel.objects.filter(status=MlModel.READY).order_by('pk')
+		if endpoints:
+			algorithms = algorithms.filter(endpoint__in=endpoints)
+			missing = set(endpoints) - {algorithm.endpoint for algorithm in algorithms}
+			if missing:
+				raise CommandError(f'Unknown or not ready MlModels: {", ".join(sorted(missing))}')
+		return list(algorithms)
+
+	def handle(self, *args, **options):
+		algorithms = self.get_algorithms(options['models'])
+		chunk_size = options['chunk_size']
+
+		if options['csv']:
+			if not options['owner']:
+				raise CommandError('--owner is required with --csv')
+			try:
+				owner = User.objects.get(username=options['owner'])
+			except User.DoesNotExist:
+				raise CommandError(f'Unknown user: {options["owner"]}')
+			tasks = (
+				(algorithm, chunk, rows)
+				for chunk, rows in iter_csv_chunks(options['csv'], chunk_size)
+				for algorithm in algorithms
+			)
+			save = lambda algorithm, chunk, predictions: save_csv_predictions(algorithm, chunk, predictions, owner)
+		else:
+			tasks = (
+				(algorithm, requests, rows)
+				for algorithm in algorithms
+				for requests, rows in iter_request_chunks(algorithm, chunk_size)
+			)
+			save = lambda algorithm, requests, predictions: save_request_predictions(requests, predictions)
+
+		progress = Progress()
+		with BulkScorer(algorithms, processes=options['processes']) as scorer:
+			for algorithm, payload, predictions in scorer.score(tasks):
+				progress.add(save(algorithm, payload, predictions))
+				self.stdout.write(f'{algorithm.endpoint}: {progress}')
+		self.stdout.write(self.style.SUCCESS(f'Scored {progress}'))
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.7 on 2026-10-18 04:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Requests', '0002_predictionjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='request',
+            name='algorithm',
+            field=models.ForeignKey(limit_choices_to={'status': 'ready'}, on_delete=django.db.models.deletion.CASCADE, to='MlModels.MlModel'),
+        ),
+    ]
@@ -3,7 +3,8 @@ from django.utils import timezone
 from django.contrib.auth.models import User
 from ML_App.settings import LEVEL_CHOICES
 from MlModels.models import MlModel
-from .helpers import create_endpoint
+from .helpers import get_endpoint, create_endpoint
+from MlModels.endpoints import save_with_endpoint
 from Prediction_Pipeline.prediction_pipeline import make_prediction
 
 
@@ -42,7 +43,7 @@ class Request(models.Model):
 
 	# relational fields
 	endpoint = models.SlugField(max_length=256, unique=True, blank=True)
-	algorithm = models.ForeignKey(MlModel, on_delete=models.CASCADE)
+	algorithm = models.ForeignKey(MlModel, on_delete=models.CASCADE, limit_choices_to={'status': MlModel.READY})
 	owner = models.ForeignKey(User, on_delete=models.CASCADE)
 
 	class Meta():
@@ -50,9 +51,61 @@ class Request(models.Model):
 		verbose_name_plural = "Requests"
 
 	def __str__(self):
-		return f'{create_endpoint(self)}'
+		# endpoint is allocated on save, unsaved Request shows its base endpoint
+		return f'{self.endpoint or get_endpoint(self)}'
+
+	def allocate_endpoint(self):
+		'''
+		Reserve unique endpoint for the Request (kept while its base endpoint does not change)
+		'''
+		self.endpoint = create_endpoint(self)
+		return self.endpoint
 
 	def save(self, *args, **kwargs):
 		self.prediction = round(make_prediction(self)[0])
-		self.endpoint = self.__str__()
-		super(Request, self).save(*args, **kwargs)
+		save_with_endpoint(self, get_endpoint(self), lambda: super(Request, self).save(*args, **kwargs))
+
+
+class PredictionJob(models.Model):
+	''' 
+	Object represent asynchronous prediction request waiting in the DB-backed queue
+
+	Atributes:
+		payload: JSON encoded input data of the Request (algorithm as primary key).
+		status: queued, running, done or failed.
+		request: Request created by the job.
+		error: Error message of the failed job.
+		worker: Name of the worker which claimed the job.
+		attempts: Number of times the job was claimed.
+		owner: User who made request.
+	'''
+	QUEUED = 'queued'
+	RUNNING = 'running'
+	DONE = 'done'
+	FAILED = 'failed'
+	STATUS_CHOICES = (
+		(QUEUED, 'Queued'),
+		(RUNNING, 'Running'),
+		(DONE, 'Done'),
+		(FAILED, 'Failed'),
+	)
+
+	payload = models.TextField()
+	status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+	error = models.TextField(blank=True)
+	worker = models.CharField(max_length=64, blank=True)
+	attempts = models.IntegerField(default=0)
+
+	created_at = models.DateTimeField(default=timezone.now)
+	started_at = models.DateTimeField(null=True, blank=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	request = models.ForeignKey(Request, null=True, blank=True, on_delete=models.SET_NULL)
+	owner = models.ForeignKey(User, on_delete=models.CASCADE)
+
+	class Meta():
+		verbose_name = "Prediction Job"
+		verbose_name_plural = "Prediction Jobs"
+
+	def __str__(self):
+		return f'job_{self.pk}_{self.status}'
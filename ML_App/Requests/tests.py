@@ -1,16 +1,34 @@
+from django.conf import settings
+from django.db import connection
 from django.contrib.auth.models import User
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from prometheus_client import REGISTRY
+
 from MlModels.models import MlModel
-from .models import Request
+from .models import Request, PredictionJob
+from .jobs import run_worker, claim_job, requeue_stale_jobs
+from Prediction_Pipeline.instrumentation import stage_stats
+from Prediction_Pipeline.prediction_pipeline import model_registry
+from Prediction_Pipeline.similarity import similar_courses
 
 import warnings
 warnings.filterwarnings("ignore")
 
+import io
+import json
+import numpy as np
 import os
+import shutil
+import tempfile
 
 
 class CreateRequestTestCase(APITestCase):
@@ -25,7 +43,8 @@ class CreateRequestTestCase(APITestCase):
 											name='SVR',
 											version='V1',
 											description='First Version',
-											file=self.model_path)
+											file=self.model_path,
+											status=MlModel.READY)
 		self.client.force_authenticate(user=self.user)
 
 	def test_create_request(self):
@@ -63,6 +82,65 @@ class CreateRequestTestCase(APITestCase):
 		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 		self.assertEqual(Request.objects.count(), 1)
 
+	@override_settings(ML_MICRO_BATCHING={'ENABLED': True, 'WINDOW': 0.001, 'MAX_BATCH_SIZE': 8},
+					   ML_PREDICTION_CACHE={'ENABLED': False})
+	def test_create_request_micro_batching(self):
+		data = {
+			"course_title": "Django Web Course",
+			"price": 100,
+			"content_duration": 40,
+			"num_lectures": 40,
+			"days": 365,
+			"level": "All Levels",
+			"algorithm": self.model.pk,
+		}
+		response = self.client.post("/api/requests/create/", data)
+		with override_settings(ML_MICRO_BATCHING={'ENABLED': False}):
+			inline_response = self.client.post("/api/requests/create/", data)
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(response.data['prediction'], inline_response.data['prediction'])
+
+	@override_settings(ML_PREDICTION_CACHE={'ENABLED': True, 'BACKEND': 'Prediction_Pipeline.prediction_cache.LocMemBackend'})
+	def test_create_request_cache_hit(self):
+		data = {
+			"course_title": "Django Web Course",
+			"price": 100,
+			"content_duration": 40,
+			"num_lectures": 40,
+			"days": 365,
+			"level": "All Levels",
+			"algorithm": self.model.pk,
+		}
+		response = self.client.post("/api/requests/create/", data)
+		model_registry.invalidate(self.model.endpoint)
+		cached_response = self.client.post("/api/requests/create/", data)
+
+		self.assertEqual(response.data['prediction'], cached_response.data['prediction'])
+		loaded = [entry['endpoint'] for entry in model_registry.stats()['models']]
+		self.assertNotIn(self.model.endpoint, loaded)
+
+	@override_settings(ML_STAGE_TIMING={'ENABLED': True, 'SERVER_TIMING': True},
+					   ML_PREDICTION_CACHE={'ENABLED': False})
+	def test_create_request_server_timing(self):
+		data = {
+			"course_title": "Django Web Course",
+			"price": 100,
+			"content_duration": 40,
+			"num_lectures": 40,
+			"days": 365,
+			"level": "All Levels",
+			"algorithm": self.model.pk,
+		}
+		model_registry.invalidate(self.model.endpoint)
+		stage_stats.reset()
+		response = self.client.post("/api/requests/create/", data)
+		stages = [item.split(";")[0] for item in response["Server-Timing"].split(", ")]
+
+		for name in ("load", "open", "unpickle", "frame", "preprocessing", "title_analyzer", "estimator"):
+			self.assertIn(name, stages)
+		self.assertEqual(stage_stats.stats()[self.model.endpoint]['predictions'], 1)
+
 	def test_no_permissions(self):
 		self.client.force_authenticate(user=None)
 
@@ -168,6 +246,545 @@ class CreateRequestTestCase(APITestCase):
 		self.assertEqual(Request.objects.count(), 0)
 
 
+class BatchCreateRequestTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model_path = "./MlModels/algorithms/SVR_V1_2020-06-19"
+		self.model = MlModel.objects.create(owner=self.user,
+											name='SVR',
+											version='V1',
+											description='First Version',
+											file=self.model_path,
+											status=MlModel.READY)
+		self.client.force_authenticate(user=self.user)
+
+		self.item = {
+			"course_title": "Django Web Course",
+			"price": 100,
+			"content_duration": 40,
+			"num_lectures": 40,
+			"days": 365,
+			"level": "All Levels",
+			"algorithm": self.model.pk,
+		}
+
+	def test_create_batch(self):
+		other_item = dict(self.item, course_title="Python Course", price=50)
+		data = [self.item, self.item, other_item]
+		response = self.client.post("/api/requests/batch/", data, format='json')
+
+		single_response = self.client.post("/api/requests/create/", self.item)
+		endpoints = [item['endpoint'] for item in response.data['data']]
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(response.data['count'], 3)
+		self.assertEqual(endpoints[1], f"{endpoints[0]}_1")
+		self.assertEqual(single_response.data['endpoint'], f"{endpoints[0]}_2")
+		self.assertEqual(response.data['data'][0]['prediction'], single_response.data['prediction'])
+		self.assertEqual(response.data['data'][2]['input_data']['course_title'], "python course")
+		self.assertEqual(Request.objects.count(), 4)
+
+	def test_invalid_item(self):
+		data = [self.item, dict(self.item, price=300)]
+		response = self.client.post("/api/requests/batch/", data, format='json')
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(Request.objects.count(), 0)
+
+
+class AsyncCreateRequestTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model_path = "./MlModels/algorithms/SVR_V1_2020-06-19"
+		self.model = MlModel.objects.create(owner=self.user,
+											name='SVR',
+											version='V1',
+											description='First Version',
+											file=self.model_path,
+											status=MlModel.READY)
+		self.client.force_authenticate(user=self.user)
+
+		self.data = {
+			"course_title": "Django Web Course",
+			"price": 100,
+			"content_duration": 40,
+			"num_lectures": 40,
+			"days": 365,
+			"level": "All Levels",
+			"algorithm": self.model.pk,
+		}
+
+	def test_async_create(self):
+		response = self.client.post("/api/requests/create/?mode=async", self.data)
+		job_url = response.data['url']
+
+		self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+		self.assertEqual(response.data['status'], PredictionJob.QUEUED)
+		self.assertEqual(Request.objects.count(), 0)
+		self.assertEqual(self.client.get(job_url).data['status'], PredictionJob.QUEUED)
+
+		self.assertEqual(run_worker('test-worker', burst=True), 1)
+		response = self.client.get(job_url)
+		sync_response = self.client.post("/api/requests/create/", self.data)
+
+		self.assertEqual(response.data['status'], PredictionJob.DONE)
+		self.assertEqual(response.data['data']['prediction'], sync_response.data['prediction'])
+		self.assertEqual(response.data['data']['input_data']['course_title'], "django web course")
+		self.assertEqual(Request.objects.count(), 2)
+
+	def test_async_invalid(self):
+		response = self.client.post("/api/requests/create/?mode=async", dict(self.data, price=300))
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(PredictionJob.objects.count(), 0)
+
+	def test_claim_once(self):
+		self.client.post("/api/requests/create/?mode=async", self.data)
+
+		self.assertIsNotNone(claim_job('first-worker'))
+		self.assertIsNone(claim_job('second-worker'))
+
+		PredictionJob.objects.update(started_at=timezone.now() - timezone.timedelta(hours=1))
+		self.assertEqual(requeue_stale_jobs(timeout=60), 1)
+		self.assertEqual(claim_job('second-worker').attempts, 2)
+
+	def test_other_owner(self):
+		response = self.client.post("/api/requests/create/?mode=async", self.data)
+		other_user = User.objects.create_user(username="otheruser", password="some_strong_psw")
+		self.client.force_authenticate(user=other_user)
+
+		self.assertEqual(self.client.get(response.data['url']).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CurveRequestTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model_path = "./MlModels/algorithms/GradientBoostingRegressor_V1_2020-06-19"
+		self.model = MlModel.objects.create(owner=self.user,
+											name='GradientBoostingRegressor',
+											version='V1',
+											description='First Version',
+											file=self.model_path,
+											status=MlModel.READY)
+		self.client.force_authenticate(user=self.user)
+
+		self.data = {
+			"course_title": "Django Web Course",
+			"price": 100,
+			"content_duration": 40,
+			"num_lectures": 40,
+			"level": "All Levels",
+			"algorithm": self.model.pk,
+		}
+
+	def test_curve_list(self):
+		response = self.client.post("/api/requests/curve/", dict(self.data, days=[30, 365]), format='json')
+		single_response = self.client.post("/api/requests/create/", dict(self.data, days=365))
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data['days'], [30, 365])
+		self.assertEqual(response.data['predictions'][1], single_response.data['prediction'])
+		self.assertEqual(Request.objects.count(), 1)
+
+	def test_curve_range(self):
+		data = dict(self.data, days_start=30, days_stop=90, days_step=30)
+		response = self.client.post("/api/requests/curve/", data, format='json')
+
+		self.assertEqual(response.data['days'], [30, 60, 90])
+		self.assertEqual(len(response.data['predictions']), 3)
+		self.assertEqual(Request.objects.count(), 0)
+
+	@override_settings(ML_CURVE={'MAX_POINTS': 2})
+	def test_curve_limits(self):
+		response = self.client.post("/api/requests/curve/", dict(self.data, days=[30, 60, 90]), format='json')
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+		response = self.client.post("/api/requests/curve/", dict(self.data, days=[0, 30]), format='json')
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+	def test_curve_huge_range(self):
+		data = dict(self.data, days_start=1, days_stop=10 ** 10, days_step=1)
+		response = self.client.post("/api/requests/curve/", data, format='json')
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn("at most", str(response.data))
+
+
+class SweepRequestTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model_path = "./MlModels/algorithms/GradientBoostingRegressor_V1_2020-06-19"
+		self.model = MlModel.objects.create(owner=self.user,
+											name='GradientBoostingRegressor',
+											version='V1',
+											description='First Version',
+											file=self.model_path,
+											status=MlModel.READY)
+		self.client.force_authenticate(user=self.user)
+
+		self.data = {
+			"course_title": "Django Web Course",
+			"price": [50, 100],
+			"content_duration": {"start": 10, "stop": 40, "step": 15},
+			"num_lectures": 40,
+			"level": ["All Levels", "Beginner Level"],
+			"days": 365,
+			"algorithm": self.model.pk,
+		}
+
+	@override_settings(ML_SWEEP={'MAX_POINTS': 100, 'CHUNK_SIZE': 5})
+	def test_sweep(self):
+		response = self.client.post("/api/requests/sweep/", self.data, format='json')
+		columns = response.data['columns']
+		single_data = dict(self.data, price=100, content_duration=25, num_lectures=40, level="Beginner Level")
+		single_response = self.client.post("/api/requests/create/", single_data)
+		index = list(zip(columns['price'], columns['content_duration'], columns['level'])).index(
+			(100, 25, "Beginner Level"))
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data['size'], 12)
+		self.assertEqual(len(columns['prediction']), 12)
+		self.assertEqual(columns['prediction'][index], single_response.data['prediction'])
+		self.assertEqual(Request.objects.count(), 1)
+
+	@override_settings(ML_SWEEP={'MAX_POINTS': 10, 'CHUNK_SIZE': 5})
+	def test_sweep_limits(self):
+		response = self.client.post("/api/requests/sweep/", self.data, format='json')
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+		response = self.client.post("/api/requests/sweep/", dict(self.data, price=[10, 100]), format='json')
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ScoreCsvTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model_path = "./MlModels/algorithms/GradientBoostingRegressor_V1_2020-06-19"
+		self.model = MlModel.objects.create(owner=self.user,
+											name='GradientBoostingRegressor',
+											version='V1',
+											description='First Version',
+											file=self.model_path,
+											status=MlModel.READY)
+		self.client.force_authenticate(user=self.user)
+
+		with open("../Analitics/udemy_courses_cleaned.csv", "rb") as csv_file:
+			self.lines = csv_file.read().splitlines(keepends=True)[:6]
+
+	def get_file(self, lines):
+		return SimpleUploadedFile("courses.csv", b"".join(lines), content_type="text/csv")
+
+	@override_settings(ML_CSV_SCORING={'CHUNK_SIZE': 2})
+	def test_score_csv(self):
+		response = self.client.post("/api/requests/score/", {"file": self.get_file(self.lines), "algorithm": self.model.pk})
+		parts = [part.decode() for part in response.streaming_content]
+		rows = "".join(parts).splitlines()
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(len(parts), 3)
+		self.assertEqual(len(rows), 6)
+		self.assertTrue(rows[0].endswith(",prediction"))
+		self.assertEqual(Request.objects.count(), 0)
+
+	def test_score_ndjson(self):
+		data = {"file": self.get_file(self.lines), "algorithm": self.model.pk, "output_format": "ndjson"}
+		response = self.client.post("/api/requests/score/", data)
+		rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+		self.assertEqual(len(rows), 5)
+		self.assertIsInstance(rows[0]['prediction'], int)
+
+	@override_settings(ML_CSV_SCORING={'CHUNK_SIZE': 2})
+	def test_invalid_level(self):
+		# fourth data row is in the second chunk, after the response status was sent
+		lines = self.lines[:4] + [self.lines[4].replace(b",All Levels,", b",Unknown Level,")]
+		response = self.client.post("/api/requests/score/", {"file": self.get_file(lines), "algorithm": self.model.pk})
+		rows = b"".join(response.streaming_content).decode().splitlines()
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(len(rows), 4)
+		self.assertEqual(rows[-1], "# error: line 5: unknown level 'Unknown Level'")
+
+	@override_settings(ML_CSV_SCORING={'CHUNK_SIZE': 2})
+	def test_invalid_price_ndjson(self):
+		lines = self.lines[:4] + [self.lines[4].replace(b",True,95,", b",True,free,")]
+		data = {"file": self.get_file(lines), "algorithm": self.model.pk, "output_format": "ndjson"}
+		response = self.client.post("/api/requests/score/", data)
+		rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(len(rows), 3)
+		self.assertEqual(rows[-1], {"error": "line 5: price is not a number"})
+
+	def test_missing_column(self):
+		lines = [line.replace(b"content_duration", b"duration") for line in self.lines]
+		response = self.client.post("/api/requests/score/", {"file": self.get_file(lines), "algorithm": self.model.pk})
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SimilarCoursesTestCase(APITestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.index_dir = tempfile.mkdtemp()
+		cls.settings = override_settings(ML_SIMILAR_COURSES=dict(settings.ML_SIMILAR_COURSES,
+																 INDEX_DIR=cls.index_dir, AUTO_BUILD=False))
+		cls.settings.enable()
+		call_command('build_similarity_index', stdout=io.StringIO())
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.settings.disable()
+		shutil.rmtree(cls.index_dir)
+		super().tearDownClass()
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+		self.client.force_authenticate(user=self.user)
+
+	def test_similar(self):
+		title = "Complete GST Course & Certification - Grow Your CA Practice"
+		response = self.client.get("/api/requests/similar/", {"course_title": title, "k": 3})
+		results = response.data['results']
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(len(results), 3)
+		self.assertEqual(results[0]['course_title'], title)
+		self.assertAlmostEqual(results[0]['similarity'], 1, places=3)
+		self.assertEqual([result['similarity'] for result in results],
+						 sorted([result['similarity'] for result in results], reverse=True))
+		self.assertIsInstance(similar_courses.get_index().idf, np.memmap)
+
+	def test_unknown_words(self):
+		response = self.client.get("/api/requests/similar/", {"course_title": "qwzx 2020"})
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data['results'], [])
+
+	def test_wrong_k(self):
+		response = self.client.get("/api/requests/similar/", {"course_title": "python", "k": 1000})
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+	def test_index_not_built(self):
+		index_dir = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, index_dir)
+		with override_settings(ML_SIMILAR_COURSES=dict(settings.ML_SIMILAR_COURSES, INDEX_DIR=index_dir, AUTO_BUILD=False)):
+			response = self.client.get("/api/requests/similar/", {"course_title": "python"})
+
+		self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+		self.assertIn("build_similarity_index", response.data['error_message'])
+		self.assertEqual(os.listdir(index_dir), [])
+
+
+class BulkScoringTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model_path = "./MlModels/algorithms/GradientBoostingRegressor_V1_2020-06-19"
+		self.model = MlModel.objects.create(owner=self.user,
+											name='GradientBoostingRegressor',
+											version='V1',
+											description='First Version',
+											file=self.model_path,
+											status=MlModel.READY)
+		self.client.force_authenticate(user=self.user)
+
+		with open("../Analitics/udemy_courses_cleaned.csv", "rb") as csv_file:
+			lines = csv_file.read().splitlines(keepends=True)[:6]
+		self.csv_file = tempfile.NamedTemporaryFile(suffix=".csv")
+		self.csv_file.write(b"".join(lines))
+		self.csv_file.flush()
+
+	def tearDown(self):
+		self.csv_file.close()
+
+	def test_score_csv(self):
+		out = io.StringIO()
+		call_command("score_requests", csv=self.csv_file.name, owner=self.user.username,
+					 chunk_size=2, processes=1, stdout=out)
+		request = Request.objects.order_by('pk').first()
+		response = self.client.post("/api/requests/create/", {
+			"course_title": request.course_title,
+			"price": request.price,
+			"content_duration": request.content_duration,
+			"num_lectures": request.num_lectures,
+			"days": request.days,
+			"level": request.level,
+			"algorithm": self.model.pk,
+		})
+
+		self.assertEqual(Request.objects.count(), 6)
+		self.assertEqual(request.prediction, response.data['prediction'])
+		self.assertIn("Scored 5 rows", out.getvalue())
+
+	def test_rescore_requests(self):
+		call_command("score_requests", csv=self.csv_file.name, owner=self.user.username,
+					 processes=0, stdout=io.StringIO())
+		predictions = list(Request.objects.order_by('pk').values_list('prediction', flat=True))
+		Request.objects.update(prediction=0)
+
+		out = io.StringIO()
+		call_command("score_requests", models=[self.model.endpoint], chunk_size=2, processes=0, stdout=out)
+
+		self.assertEqual(list(Request.objects.order_by('pk').values_list('prediction', flat=True)), predictions)
+		self.assertIn("Scored 5 rows", out.getvalue())
+
+	def test_not_ready_models(self):
+		pending_model = MlModel.objects.create(owner=self.user,
+											   name='SVR',
+											   version='V2',
+											   file="./MlModels/algorithms/not_existing_model",
+											   status=MlModel.PENDING)
+		out = io.StringIO()
+		call_command("score_requests", csv=self.csv_file.name, owner=self.user.username,
+					 processes=0, stdout=out)
+
+		self.assertEqual(Request.objects.count(), 5)
+		self.assertFalse(Request.objects.filter(algorithm=pending_model).exists())
+		with self.assertRaises(CommandError):
+			call_command("score_requests", models=[pending_model.endpoint], processes=0, stdout=io.StringIO())
+
+
+class MetricsTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model_path = "./MlModels/algorithms/SVR_V1_2020-06-19"
+		self.model = MlModel.objects.create(owner=self.user,
+											name='SVR',
+											version='V1',
+											description='First Version',
+											file=self.model_path,
+											status=MlModel.READY)
+		self.client.force_authenticate(user=self.user)
+
+		self.data = {
+			"course_title": "Django Web Course",
+			"price": 100,
+			"content_duration": 40,
+			"num_lectures": 40,
+			"days": 365,
+			"level": "All Levels",
+		}
+
+	def test_metrics(self):
+		self.client.post("/api/requests/create/", dict(self.data, algorithm=self.model.pk))
+		self.client.get("/api/requests/list/")
+		metrics = self.client.get("/metrics").content.decode()
+
+		self.assertIn('ml_app_http_request_duration_seconds_count{method="POST",status="201",view="RequestCreateApiView"}', metrics)
+		self.assertIn('ml_app_http_request_db_queries_count{view="RequestListApiView"}', metrics)
+		self.assertIn(f'ml_inference_duration_seconds_count{{endpoint="{self.model.endpoint}",mode="single"}}', metrics)
+		self.assertIn('ml_model_cache_requests_total{result="hit"}', metrics)
+		self.assertIn('ml_predictions_in_flight 0.0', metrics)
+
+	def get_inference_count(self, mode):
+		return REGISTRY.get_sample_value("ml_inference_duration_seconds_count",
+										 {"endpoint": self.model.endpoint, "mode": mode}) or 0
+
+	@override_settings(ML_MICRO_BATCHING={'ENABLED': True, 'WINDOW': 0.001, 'MAX_BATCH_SIZE': 8},
+					   ML_PREDICTION_CACHE={'ENABLED': False})
+	def test_micro_batching_counted_once(self):
+		single, batch = self.get_inference_count("single"), self.get_inference_count("batch")
+		self.client.post("/api/requests/create/", dict(self.data, algorithm=self.model.pk))
+
+		self.assertEqual(self.get_inference_count("single"), single + 1)
+		self.assertEqual(self.get_inference_count("batch"), batch)
+		self.assertEqual(REGISTRY.get_sample_value("ml_predictions_in_flight"), 0)
+
+	def test_compare(self):
+		multi = self.get_inference_count("multi")
+		self.client.post("/api/requests/compare/", self.data, format='json')
+
+		self.assertEqual(self.get_inference_count("multi"), multi + 1)
+		self.assertEqual(REGISTRY.get_sample_value("ml_predictions_in_flight"), 0)
+
+
+class CompareRequestTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="testuser",
+											 email="testuser@email.com",
+		                         			 password="some_strong_psw")
+
+		self.model = MlModel.objects.create(owner=self.user,
+											name='SVR',
+											version='V1',
+											description='First Version',
+											file="./MlModels/algorithms/SVR_V1_2020-06-19",
+											status=MlModel.READY)
+		self.other_model = MlModel.objects.create(owner=self.user,
+												  name='GradientBoostingRegressor',
+												  version='V1',
+												  description='First Version',
+												  file="./MlModels/algorithms/GradientBoostingRegressor_V1_2020-06-19",
+												  status=MlModel.READY)
+		self.client.force_authenticate(user=self.user)
+
+		self.data = {
+			"course_title": "Django Web Course",
+			"price": 100,
+			"content_duration": 40,
+			"num_lectures": 40,
+			"days": 365,
+			"level": "All Levels",
+		}
+
+	def test_compare_all(self):
+		response = self.client.post("/api/requests/compare/", self.data, format='json')
+
+		expected_predictions = [
+			self.client.post("/api/requests/create/", dict(self.data, algorithm=model.pk)).data['prediction']
+			for model in (self.model, self.other_model)
+		]
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual([result['endpoint'] for result in response.data['results']],
+						 [self.model.endpoint, self.other_model.endpoint])
+		self.assertEqual([result['prediction'] for result in response.data['results']], expected_predictions)
+		self.assertEqual(Request.objects.count(), 2)
+
+	def test_compare_subset(self):
+		data = dict(self.data, algorithms=[self.other_model.pk])
+		response = self.client.post("/api/requests/compare/", data, format='json')
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(len(response.data['results']), 1)
+		self.assertEqual(response.data['results'][0]['endpoint'], self.other_model.endpoint)
+		self.assertGreaterEqual(response.data['results'][0]['latency_ms'], 0)
+
+
 class RequestListTestCase(APITestCase):
 
 	def setUp(self):
@@ -180,7 +797,8 @@ class RequestListTestCase(APITestCase):
 											name='SVR',
 											version='V1',
 											description='First Version',
-											file=self.model_path)
+											file=self.model_path,
+											status=MlModel.READY)
 		
 		self.request = Request.objects.create(course_title="Django Web Course",
 											  price=100,
@@ -230,7 +848,8 @@ class RequestDetailsTestCase(APITestCase):
 											name='SVR',
 											version='V1',
 											description='First Version',
-											file=self.model_path)
+											file=self.model_path,
+											status=MlModel.READY)
 		
 		self.request = Request.objects.create(course_title="Django Web Course",
 											  price=100,
@@ -263,7 +882,12 @@ class RequestDetailsTestCase(APITestCase):
 			    "description": self.request.algorithm.description,
 			    "created_at": self.request.algorithm.created_at.date(),
 			    "endpoint": self.request.algorithm.endpoint,
-			    "owner_name": self.request.algorithm.owner.username
+			    "owner_name": self.request.algorithm.owner.username,
+			    "status": MlModel.READY,
+			    "validation_error": "",
+			    "load_time": None,
+			    "row_latency": None,
+			    "memory_size": None
 			    },
 			"owner_name": self.request.owner.username
 		}
@@ -313,3 +937,68 @@ class RequestDetailsTestCase(APITestCase):
 
 		self.assertEqual(response.data, expected_response)
 		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class RequestAdminTestCase(APITestCase):
+
+	def setUp(self):
+		self.user = User.objects.create_superuser(username="admin",
+												  email="admin@email.com",
+												  password="some_strong_psw")
+		self.client.force_login(self.user)
+
+		self.model = MlModel.objects.create(owner=self.user,
+											name='SVR',
+											version='V1',
+											description='First Version',
+											file="./MlModels/algorithms/SVR_V1_2020-06-19",
+											status=MlModel.READY)
+
+		self.request = Request.objects.create(course_title="Django Web Course",
+											  price=100,
+											  content_duration=40,
+											  num_lectures=40,
+											  days=365,
+											  level="All Levels",
+											  owner=self.user,
+											  algorithm=self.model)
+
+	def add_requests(self, count):
+		# rows with stored endpoints and predictions, the model is not called
+		start = Request.objects.count()
+		Request.objects.bulk_create([
+			Request(course_title="Django Web Course", price=100, content_duration=40, num_lectures=40,
+					days=365, level="All Levels", owner=self.user, algorithm=self.model,
+					prediction=1000, endpoint=f'{self.request.endpoint}_bulk_{i}')
+			for i in range(start, start + count)
+		])
+
+	def get_changelist_queries(self):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get("/admin/Requests/request/")
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		return len(queries)
+
+	def test_str(self):
+		request = Request.objects.get(pk=self.request.pk)
+
+		with self.assertNumQueries(0):
+			self.assertEqual(str(request), self.request.endpoint)
+
+	def test_changelist_queries(self):
+		self.add_requests(2)
+		few = self.get_changelist_queries()
+		self.add_requests(40)
+
+		self.assertEqual(self.get_changelist_queries(), few)
+
+	def test_allocate_endpoint(self):
+		request = Request.objects.get(pk=self.request.pk)
+
+		self.assertEqual(request.allocate_endpoint(), self.request.endpoint)
+
+		request.days = 730
+		endpoint = request.allocate_endpoint()
+		self.assertNotEqual(endpoint, self.request.endpoint)
+		self.assertEqual(request.endpoint, endpoint)
+		self.assertEqual(Request.objects.get(pk=request.pk).endpoint, self.request.endpoint)
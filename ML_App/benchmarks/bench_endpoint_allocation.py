@@ -0,0 +1,86 @@
+'''
+Benchmark of endpoint allocation as the number of objects sharing one base endpoint grows:
+recursive probing with one exists() query per taken suffix vs per-base counters.
+
+Runs on a temporary in-memory test database.
+
+Usage (from ML_App folder):
+    python -m benchmarks.bench_endpoint_allocation [--collisions 0 10 100 1000] [--repeat N]
+'''
+import argparse
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ML_App.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from MlModels.endpoints import allocate_endpoints, format_endpoint
+from MlModels.helpers import get_endpoint
+from MlModels.models import MlModel
+
+
+def legacy_create_endpoint(instance, new_endpoint=None, new_id=1):
+    '''
+    Original recursive implementation, kept as the reference for timing
+    '''
+    endpoint = new_endpoint or get_endpoint(instance)
+    if MlModel.objects.filter(endpoint=endpoint).exclude(pk=instance.pk).exists():
+        if new_endpoint:
+            endpoint = f'{endpoint.rsplit("_", maxsplit=1)[0]}_{new_id}'
+        else:
+            endpoint = f'{endpoint}_{new_id}'
+        return legacy_create_endpoint(instance, endpoint, new_id + 1)
+    return endpoint
+
+
+def measure(func, repeat):
+    '''
+    Function returns best time of one call in seconds and number of queries of the last call
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+    return best, len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--collisions', type=int, nargs='+', default=[0, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0)
+    owner = User.objects.create_user(username='benchmark')
+
+    print(f'{"collisions":>10} {"legacy":>12} {"queries":>8} {"counter":>12} {"queries":>8}')
+    for i, collisions in enumerate(args.collisions):
+        instance = MlModel(owner=owner, name='SVR', version=f'V{i}', file='not_existing_model')
+        base = get_endpoint(instance)
+        # taken endpoints are stored the same way for both allocators
+        MlModel.objects.bulk_create([
+            MlModel(owner=owner, name='SVR', version=f'V{i}', file='not_existing_model',
+                    endpoint=format_endpoint(base, number))
+            for number in range(collisions)
+        ])
+        allocate_endpoints(MlModel, {base: 1})
+
+        try:
+            legacy_time, legacy_queries = measure(lambda: legacy_create_endpoint(instance), args.repeat)
+            legacy = f'{legacy_time * 1000:>9.3f} ms {legacy_queries:>8}'
+        except RecursionError:
+            # one stack frame per taken suffix
+            legacy = f'{"RecursionError":>21}'
+        counter_time, counter_queries = measure(lambda: allocate_endpoints(MlModel, {base: 1}), args.repeat)
+        print(f'{collisions:>10} {legacy} {counter_time * 1000:>9.3f} ms {counter_queries:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+'''
+Benchmark of model input construction: pandas DataFrame vs ColumnFrame fast path.
+
+Usage (from ML_App folder):
+    python -m benchmarks.bench_prediction_input [--repeat N] [--batch-size N]
+'''
+from types import SimpleNamespace
+from Prediction_Pipeline.prediction_pipeline import load_model, requests_to_frame, requests_to_columns
+import argparse
+import glob
+import os
+import time
+import numpy as np
+
+
+ALGORITHMS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'MlModels',
+    'algorithms',
+)
+
+SAMPLE = SimpleNamespace(
+    course_title='complete python web development course',
+    price=100,
+    content_duration=20,
+    num_lectures=20,
+    days=365,
+    level='All Levels',
+)
+
+
+def timeit(func, repeat):
+    '''
+    Function returns median time of one call in seconds and the last result
+    '''
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=1)
+    args = parser.parse_args()
+
+    requests = [SAMPLE] * args.batch_size
+
+    frame_time, _ = timeit(lambda: requests_to_frame(requests), args.repeat)
+    columns_time, _ = timeit(lambda: requests_to_columns(requests), args.repeat)
+    print(f'batch size: {args.batch_size}')
+    print(f'{"input only":<40} frame {frame_time * 1e6:9.1f} us  columns {columns_time * 1e6:9.1f} us')
+
+    for path in sorted(filter(os.path.isfile, glob.glob(os.path.join(ALGORITHMS_PATH, '*')))):
+        model = load_model(path)
+        frame_time, frame_prediction = timeit(lambda: model.predict(requests_to_frame(requests)), args.repeat)
+        columns_time, columns_prediction = timeit(lambda: model.predict(requests_to_columns(requests)), args.repeat)
+
+        assert np.array_equal(frame_prediction, columns_prediction), f'{path}: different predictions'
+
+        print(f'{os.path.basename(path):<40} frame {frame_time * 1e6:9.1f} us  columns {columns_time * 1e6:9.1f} us  '
+              f'x{frame_time / columns_time:.2f}')
+
+
+if __name__ == '__main__':
+    main()
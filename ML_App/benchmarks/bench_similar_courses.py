@@ -0,0 +1,83 @@
+'''
+Benchmark of the similar courses lookup: memory-mapped TF-IDF index vs brute force
+(TfidfVectorizer.transform of the query and cosine similarity with all courses).
+
+Usage (from ML_App folder):
+    python -m benchmarks.bench_similar_courses [--queries N] [--k N]
+'''
+from sklearn.feature_extraction.text import TfidfVectorizer
+from Prediction_Pipeline.similarity import SimilarityIndex, build_index
+from Prediction_Pipeline.text_features import title_features
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+
+DATASET_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'Analitics',
+    'udemy_courses_cleaned.csv',
+)
+
+
+def per_query(func, titles):
+    '''
+    Function returns per query latencies in seconds and the results
+    '''
+    timings, results = [], []
+    for title in titles:
+        start = time.perf_counter()
+        results.append(func(title))
+        timings.append(time.perf_counter() - start)
+    return np.array(timings), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    titles = pd.read_csv(DATASET_PATH)['course_title'].fillna('').astype(str)
+    queries = titles.sample(min(args.queries, len(titles)), random_state=0).tolist()
+
+    index_dir = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        build_index(DATASET_PATH, index_dir)
+        build_time = time.perf_counter() - start
+        index = SimilarityIndex.load(index_dir)
+        index.search(queries[0], args.k)
+        index_timings, index_results = per_query(lambda title: index.search(title, args.k), queries)
+    finally:
+        shutil.rmtree(index_dir)
+
+    vectorizer = TfidfVectorizer(analyzer=title_features.analyze, lowercase=False)
+    matrix = vectorizer.fit_transform(titles)
+
+    def brute_force(title):
+        scores = (matrix @ vectorizer.transform([title]).T).toarray().ravel()
+        top = np.argsort(-scores, kind='stable')[:args.k]
+        return [(i, scores[i]) for i in top if scores[i] > 0]
+
+    brute_timings, brute_results = per_query(brute_force, queries)
+
+    # scores of all k places must agree (ties may be ordered differently)
+    agree = np.mean([
+        np.allclose([score for _, score in results], [score for _, score in expected], atol=1e-5)
+        for results, expected in zip(index_results, brute_results)
+    ])
+
+    print(f'courses: {len(titles)}, queries: {len(queries)}, k: {args.k}, index build: {build_time:.2f}s')
+    for name, timings in (('index', index_timings), ('brute force', brute_timings)):
+        print(f'{name:<12} p50 {np.percentile(timings, 50) * 1000:8.3f} ms  '
+              f'p99 {np.percentile(timings, 99) * 1000:8.3f} ms')
+    print(f'top-k similarity agreement: {agree:.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+'''
+Benchmark of title_analyzer over all course titles from the cleaned Udemy dataset.
+
+Usage (from ML_App folder):
+    python -m benchmarks.bench_title_analyzer [--repeat N]
+'''
+from nltk.stem import PorterStemmer
+from nltk.corpus import stopwords
+from Prediction_Pipeline.text_features import TitleAnalyzer
+import argparse
+import os
+import re
+import string
+import time
+import pandas as pd
+
+
+DATASET_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'Analitics',
+    'udemy_courses_cleaned.csv',
+)
+
+
+def legacy_title_analyzer(txt):
+    '''
+    Original per-token implementation, kept as the reference for results and timing
+    '''
+    txt_lower = txt.lower()
+    punctuation_table = str.maketrans( {key: None for key in string.punctuation} )
+    txt_lower.translate(punctuation_table)
+    token_pattern = re.compile(r'\b\w\w+\b', re.ASCII)
+    tokens = re.findall(token_pattern, txt_lower)
+    tokens_stemmed = [PorterStemmer().stem(token) for token in tokens]
+    tokens_without_stopwords = [token for token in tokens_stemmed if token not in stopwords.words('english')]
+    tokens_without_numbers = [token for token in tokens_without_stopwords if not token.isdigit()]
+    return tokens_without_numbers
+
+
+def timeit(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    titles = pd.read_csv(DATASET_PATH)['course_title'].astype(str).tolist()
+
+    legacy_time, legacy_tokens = timeit(lambda: [legacy_title_analyzer(title) for title in titles], args.repeat)
+
+    def analyze_cold():
+        analyzer = TitleAnalyzer()
+        return [analyzer.analyze(title) for title in titles]
+
+    cold_time, cold_tokens = timeit(analyze_cold, args.repeat)
+    analyzer = TitleAnalyzer()
+    warm_time, warm_tokens = timeit(lambda: [analyzer.analyze(title) for title in titles], args.repeat)
+    batch_time, batch_tokens = timeit(lambda: analyzer.analyze_many(titles), args.repeat)
+
+    assert legacy_tokens == cold_tokens == warm_tokens == batch_tokens, 'analyzers return different tokens'
+
+    print(f'titles: {len(titles)}')
+    for name, seconds in (
+        ('legacy', legacy_time),
+        ('engine (cold stem cache)', cold_time),
+        ('engine (warm stem cache)', warm_time),
+        ('engine batch mode', batch_time),
+    ):
+        print(f'{name:<26} {seconds * 1000:10.2f} ms  {seconds / len(titles) * 1e6:8.2f} us/title  '
+              f'x{legacy_time / seconds:.1f}')
+    print(f'stem cache: {analyzer.cache_info()}')
+
+
+if __name__ == '__main__':
+    main()